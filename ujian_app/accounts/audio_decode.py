@@ -0,0 +1,85 @@
+# accounts/audio_decode.py
+"""
+Decode audio langsung ke array mono float32 di memori, tanpa file sementara.
+WAV/FLAC/OGG dibaca soundfile dari buffer; format lain (WebM/Opus dari
+browser, MP3, M4A) di-decode ffmpeg lewat pipe stdin/stdout.
+"""
+import io
+import logging
+import subprocess
+
+import librosa
+import numpy as np
+import soundfile as sf
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TARGET_SR = 16000
+
+
+class AudioDecodeError(ValueError):
+    pass
+
+
+def _read_source(source):
+    """(bytes atau None, path atau None) dari UploadedFile / bytes / path."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source), None
+    if isinstance(source, str):
+        return None, source
+    # UploadedFile besar sudah ditulis Django ke disk: pakai path-nya langsung
+    if hasattr(source, 'temporary_file_path'):
+        return None, source.temporary_file_path()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source.read(), None
+
+
+def _decode_soundfile(data, path):
+    try:
+        y, sr = sf.read(io.BytesIO(data) if data is not None else path, dtype='float32', always_2d=True)
+    except (sf.LibsndfileError, RuntimeError, TypeError):
+        return None, None
+    return y.mean(axis=1), sr
+
+
+def _decode_ffmpeg(data, path, target_sr):
+    cmd = [
+        getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'),
+        '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-i', path if path is not None else 'pipe:0',
+        '-f', 'f32le', '-ac', '1', '-ar', str(target_sr), 'pipe:1',
+    ]
+    try:
+        proc = subprocess.run(
+            cmd,
+            input=data if path is None else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=getattr(settings, 'AUDIO_DECODE_TIMEOUT', 30),
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise AudioDecodeError(f"ffmpeg gagal dijalankan: {e}") from e
+    if proc.returncode != 0:
+        raise AudioDecodeError(f"ffmpeg gagal decode audio: {proc.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(proc.stdout, dtype='<f4').astype(np.float32)
+
+
+def decode_audio(source, target_sr=TARGET_SR):
+    """
+    Audio mono float32 pada target_sr dari UploadedFile, bytes, atau path.
+    AudioDecodeError jika format tidak bisa dibaca atau audio kosong.
+    """
+    data, path = _read_source(source)
+
+    y, sr = _decode_soundfile(data, path)
+    if y is None:
+        y, sr = _decode_ffmpeg(data, path, target_sr), target_sr
+    elif sr != target_sr:
+        y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+
+    if y.size == 0:
+        raise AudioDecodeError("Audio kosong")
+    return np.ascontiguousarray(y, dtype=np.float32)
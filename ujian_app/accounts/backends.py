@@ -4,30 +4,25 @@ from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import authenticate as default_authenticate
 from django.core.exceptions import ValidationError
 from .models import User, Siswa  # Import model custom
-from ultralytics import YOLO
+import numpy as np
+from .image_decode import decode_image
+from .inference import detect_faces
 
 class FaceAuthBackend(BaseBackend):
-    # Load model once
-    yolo_model = YOLO(settings.YOLO_FACE_MODEL)
-
     def authenticate(self, request, username=None, image=None):
         try:
             user = User.objects.get(username=username)
             if not hasattr(user, 'siswa'):
                 return None
                 
-            # Verify image
-            results = self.yolo_model.predict(
-                source=image,
-                conf=settings.FACE_THRESHOLD,
-                verbose=False
-            )
+            # Verify image (daemon inferensi / lokal)
+            if not isinstance(image, np.ndarray):
+                image = decode_image(image).array
+            detections = detect_faces(image, conf=settings.FACE_THRESHOLD)
             
-            for result in results:
-                for box in result.boxes:
-                    detected_name = self.yolo_model.names[int(box.cls.item())].lower()
-                    if detected_name == user.username.lower():
-                        return user
+            for detected_name in detections.labels:
+                if detected_name.lower() == user.username.lower():
+                    return user
             return None
             
         except Exception as e:
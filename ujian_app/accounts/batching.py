@@ -0,0 +1,130 @@
+# accounts/batching.py
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Mengumpulkan item dari banyak request (thread) yang datang hampir
+    bersamaan, lalu memprosesnya dalam satu panggilan batch_fn(list_item).
+    Setiap pemanggil submit() menerima hasil miliknya sendiri.
+
+    batch_fn harus mengembalikan list hasil dengan urutan sama seperti input.
+    Hasil berupa instance Exception hanya dilempar ke pemanggil item itu,
+    jadi satu item rusak tidak menggagalkan seluruh batch. Item yang
+    pemanggilnya sudah timeout dibuang sebelum diproses.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait_ms=5.0, name='batch'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_queue_depth = 0
+        self._dropped = 0
+        self._fill_histogram = [0] * (self.max_batch_size + 1)
+        self._busy_seconds = 0.0
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'{self.name}-scheduler', daemon=True)
+                self._thread.start()
+
+    def submit(self, item, timeout=None):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        depth = self._queue.qsize()
+        if depth > self._max_queue_depth:
+            with self._stats_lock:
+                self._max_queue_depth = max(self._max_queue_depth, depth)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # Item yang belum diambil worker dibatalkan agar tidak memakan kapasitas batch
+            future.cancel()
+            raise
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Tetap ambil item yang sudah mengantre tanpa menunggu
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            collected = self._collect()
+            # Future yang sudah dibatalkan (pemanggil timeout) tidak diproses
+            batch = [(item, future) for item, future in collected if future.set_running_or_notify_cancel()]
+            if len(batch) < len(collected):
+                with self._stats_lock:
+                    self._dropped += len(collected) - len(batch)
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"batch_fn mengembalikan {len(results)} hasil untuk {len(items)} item")
+            except Exception as e:
+                logger.exception("Batch %s gagal", self.name)
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            finally:
+                with self._stats_lock:
+                    self._batches += 1
+                    self._items += len(batch)
+                    self._fill_histogram[len(batch)] += 1
+                    self._busy_seconds += time.perf_counter() - start
+
+    def stats(self):
+        with self._stats_lock:
+            batches = self._batches
+            return {
+                'name': self.name,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_depth': self._max_queue_depth,
+                'batches': batches,
+                'items': self._items,
+                'dropped': self._dropped,
+                'avg_batch_size': self._items / batches if batches else 0.0,
+                'avg_batch_fill': self._items / (batches * self.max_batch_size) if batches else 0.0,
+                'fill_histogram': list(self._fill_histogram),
+                'busy_seconds': self._busy_seconds,
+            }
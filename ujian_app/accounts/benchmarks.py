@@ -0,0 +1,121 @@
+# accounts/benchmarks.py
+"""
+Utilitas bersama untuk command benchmark (bench_*): ringkasan latensi,
+pengukuran RSS puncak per tahap di proses anak, dan penyimpanan/perbandingan
+hasil JSON antar commit.
+"""
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+
+
+def latency_summary(seconds):
+    ms = np.asarray(seconds, dtype=np.float64) * 1000.0
+    total = float(np.sum(seconds))
+    return {
+        'runs': int(len(ms)),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'throughput_per_s': len(ms) / total if total > 0 else None,
+    }
+
+
+def time_calls(fn, inputs, warmup=1, repeat=1):
+    """Jalankan fn(x) untuk setiap input; kembalikan list durasi (detik) tanpa warmup."""
+    for x in inputs[:warmup]:
+        fn(x)
+    durations = []
+    for _ in range(repeat):
+        for x in inputs:
+            start = time.perf_counter()
+            fn(x)
+            durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _max_rss_mb():
+    # ru_maxrss dalam KB di Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _child(fn, queue):
+    try:
+        before = _max_rss_mb()
+        result = fn()
+        result['peak_rss_mb'] = _max_rss_mb()
+        result['peak_rss_delta_mb'] = result['peak_rss_mb'] - before
+        queue.put(result)
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(fn):
+    """
+    Jalankan fn() (mengembalikan dict) di proses anak hasil fork agar RSS
+    puncak satu tahap tidak tercampur dengan tahap lain.
+    """
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(fn, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info():
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+    }
+
+
+def default_output_path(name):
+    commit = git_commit() or datetime.now().strftime('%Y%m%d_%H%M%S')
+    root = getattr(settings, 'BENCHMARK_DIR', os.path.join(settings.BASE_DIR, 'benchmarks'))
+    return os.path.join(root, f'{name}-{commit}.json')
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(report, fh, indent=2)
+
+
+def compare_reports(baseline, current, metrics=('p50_ms', 'p95_ms', 'peak_rss_delta_mb')):
+    """Selisih persen per tahap & metrik (positif = lebih lambat / lebih boros)."""
+    rows = []
+    for stage, cur in current.get('stages', {}).items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base:
+            continue
+        for metric in metrics:
+            old, new = base.get(metric), cur.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100.0 if old else None
+            rows.append((stage, metric, old, new, change))
+    return rows
@@ -0,0 +1,192 @@
+# accounts/detector_export.py
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+SUPPORTED_BACKENDS = ('onnx', 'openvino')
+
+
+def exported_model_path(backend, int8=False, weights=None):
+    """Path hasil ekspor ultralytics untuk bobot YOLO_FACE_MODEL."""
+    weights = weights or settings.YOLO_FACE_MODEL
+    stem, _ = os.path.splitext(weights)
+    if backend == 'onnx':
+        if int8:
+            raise ValueError("Kuantisasi int8 hanya didukung untuk backend openvino")
+        return stem + '.onnx'
+    if backend == 'openvino':
+        return stem + ('_int8_openvino_model' if int8 else '_openvino_model')
+    raise ValueError(f"Backend tidak dikenal: {backend}")
+
+
+def find_images(folder, limit=None):
+    paths = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    paths.sort()
+    return paths[:limit] if limit else paths
+
+
+def build_calibration_dataset(image_dir, workdir, names, max_images=300):
+    """
+    Dataset YOLO minimal (tanpa label) untuk kalibrasi int8, berisi gambar
+    wajah lokal (default MEDIA_ROOT/faces). Mengembalikan path data.yaml.
+    """
+    images = find_images(image_dir, limit=max_images)
+    if not images:
+        raise ValueError(f"Tidak ada gambar kalibrasi di {image_dir}")
+
+    img_dir = os.path.join(workdir, 'images')
+    os.makedirs(img_dir, exist_ok=True)
+    for idx, src in enumerate(images):
+        _, ext = os.path.splitext(src)
+        shutil.copy(src, os.path.join(img_dir, f'calib_{idx:05d}{ext.lower()}'))
+
+    yaml_path = os.path.join(workdir, 'data.yaml')
+    with open(yaml_path, 'w', encoding='utf-8') as fh:
+        fh.write(f"path: {workdir}\n")
+        fh.write("train: images\n")
+        fh.write("val: images\n")
+        fh.write("names:\n")
+        for idx in sorted(names):
+            fh.write(f"  {idx}: {names[idx]!r}\n")
+    return yaml_path, len(images)
+
+
+def export_face_detector(backend, int8=False, calibration_dir=None, max_calibration_images=300, imgsz=640):
+    """Ekspor best.pt ke format CPU (onnx/openvino). Mengembalikan path hasil."""
+    from ultralytics import YOLO
+
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Backend harus salah satu dari {', '.join(SUPPORTED_BACKENDS)}")
+    target = exported_model_path(backend, int8=int8)
+
+    # Model baru (bukan dari registry) karena export mengubah state model
+    model = YOLO(settings.YOLO_FACE_MODEL)
+    # Batch dinamis: detect_faces_batch_local mengirim hingga PROCTORING_BATCH_MAX_SIZE gambar sekaligus
+    kwargs = {
+        'format': backend,
+        'imgsz': imgsz,
+        'dynamic': True,
+        'batch': getattr(settings, 'PROCTORING_BATCH_MAX_SIZE', 16),
+    }
+
+    workdir = None
+    try:
+        if int8:
+            calibration_dir = calibration_dir or os.path.join(settings.MEDIA_ROOT, 'faces')
+            workdir = tempfile.mkdtemp(prefix='face_calib_')
+            data_yaml, _ = build_calibration_dataset(calibration_dir, workdir, model.names, max_calibration_images)
+            kwargs.update(int8=True, data=data_yaml, fraction=1.0)
+        exported = model.export(**kwargs)
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return str(exported or target)
+
+
+def _load_rgb(path):
+    with Image.open(path) as img:
+        return np.array(img.convert('RGB'))
+
+
+def _iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _match(ref, cand, iou_threshold):
+    """Pencocokan greedy kotak dengan label sama. Mengembalikan list IoU pasangan."""
+    used = set()
+    ious = []
+    for i in np.argsort(-ref.confidences):
+        best_j, best_iou = None, iou_threshold
+        for j in range(len(cand)):
+            if j in used or cand.labels[j] != ref.labels[i]:
+                continue
+            iou = _iou(ref.boxes[i], cand.boxes[j])
+            if iou >= best_iou:
+                best_j, best_iou = j, iou
+        if best_j is not None:
+            used.add(best_j)
+            ious.append(best_iou)
+    return ious
+
+
+def _latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000.0
+    return {
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+    }
+
+
+def compare_detectors(image_paths, reference, candidate, conf=None, iou_threshold=0.5, warmup=2):
+    """
+    Bandingkan latensi dan kesesuaian deteksi dua model YOLO (mis. PyTorch vs
+    OpenVINO int8) pada daftar gambar yang sama.
+    """
+    from .inference import _predict
+
+    images = [_load_rgb(p) for p in image_paths]
+    if not images:
+        raise ValueError("Tidak ada gambar untuk dibandingkan")
+
+    for model in (reference, candidate):
+        for img in images[:warmup]:
+            _predict(model, [img], conf=conf)
+
+    ref_times, cand_times = [], []
+    ref_boxes = cand_boxes = matched = identical = top1_same = 0
+    ious = []
+    for img in images:
+        start = time.perf_counter()
+        ref = _predict(reference, [img], conf=conf)[0]
+        ref_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        cand = _predict(candidate, [img], conf=conf)[0]
+        cand_times.append(time.perf_counter() - start)
+
+        pairs = _match(ref, cand, iou_threshold)
+        ref_boxes += len(ref)
+        cand_boxes += len(cand)
+        matched += len(pairs)
+        ious.extend(pairs)
+        if len(pairs) == len(ref) == len(cand):
+            identical += 1
+
+        ref_top = ref.labels[int(np.argmax(ref.confidences))] if len(ref) else None
+        cand_top = cand.labels[int(np.argmax(cand.confidences))] if len(cand) else None
+        if ref_top == cand_top:
+            top1_same += 1
+
+    n = len(images)
+    ref_latency = _latency_summary(ref_times)
+    cand_latency = _latency_summary(cand_times)
+    return {
+        'images': n,
+        'reference_latency': ref_latency,
+        'candidate_latency': cand_latency,
+        'speedup_p50': ref_latency['p50_ms'] / cand_latency['p50_ms'] if cand_latency['p50_ms'] else None,
+        'reference_boxes': ref_boxes,
+        'candidate_boxes': cand_boxes,
+        'box_recall': matched / ref_boxes if ref_boxes else 1.0,
+        'box_precision': matched / cand_boxes if cand_boxes else 1.0,
+        'mean_iou': float(np.mean(ious)) if ious else None,
+        'image_agreement': identical / n,
+        'top1_label_agreement': top1_same / n,
+    }
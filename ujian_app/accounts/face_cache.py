@@ -0,0 +1,31 @@
+# accounts/face_cache.py
+import numpy as np
+from django.conf import settings
+
+from .cache import LRUCache
+from .models import UserFace
+
+# Encoding wajah terdaftar (np.float64, 128-d) per user_id. Diinvalidasi oleh
+# sinyal post_save/post_delete UserFace (lihat accounts/signals.py); TTL
+# menjaga agar worker lain yang tidak menerima sinyal tidak lama basi.
+known_encodings = LRUCache(
+    maxsize=getattr(settings, 'FACE_ENCODING_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'FACE_ENCODING_CACHE_TTL', 300),
+    name='face_encodings',
+)
+
+
+def _load_encoding(user_id):
+    encoding = UserFace.objects.filter(user_id=user_id).values_list('encoding', flat=True).first()
+    if encoding is None:
+        return None
+    return np.frombuffer(bytes(encoding), dtype=np.float64)
+
+
+def get_known_encoding(user_id):
+    """Encoding wajah terdaftar milik user, atau None jika belum enroll."""
+    return known_encodings.get_or_load(user_id, lambda: _load_encoding(user_id))
+
+
+def invalidate_known_encoding(user_id):
+    known_encodings.invalidate(user_id)
@@ -0,0 +1,191 @@
+# accounts/face_crops.py
+"""
+Penyimpanan crop wajah hasil deteksi (MEDIA_ROOT/detected_faces) di luar
+jalur request: crop dimasukkan ke antrean terbatas dan ditulis oleh thread
+latar. File dibagi per tanggal dan user:
+    detected_faces/<YYYY>/<MM>/<DD>/<username>/<username>_<HHMMSS>_<id>.jpg
+"""
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CROP_DIR = 'detected_faces'
+# Nama file lama (folder datar): <username>_<YYYYmmdd>_<HHMMSS>_<id>.jpg
+LEGACY_NAME = re.compile(r'^(?P<username>.+)_(?P<date>\d{8})_(?P<time>\d{6})_(?P<uid>[0-9a-f\-]+)\.jpg$')
+
+
+def crop_root():
+    return os.path.join(settings.MEDIA_ROOT, CROP_DIR)
+
+
+def crop_path(username, when=None):
+    when = when or datetime.now()
+    folder = os.path.join(crop_root(), when.strftime('%Y'), when.strftime('%m'), when.strftime('%d'), username)
+    filename = f"{username}_{when.strftime('%H%M%S')}_{uuid.uuid4().hex[:8]}.jpg"
+    return os.path.join(folder, filename)
+
+
+class CropWriter:
+    def __init__(self, maxsize=256):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='face-crop-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, username, face_img):
+        """Masukkan crop ke antrean; jika antrean penuh crop dibuang (tidak memblokir request)."""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((username, face_img, datetime.now()))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            username, face_img, when = self._queue.get()
+            try:
+                path = crop_path(username, when)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                face_img.save(path, format='JPEG')
+                self.written += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Gagal menyimpan crop wajah %s", username)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """Tunggu antrean kosong (dipakai oleh command/benchmark)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+crop_writer = CropWriter(maxsize=getattr(settings, 'FACE_CROP_QUEUE_SIZE', 256))
+
+
+def should_save_crop():
+    """FACE_CROP_SAVE_MODE: 'all', 'sample' (FACE_CROP_SAMPLE_RATE) atau 'off'."""
+    mode = getattr(settings, 'FACE_CROP_SAVE_MODE', 'all')
+    if mode == 'off':
+        return False
+    if mode == 'sample':
+        return random.random() < getattr(settings, 'FACE_CROP_SAMPLE_RATE', 0.1)
+    return True
+
+
+def save_detected_face(username, face_img):
+    return crop_writer.submit(username, face_img)
+
+
+# -- retensi / kompaksi ----------------------------------------------------
+
+def compact_legacy_crops(dry_run=False):
+    """Pindahkan file lama di folder datar detected_faces/ ke struktur tanggal/user."""
+    root = crop_root()
+    moved = 0
+    if not os.path.isdir(root):
+        return moved
+    for name in os.listdir(root):
+        src = os.path.join(root, name)
+        match = LEGACY_NAME.match(name)
+        if not os.path.isfile(src) or not match:
+            continue
+        when = datetime.strptime(match['date'] + match['time'], '%Y%m%d%H%M%S')
+        username = match['username']
+        dst_dir = os.path.join(root, when.strftime('%Y'), when.strftime('%m'), when.strftime('%d'), username)
+        dst = os.path.join(dst_dir, f"{username}_{match['time']}_{match['uid']}.jpg")
+        if not dry_run:
+            os.makedirs(dst_dir, exist_ok=True)
+            os.replace(src, dst)
+        moved += 1
+    return moved
+
+
+def _iter_crops(root):
+    """(path, username, mtime) untuk semua crop di struktur tanggal/user."""
+    for dirpath, _, files in os.walk(root):
+        rel = os.path.relpath(dirpath, root).split(os.sep)
+        if len(rel) != 4:
+            continue
+        username = rel[3]
+        for name in files:
+            path = os.path.join(dirpath, name)
+            try:
+                yield path, username, os.path.getmtime(path)
+            except OSError:
+                continue
+
+
+def prune_detected_faces(max_age_days=None, max_per_user=None, dry_run=False):
+    """
+    Hapus crop yang lebih tua dari max_age_days dan sisakan paling banyak
+    max_per_user crop terbaru per user. Folder kosong ikut dihapus.
+    """
+    root = crop_root()
+    result = {'scanned': 0, 'deleted_age': 0, 'deleted_count': 0, 'kept': 0}
+    if not os.path.isdir(root):
+        return result
+
+    cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+    per_user = {}
+    to_delete = []
+    for path, username, mtime in _iter_crops(root):
+        result['scanned'] += 1
+        if cutoff is not None and mtime < cutoff:
+            to_delete.append(path)
+            result['deleted_age'] += 1
+        else:
+            per_user.setdefault(username, []).append((mtime, path))
+
+    for username, files in per_user.items():
+        files.sort(reverse=True)
+        keep = files if not max_per_user else files[:max_per_user]
+        result['kept'] += len(keep)
+        for _, path in files[len(keep):]:
+            to_delete.append(path)
+            result['deleted_count'] += 1
+
+    if not dry_run:
+        for path in to_delete:
+            try:
+                os.remove(path)
+            except OSError:
+                logger.warning("Gagal menghapus %s", path)
+        for dirpath, _, _ in os.walk(root, topdown=False):
+            if dirpath != root and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+    return result
@@ -0,0 +1,87 @@
+# accounts/face_encoding.py
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+from .image_decode import DecodedImage
+from .inference import face_encodings
+
+
+class FaceCrop:
+    """Crop wajah persegi berukuran tetap + lokasi wajah di dalam crop."""
+
+    def __init__(self, array, location):
+        self.array = array  # RGB uint8 (size, size, 3)
+        self.location = location  # (top, right, bottom, left) di ruang crop
+
+
+def margin_crop(img_array, box, size=None, margin=None):
+    """
+    Potong kotak YOLO (x1, y1, x2, y2) menjadi crop persegi di sekitar pusat
+    wajah, diperlebar `margin` per sisi, lalu diubah ukurannya ke size x size.
+    Bagian di luar gambar diisi hitam, sehingga wajah di tepi frame tetap
+    berada di tengah crop. Biaya landmark + encoding jadi konstan, tidak
+    bergantung resolusi kamera. Tidak ada penyelarasan landmark (rotasi
+    mata); itu tetap dikerjakan face_recognition saat encoding.
+    """
+    size = size or getattr(settings, 'FACE_CROP_SIZE', 200)
+    margin = getattr(settings, 'FACE_CROP_MARGIN', 0.2) if margin is None else margin
+
+    x1, y1, x2, y2 = [float(v) for v in box[:4]]
+    side = int(round(max(x2 - x1, y2 - y1) * (1 + 2 * margin)))
+    if side < 2:
+        return None
+    cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+    left, top = int(round(cx - side / 2.0)), int(round(cy - side / 2.0))
+
+    height, width = img_array.shape[:2]
+    src_x0, src_y0 = max(0, left), max(0, top)
+    src_x1, src_y1 = min(width, left + side), min(height, top + side)
+    if src_x1 <= src_x0 or src_y1 <= src_y0:
+        return None
+
+    square = np.zeros((side, side, 3), dtype=np.uint8)
+    square[src_y0 - top:src_y1 - top, src_x0 - left:src_x1 - left] = img_array[src_y0:src_y1, src_x0:src_x1]
+    resized = np.asarray(Image.fromarray(square).resize((size, size), Image.BILINEAR))
+
+    scale = size / side
+    location = (
+        max(0, int(round((y1 - top) * scale))),
+        min(size, int(round((x2 - left) * scale))),
+        min(size, int(round((y2 - top) * scale))),
+        max(0, int(round((x1 - left) * scale))),
+    )
+    return FaceCrop(resized, location)
+
+
+def get_margin_crop(image, box):
+    """
+    Crop persegi (margin_crop) untuk kotak ini. Jika image adalah DecodedImage,
+    hasilnya disimpan di image.cache sehingga request yang sama tidak
+    memotong ulang wajah yang sama.
+    """
+    if not isinstance(image, DecodedImage):
+        return margin_crop(image, box)
+    key = ('margin_crop', tuple(int(v) for v in box[:4]))
+    if key not in image.cache:
+        image.cache[key] = margin_crop(image.array, box)
+    return image.cache[key]
+
+
+def encode_face(image, box):
+    """
+    Encoding 128-d untuk kotak wajah `box` di `image` (DecodedImage atau
+    array RGB), dihitung dari margin_crop. None jika gagal.
+    Encoding UserFace dari pipeline lama diperbarui dengan
+    python manage.py reencode_faces.
+    """
+    crop = get_margin_crop(image, box)
+    if crop is None:
+        return None
+    encodings = face_encodings(
+        crop.array,
+        [crop.location],
+        num_jitters=getattr(settings, 'FACE_ENCODING_JITTERS', 1),
+        model=getattr(settings, 'FACE_LANDMARK_MODEL', 'small'),
+    )
+    return encodings[0] if encodings else None
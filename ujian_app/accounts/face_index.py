@@ -0,0 +1,154 @@
+# accounts/face_index.py
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .models import UserFace
+
+ENCODING_DIM = 128
+
+
+class FaceIndex:
+    """
+    Indeks 1:N semua encoding UserFace dalam satu matriks float32 kontigu.
+    Query top-k dihitung dengan operasi matriks:
+        ||q - m||^2 = ||q||^2 + ||m||^2 - 2 q.m
+    Baris ditambah/dihapus secara inkremental lewat sinyal UserFace; indeks
+    dibangun ulang dari database jika umurnya melewati max_age (detik) agar
+    perubahan dari worker lain ikut masuk.
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._matrix = np.empty((0, ENCODING_DIM), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._user_ids = np.empty(0, dtype=np.int64)
+        self._rows = {}  # user_id -> baris
+        self._size = 0
+        self._built_at = None
+
+    # -- pembangunan ------------------------------------------------------
+    def _reserve(self, capacity):
+        if capacity <= len(self._matrix):
+            return
+        capacity = max(capacity, 2 * len(self._matrix), 64)
+        matrix = np.empty((capacity, ENCODING_DIM), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        user_ids = np.empty(capacity, dtype=np.int64)
+        matrix[:self._size] = self._matrix[:self._size]
+        sq_norms[:self._size] = self._sq_norms[:self._size]
+        user_ids[:self._size] = self._user_ids[:self._size]
+        self._matrix, self._sq_norms, self._user_ids = matrix, sq_norms, user_ids
+
+    def rebuild(self):
+        rows = list(UserFace.objects.values_list('user_id', 'encoding'))
+        with self._lock:
+            self._size = 0
+            self._rows = {}
+            self._reserve(len(rows))
+            for user_id, encoding in rows:
+                self._put(user_id, np.frombuffer(bytes(encoding), dtype=np.float64))
+            self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        stale = (
+            self._built_at is None
+            or (self.max_age is not None and time.monotonic() - self._built_at > self.max_age)
+        )
+        if stale:
+            self.rebuild()
+
+    # -- pembaruan inkremental -------------------------------------------
+    def _put(self, user_id, encoding):
+        vector = np.asarray(encoding, dtype=np.float32).reshape(ENCODING_DIM)
+        row = self._rows.get(user_id)
+        if row is None:
+            self._reserve(self._size + 1)
+            row = self._size
+            self._size += 1
+            self._rows[user_id] = row
+        self._matrix[row] = vector
+        self._sq_norms[row] = vector @ vector
+        self._user_ids[row] = user_id
+
+    def upsert(self, user_id, encoding):
+        with self._lock:
+            if self._built_at is not None:
+                self._put(user_id, encoding)
+
+    def remove(self, user_id):
+        with self._lock:
+            row = self._rows.pop(user_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                # Pindahkan baris terakhir ke slot yang kosong
+                self._matrix[row] = self._matrix[last]
+                self._sq_norms[row] = self._sq_norms[last]
+                self._user_ids[row] = self._user_ids[last]
+                self._rows[int(self._user_ids[row])] = row
+            self._size = last
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_built()
+            return self._size
+
+    # -- query ------------------------------------------------------------
+    def search(self, queries, k=1):
+        """
+        queries: (Q, 128). Mengembalikan (user_ids, distances) berbentuk (Q, k')
+        dengan k' = min(k, jumlah wajah terdaftar), diurutkan dari terdekat.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, ENCODING_DIM)
+        with self._lock:
+            self._ensure_built()
+            n = self._size
+            if n == 0 or len(queries) == 0:
+                return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+            matrix = self._matrix[:n]
+            sq_dist = (
+                np.einsum('ij,ij->i', queries, queries)[:, None]
+                + self._sq_norms[:n][None, :]
+                - 2.0 * (queries @ matrix.T)
+            )
+            user_ids = self._user_ids[:n].copy()
+
+        k = min(k, n)
+        np.maximum(sq_dist, 0.0, out=sq_dist)
+        if k < n:
+            top = np.argpartition(sq_dist, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(queries), n))
+        top_dist = np.take_along_axis(sq_dist, top, axis=1)
+        order = np.argsort(top_dist, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return user_ids[top], np.sqrt(np.take_along_axis(top_dist, order, axis=1))
+
+    def identify(self, encoding, threshold):
+        """Siapa pemilik wajah ini? (user_id, jarak) atau (None, jarak)."""
+        user_ids, distances = self.search(encoding, k=1)
+        if user_ids.shape[1] == 0:
+            return None, None
+        distance = float(distances[0, 0])
+        return (int(user_ids[0, 0]) if distance <= threshold else None), distance
+
+    def find_duplicate(self, encoding, exclude_user_id=None, threshold=0.4):
+        """User lain yang encoding-nya sudah sangat mirip (indikasi wajah ganda)."""
+        user_ids, distances = self.search(encoding, k=2)
+        for user_id, distance in zip(user_ids[0], distances[0]):
+            if int(user_id) != exclude_user_id and distance <= threshold:
+                return int(user_id), float(distance)
+        return None
+
+
+face_index = FaceIndex(max_age=getattr(settings, 'FACE_INDEX_MAX_AGE', 300))
+
+
+def identify_face(encoding, threshold=None):
+    threshold = threshold if threshold is not None else getattr(settings, 'FACE_THRESHOLD', 0.45)
+    return face_index.identify(encoding, threshold)
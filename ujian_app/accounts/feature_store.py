@@ -0,0 +1,208 @@
+# accounts/feature_store.py
+"""
+Cache fitur MFCC berbasis isi file. Kunci = sha256 isi audio + hash
+konfigurasi ekstraksi (FEATURE_CONFIG), sehingga file yang sama tidak
+di-decode ulang oleh enrollment, evaluasi, dan evaluate_threshold, dan
+perubahan konfigurasi (termasuk parameter VAD di settings) otomatis
+memakai folder baru:
+    VOICE_FEATURE_CACHE_DIR/<config_key>/<hash[:2]>/<hash>.npy
+File .npy dibaca dengan mmap_mode='r'.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+from django.conf import settings
+
+from .utils import extract_mfcc, extract_mfcc_batch
+from .vad import vad_config
+
+logger = logging.getLogger(__name__)
+
+# Naikkan 'version' setiap kali isi fitur berubah (utils.extract_mfcc / preprocess_audio)
+FEATURE_CONFIG = {
+    'version': 3,  # 2: mesin batch accounts.mfcc, 3: VAD energi (accounts.vad)
+    'sample_rate': 16000,
+    'n_mfcc': 13,
+    'pre_emphasis': 0.97,
+    'trim_top_db': 20,
+}
+
+
+def feature_config():
+    return dict(FEATURE_CONFIG, vad=vad_config())
+
+
+def config_key(config=None):
+    payload = json.dumps(config or feature_config(), sort_keys=True).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+
+def store_root():
+    return getattr(settings, 'VOICE_FEATURE_CACHE_DIR', os.path.join(settings.BASE_DIR, 'voice_features'))
+
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, 'rb') as fh:
+            return fh.read()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source.read()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def feature_path(digest, key=None):
+    return os.path.join(store_root(), key or config_key(), digest[:2], f'{digest}.npy')
+
+
+def _save(path, features):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp, 'wb') as fh:
+        np.save(fh, np.ascontiguousarray(features, dtype=np.float32))
+    os.replace(tmp, path)  # atomik: pembaca lain tidak pernah melihat file setengah jadi
+
+
+def _touch(path):
+    """Catat waktu akses terakhir untuk prune; cache read-only tidak dianggap rusak."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def get_features(source, refresh=False):
+    """
+    MFCC (frame x fitur, float32) untuk audio dari path, bytes, atau
+    UploadedFile. Dibaca dari cache jika ada; selain itu diekstrak dengan
+    utils.extract_mfcc lalu disimpan. None jika ekstraksi gagal.
+    """
+    data = _read_bytes(source)
+    path = feature_path(content_hash(data))
+    if not refresh and os.path.exists(path):
+        try:
+            features = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            logger.warning("File fitur rusak, diekstrak ulang: %s", path)
+        else:
+            _touch(path)
+            return features
+
+    features = extract_mfcc(data)
+    if features is None:
+        return None
+    try:
+        _save(path, features)
+    except OSError:
+        logger.warning("Gagal menyimpan fitur ke %s", path)
+    return np.asarray(features, dtype=np.float32)
+
+
+def get_features_batch(sources, refresh=False):
+    """
+    get_features untuk banyak audio: hit dibaca dari cache, sisanya
+    diekstrak dalam satu batch (utils.extract_mfcc_batch) lalu disimpan.
+    """
+    results = [None] * len(sources)
+    missing = []
+    for i, source in enumerate(sources):
+        data = _read_bytes(source)
+        path = feature_path(content_hash(data))
+        if not refresh and os.path.exists(path):
+            try:
+                results[i] = np.load(path, mmap_mode='r')
+            except (OSError, ValueError):
+                logger.warning("File fitur rusak, diekstrak ulang: %s", path)
+            else:
+                _touch(path)
+                continue
+        missing.append((i, data, path))
+
+    extracted = extract_mfcc_batch([data for _, data, _ in missing])
+    for (i, _, path), features in zip(missing, extracted):
+        if features is None:
+            continue
+        try:
+            _save(path, features)
+        except OSError:
+            logger.warning("Gagal menyimpan fitur ke %s", path)
+        results[i] = np.asarray(features, dtype=np.float32)
+    return results
+
+
+def load_features_batch(sources):
+    """Seperti get_features_batch, tapi array biasa (aman dikirim antar proses)."""
+    return [None if f is None else np.array(f) for f in get_features_batch(sources)]
+
+
+def load_features(source):
+    """Seperti get_features, tapi dijamin array biasa (aman dikirim antar proses)."""
+    features = get_features(source)
+    return None if features is None else np.array(features)
+
+
+# -- pengelolaan cache ----------------------------------------------------
+
+def _iter_files(root):
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if name.endswith('.npy'):
+                yield os.path.join(dirpath, name)
+
+
+def cache_stats():
+    """{config_key: {'files', 'bytes', 'current'}} untuk semua konfigurasi di cache."""
+    root = store_root()
+    current = config_key()
+    stats = {}
+    if not os.path.isdir(root):
+        return stats
+    for key in sorted(os.listdir(root)):
+        key_dir = os.path.join(root, key)
+        if not os.path.isdir(key_dir):
+            continue
+        files = size = 0
+        for path in _iter_files(key_dir):
+            files += 1
+            size += os.path.getsize(path)
+        stats[key] = {'files': files, 'bytes': size, 'current': key == current}
+    return stats
+
+
+def prune_cache(max_age_days=None, dry_run=False):
+    """
+    Hapus folder konfigurasi lama (bukan config_key() saat ini) dan, jika
+    max_age_days diisi, file yang tidak dipakai selama itu.
+    """
+    root = store_root()
+    current = config_key()
+    result = {'old_configs': 0, 'stale_files': 0}
+    if not os.path.isdir(root):
+        return result
+
+    for key in os.listdir(root):
+        key_dir = os.path.join(root, key)
+        if key != current and os.path.isdir(key_dir):
+            result['old_configs'] += 1
+            if not dry_run:
+                shutil.rmtree(key_dir, ignore_errors=True)
+
+    if max_age_days:
+        cutoff = time.time() - max_age_days * 86400
+        for path in _iter_files(os.path.join(root, current)):
+            if os.path.getmtime(path) < cutoff:
+                result['stale_files'] += 1
+                if not dry_run:
+                    os.remove(path)
+    return result
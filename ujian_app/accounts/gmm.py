@@ -0,0 +1,302 @@
+# accounts/gmm.py
+"""
+Format ringkas model speaker (GMM diagonal + scaler) dan scorer NumPy.
+
+Blob biner (little-endian):
+    header  : magic b'UJGM', versi (uint16), flags (uint16),
+              n_components (uint32), n_features (uint32)
+    scaler  : mean, scale            float32[n_features]   (jika FLAG_SCALER)
+    gmm     : weights                float32[n_components]
+              means, precisions      float32[n_components, n_features]
+
+Skor dihitung dengan rumus yang sama seperti
+GaussianMixture(covariance_type='diag').score_samples, tanpa validasi input
+sklearn di setiap panggilan. llr_samples/llr_score memakai seleksi Gaussian
+top-C (VOICE_TOPC) untuk model yang diadaptasi dari UBM.
+"""
+import struct
+
+import numpy as np
+from django.conf import settings
+
+MAGIC = b'UJGM'
+FORMAT_VERSION = 1
+FLAG_SCALER = 0x1
+FLAG_ADAPTED = 0x2  # mean diadaptasi dari UBM (komponen sejajar dengan UBM)
+
+_HEADER = struct.Struct('<4sHHII')
+_LOG_2PI = np.log(2 * np.pi)
+
+
+class CompactModelError(ValueError):
+    pass
+
+
+class DiagScaler:
+    """Pengganti StandardScaler.transform: (X - mean) / scale."""
+
+    def __init__(self, mean, scale):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self._mean64 = self.mean.astype(np.float64)
+        self._scale64 = self.scale.astype(np.float64)
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        n_features = scaler.n_features_in_
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(n_features)
+        return cls(mean, scale)
+
+    @property
+    def n_features(self):
+        return self.mean.shape[0]
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self._mean64) / self._scale64
+
+
+class DiagGMM:
+    """
+    GMM kovarians diagonal dengan parameter float32. score_samples/score
+    sama dengan GaussianMixture sklearn (selisih hanya dari pembulatan
+    parameter ke float32).
+    """
+
+    def __init__(self, weights, means, precisions, adapted_from_ubm=False):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.means = np.asarray(means, dtype=np.float32)
+        self.precisions = np.asarray(precisions, dtype=np.float32)
+        self.adapted_from_ubm = adapted_from_ubm
+        if self.means.shape != self.precisions.shape or self.means.shape[0] != self.weights.shape[0]:
+            raise CompactModelError("Ukuran weights/means/precisions tidak konsisten")
+        self._prepare()
+
+    def _prepare(self):
+        # log N(x | mu, diag(1/p)) + log w
+        #   = -0.5 * x^2 . p + x . (mu * p) + const_k
+        prec = self.precisions.astype(np.float64)
+        means = self.means.astype(np.float64)
+        self._neg_half_prec = -0.5 * prec
+        self._means_prec = means * prec
+        self._const = (
+            np.log(self.weights.astype(np.float64))
+            - 0.5 * self.n_features * _LOG_2PI
+            + 0.5 * np.sum(np.log(prec), axis=1)
+            - 0.5 * np.sum(means ** 2 * prec, axis=1)
+        )
+
+    @classmethod
+    def from_sklearn(cls, gmm, adapted_from_ubm=False):
+        if getattr(gmm, 'covariance_type', None) != 'diag':
+            raise CompactModelError(f"Hanya GMM diagonal yang didukung (covariance_type={gmm.covariance_type!r})")
+        return cls(gmm.weights_, gmm.means_, gmm.precisions_, adapted_from_ubm=adapted_from_ubm)
+
+    @property
+    def n_components(self):
+        return self.weights.shape[0]
+
+    @property
+    def n_features(self):
+        return self.means.shape[1]
+
+    def weighted_log_prob(self, X):
+        """log(w_k) + log N(x_t | k) untuk setiap frame t dan komponen k, (T, K)."""
+        X = np.asarray(X, dtype=np.float64)
+        return (X ** 2) @ self._neg_half_prec.T + X @ self._means_prec.T + self._const
+
+    def score_samples(self, X):
+        wlp = self.weighted_log_prob(X)
+        peak = wlp.max(axis=1, keepdims=True)
+        return (peak + np.log(np.exp(wlp - peak).sum(axis=1, keepdims=True)))[:, 0]
+
+    def score(self, X):
+        return float(self.score_samples(X).mean())
+
+
+class GMMBank:
+    """
+    Banyak DiagGMM dinilai sekaligus: parameter semua model dengan jumlah
+    komponen yang sama ditumpuk sehingga log-likelihood semua frame
+    terhadap semua model dihitung dengan dua perkalian matriks.
+    """
+
+    def __init__(self, models):
+        self.n_models = len(models)
+        groups = {}
+        for idx, gmm in enumerate(models):
+            groups.setdefault(gmm.n_components, []).append((idx, gmm))
+        self._groups = []
+        for n_components, members in groups.items():
+            index = np.array([idx for idx, _ in members])
+            neg_half_prec = np.concatenate([g._neg_half_prec for _, g in members])  # (M*K, D)
+            means_prec = np.concatenate([g._means_prec for _, g in members])
+            const = np.concatenate([g._const for _, g in members])
+            self._groups.append((index, n_components, neg_half_prec.T.copy(), means_prec.T.copy(), const))
+
+    def score_frames(self, X):
+        """Log-likelihood per frame untuk setiap model, (T, n_models)."""
+        X = np.asarray(X, dtype=np.float64)
+        out = np.empty((len(X), self.n_models))
+        X2 = X ** 2
+        for index, n_components, neg_half_prec_t, means_prec_t, const in self._groups:
+            wlp = (X2 @ neg_half_prec_t + X @ means_prec_t + const).reshape(len(X), len(index), n_components)
+            peak = wlp.max(axis=2, keepdims=True)
+            out[:, index] = (peak + np.log(np.exp(wlp - peak).sum(axis=2, keepdims=True)))[:, :, 0]
+        return out
+
+    @property
+    def total_components(self):
+        return sum(len(index) * n_components for index, n_components, *_ in self._groups)
+
+    def score_clips(self, clips, max_elements=2 ** 24):
+        """
+        Rata-rata log-likelihood (seperti gmm.score) tiap klip x model,
+        (n_clips, n_models). Frame diproses per blok agar matriks antara
+        (frame x semua komponen) tidak melebihi max_elements.
+        """
+        totals = np.zeros((len(clips), self.n_models))
+        if not clips:
+            return totals
+        counts = np.array([len(c) for c in clips])
+        frames = np.concatenate(clips)
+        owner = np.repeat(np.arange(len(clips)), counts)
+        block_frames = max(1, max_elements // max(1, self.total_components))
+        for start in range(0, len(frames), block_frames):
+            block = self.score_frames(frames[start:start + block_frames])
+            block_owner = owner[start:start + block_frames]
+            starts = np.r_[0, np.flatnonzero(np.diff(block_owner)) + 1]
+            totals[block_owner[starts]] += np.add.reduceat(block, starts, axis=0)
+        return totals / np.maximum(counts, 1)[:, None]
+
+
+def _logsumexp_rows(wlp):
+    peak = wlp.max(axis=-1, keepdims=True)
+    return (peak + np.log(np.exp(wlp - peak).sum(axis=-1, keepdims=True)))[..., 0]
+
+
+def supports_top_c(gmm_user, ubm, top_c):
+    """Top-C hanya sah jika komponen model user sejajar dengan UBM (adaptasi MAP)."""
+    return (
+        bool(top_c)
+        and getattr(gmm_user, 'adapted_from_ubm', False)
+        and isinstance(gmm_user, DiagGMM)
+        and isinstance(ubm, DiagGMM)
+        and gmm_user.n_components == ubm.n_components
+        and 0 < top_c < ubm.n_components
+    )
+
+
+def top_c_llr_samples(gmm_user, ubm, X, top_c):
+    """
+    LLR per frame dengan seleksi Gaussian top-C: C komponen UBM terbesar
+    per frame dipilih, lalu model user dan UBM sama-sama dinilai hanya pada
+    komponen tersebut (biaya model user T x C, bukan T x K).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    ubm_wlp = ubm.weighted_log_prob(X)
+    top = np.argpartition(ubm_wlp, -top_c, axis=1)[:, -top_c:]  # (T, C)
+    user_wlp = (
+        np.einsum('td,tcd->tc', X ** 2, gmm_user._neg_half_prec[top])
+        + np.einsum('td,tcd->tc', X, gmm_user._means_prec[top])
+        + gmm_user._const[top]
+    )
+    return _logsumexp_rows(user_wlp) - _logsumexp_rows(np.take_along_axis(ubm_wlp, top, axis=1))
+
+
+def llr_samples(gmm_user, ubm, X, top_c=None):
+    """
+    LLR per frame (user - UBM). Model hasil adaptasi UBM dinilai dengan
+    top-C (VOICE_TOPC jika top_c None); model lama (EM dari nol, sklearn)
+    dinilai penuh.
+    """
+    if top_c is None:
+        top_c = getattr(settings, 'VOICE_TOPC', 0)
+    if supports_top_c(gmm_user, ubm, top_c):
+        return top_c_llr_samples(gmm_user, ubm, X, top_c)
+    return gmm_user.score_samples(X) - ubm.score_samples(X)
+
+
+def llr_score(gmm_user, ubm, X, top_c=None):
+    """Rata-rata LLR per frame, seperti gmm_user.score(X) - ubm.score(X)."""
+    return float(np.mean(llr_samples(gmm_user, ubm, X, top_c)))
+
+
+def map_adapt_means(ubm, X, relevance_factor=16.0):
+    """
+    Adaptasi MAP mean UBM ke data X (Reynolds dkk., 2000). Statistik cukup
+    (n_k, F_k) dihitung dalam satu lintasan tervektorisasi:
+        n_k   = sum_t P(k | x_t)
+        E_k   = (sum_t P(k | x_t) x_t) / n_k
+        mu_k' = a_k E_k + (1 - a_k) mu_k,   a_k = n_k / (n_k + r)
+    Bobot dan presisi tetap milik UBM, sehingga komponen model user sejajar
+    dengan komponen UBM.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    wlp = ubm.weighted_log_prob(X)
+    resp = np.exp(wlp - ubm.score_samples(X)[:, None])
+    n_k = resp.sum(axis=0)
+    first_order = resp.T @ X
+    alpha = (n_k / (n_k + relevance_factor))[:, None]
+    expected = first_order / np.maximum(n_k, np.finfo(np.float64).tiny)[:, None]
+    means = alpha * expected + (1.0 - alpha) * ubm.means.astype(np.float64)
+    return DiagGMM(ubm.weights, means, ubm.precisions, adapted_from_ubm=True)
+
+
+def dumps(gmm, scaler=None):
+    """Serialisasi DiagGMM (+ DiagScaler opsional) ke blob ringkas."""
+    flags = (FLAG_SCALER if scaler is not None else 0) | (FLAG_ADAPTED if gmm.adapted_from_ubm else 0)
+    if scaler is not None and scaler.n_features != gmm.n_features:
+        raise CompactModelError("Jumlah fitur scaler dan GMM berbeda")
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, flags, gmm.n_components, gmm.n_features)]
+    if scaler is not None:
+        parts += [scaler.mean.astype('<f4').tobytes(), scaler.scale.astype('<f4').tobytes()]
+    parts += [
+        gmm.weights.astype('<f4').tobytes(),
+        gmm.means.astype('<f4').tobytes(),
+        gmm.precisions.astype('<f4').tobytes(),
+    ]
+    return b''.join(parts)
+
+
+def loads(blob):
+    """Kebalikan dumps(): (DiagScaler atau None, DiagGMM)."""
+    blob = bytes(blob)
+    if len(blob) < _HEADER.size:
+        raise CompactModelError("Blob model terlalu pendek")
+    magic, version, flags, n_components, n_features = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise CompactModelError("Bukan blob model ringkas")
+    if version != FORMAT_VERSION:
+        raise CompactModelError(f"Versi format model tidak didukung: {version}")
+
+    sizes = []
+    if flags & FLAG_SCALER:
+        sizes += [(n_features,), (n_features,)]
+    sizes += [(n_components,), (n_components, n_features), (n_components, n_features)]
+    expected = _HEADER.size + 4 * sum(int(np.prod(s)) for s in sizes)
+    if len(blob) != expected:
+        raise CompactModelError(f"Ukuran blob model {len(blob)} != {expected}")
+
+    arrays, offset = [], _HEADER.size
+    for shape in sizes:
+        count = int(np.prod(shape))
+        arrays.append(np.frombuffer(blob, dtype='<f4', count=count, offset=offset).reshape(shape))
+        offset += 4 * count
+
+    scaler = None
+    if flags & FLAG_SCALER:
+        scaler = DiagScaler(arrays[0], arrays[1])
+        arrays = arrays[2:]
+    gmm = DiagGMM(*arrays, adapted_from_ubm=bool(flags & FLAG_ADAPTED))
+    return scaler, gmm
+
+
+def is_compact(blob):
+    return blob is not None and bytes(blob[:4]) == MAGIC
+
+
+def compact_from_sklearn(gmm, scaler=None, adapted_from_ubm=False):
+    """Blob ringkas langsung dari objek sklearn (GaussianMixture, StandardScaler)."""
+    compact_scaler = DiagScaler.from_sklearn(scaler) if scaler is not None else None
+    return dumps(DiagGMM.from_sklearn(gmm, adapted_from_ubm=adapted_from_ubm), compact_scaler)
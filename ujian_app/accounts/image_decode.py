@@ -0,0 +1,80 @@
+# accounts/image_decode.py
+import io
+
+import numpy as np
+from django.conf import settings
+from PIL import Image, ImageOps
+
+
+class DecodedImage:
+    """
+    Satu hasil decode upload yang dipakai bersama oleh deteksi dan encoding.
+    Semua koordinat kotak (YOLO, face_location) berada di ruang `array`.
+    """
+
+    def __init__(self, array, original_size):
+        self.array = array  # RGB uint8 (H, W, 3)
+        self.original_size = original_size  # (lebar, tinggi) file asli
+        self.cache = {}  # hasil turunan per request (mis. margin_crop wajah)
+
+    @property
+    def size(self):
+        return self.array.shape[1], self.array.shape[0]
+
+    @property
+    def scale(self):
+        """Rasio resolusi hasil decode terhadap file asli (1.0 = penuh)."""
+        return self.size[0] / self.original_size[0] if self.original_size[0] else 1.0
+
+    def clip_box(self, box):
+        """(x1, y1, x2, y2) float -> (top, right, bottom, left) int di dalam gambar."""
+        x1, y1, x2, y2 = np.asarray(box[:4]).astype(int)
+        height, width = self.array.shape[:2]
+        return max(0, y1), min(width, x2), min(height, y2), max(0, x1)
+
+    def crop(self, box):
+        top, right, bottom, left = self.clip_box(box)
+        return Image.fromarray(self.array[top:bottom, left:right])
+
+
+def _read_bytes(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source.read()
+
+
+def decode_image(source, max_side=None):
+    """
+    Decode upload (UploadedFile / file-like / bytes) langsung dari buffer
+    memori ke array RGB:
+      - JPEG yang jauh lebih besar dari max_side didecode dengan skala DCT
+        1/2, 1/4 atau 1/8 (Image.draft), jadi piksel penuh tidak pernah dibuat;
+      - orientasi EXIF diterapkan;
+      - sisi terpanjang dibatasi max_side (default FACE_DECODE_MAX_SIDE).
+    File rusak/terpotong menimbulkan exception dari PIL saat load().
+    """
+    if max_side is None:
+        max_side = getattr(settings, 'FACE_DECODE_MAX_SIDE', 1280)
+
+    img = Image.open(io.BytesIO(_read_bytes(source)))
+    original_size = img.size
+
+    if max_side and max(original_size) > max_side:
+        ratio = max_side / max(original_size)
+        # draft memilih skala terkecil yang masih >= ukuran diminta (hanya JPEG)
+        img.draft('RGB', (max(1, int(original_size[0] * ratio)), max(1, int(original_size[1] * ratio))))
+
+    img.load()
+    if img.getexif().get(0x0112) in (5, 6, 7, 8):
+        # Orientasi EXIF memutar 90 derajat: ukuran asli ikut ditukar
+        original_size = original_size[::-1]
+    img = ImageOps.exif_transpose(img)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.BILINEAR)
+
+    return DecodedImage(np.asarray(img), original_size)
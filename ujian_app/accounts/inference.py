@@ -0,0 +1,243 @@
+# accounts/inference.py
+"""
+Titik masuk tunggal untuk inferensi wajah (deteksi YOLO dan encoding
+face_recognition). Jika settings.INFERENCE_SOCKET diisi, permintaan dikirim
+ke daemon inferensi (lihat accounts/inference_server.py); bila daemon mati
+atau tidak menjawab, inferensi dijalankan di proses ini sebagai cadangan.
+Error dari daemon yang hidup (termasuk timeout antrean batch saat overload)
+diteruskan ke pemanggil sebagai InferenceError: jika semua worker web memuat
+model sendiri pada saat beban puncak, RAM justru habis.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import numpy as np
+from django.conf import settings
+
+from .batching import BatchScheduler
+from .model_registry import get_face_detector, registry
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceError(Exception):
+    """Daemon menjawab, tetapi inferensi gagal di sisi daemon."""
+
+
+class InferenceUnavailable(Exception):
+    """Daemon tidak bisa dihubungi (mati, socket tidak ada, atau timeout)."""
+
+
+class Detections:
+    """Hasil deteksi satu gambar dalam bentuk numpy (tanpa objek torch)."""
+
+    def __init__(self, boxes, confidences, classes, labels):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)  # [[x1, y1, x2, y2], ...]
+        self.confidences = np.asarray(confidences, dtype=np.float32)
+        self.classes = np.asarray(classes, dtype=np.int64)
+        self.labels = list(labels)  # nama kelas YOLO per kotak
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def to_dict(self):
+        return {
+            'boxes': self.boxes.tolist(),
+            'confidences': self.confidences.tolist(),
+            'classes': self.classes.tolist(),
+            'labels': self.labels,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['boxes'], data['confidences'], data['classes'], data['labels'])
+
+
+def _to_numpy(value):
+    if hasattr(value, 'cpu'):
+        value = value.cpu().numpy()
+    return np.asarray(value)
+
+
+def _detections_from_result(result, names):
+    boxes = result.boxes
+    classes = _to_numpy(boxes.cls).astype(np.int64)
+    return Detections(
+        _to_numpy(boxes.xyxy),
+        _to_numpy(boxes.conf),
+        classes,
+        [names[int(c)] for c in classes],
+    )
+
+
+# Predictor ultralytics menyimpan state per model, jadi panggilan predict
+# dari beberapa thread (daemon / gthread) dijalankan bergantian.
+_predict_lock = threading.Lock()
+
+
+def predict_locked(model, **kwargs):
+    """model.predict di bawah _predict_lock; hasil mentah ultralytics (mis. untuk embedding)."""
+    with _predict_lock:
+        return model.predict(**kwargs)
+
+
+def _predict(model, img_arrays, conf=None):
+    kwargs = {'verbose': False}
+    if conf is not None:
+        kwargs['conf'] = conf
+    # Ultralytics menganggap array numpy berformat BGR
+    sources = [np.ascontiguousarray(img[..., ::-1]) for img in img_arrays]
+    results = predict_locked(model, source=sources if len(sources) > 1 else sources[0], **kwargs)
+    return [_detections_from_result(result, model.names) for result in results]
+
+
+def detect_faces_local(img_array, conf=None):
+    """Deteksi wajah di proses ini. img_array: RGB uint8 (H, W, 3)."""
+    return _predict(get_face_detector(), [img_array], conf=conf)[0]
+
+
+def detect_faces_batch_local(items):
+    """
+    Deteksi banyak gambar sekaligus. items: list (img_array, conf).
+    Gambar dengan conf yang sama diproses dalam satu panggilan YOLO. Jika
+    panggilan grup gagal, gambar diproses satu per satu sehingga hanya
+    gambar yang rusak yang hasilnya berupa exception.
+    """
+    model = get_face_detector()
+    results = [None] * len(items)
+    groups = {}
+    for idx, (_, conf) in enumerate(items):
+        groups.setdefault(conf, []).append(idx)
+    for conf, indices in groups.items():
+        try:
+            detections = _predict(model, [items[i][0] for i in indices], conf=conf)
+        except Exception as e:
+            if len(indices) == 1:
+                detections = [e]
+            else:
+                logger.warning("Batch deteksi gagal, ulangi per gambar", exc_info=True)
+                detections = [_predict_one(model, items[i][0], conf) for i in indices]
+        for i, det in zip(indices, detections):
+            results[i] = det
+    return results
+
+
+def _predict_one(model, img_array, conf):
+    """Hasil deteksi satu gambar, atau exception-nya (lihat BatchScheduler)."""
+    try:
+        return _predict(model, [img_array], conf=conf)[0]
+    except Exception as e:
+        return e
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_detection_batcher():
+    """Scheduler micro-batching bersama untuk frame proctoring di proses ini."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = BatchScheduler(
+                    detect_faces_batch_local,
+                    max_batch_size=getattr(settings, 'PROCTORING_BATCH_MAX_SIZE', 16),
+                    max_wait_ms=getattr(settings, 'PROCTORING_BATCH_MAX_WAIT_MS', 5.0),
+                    name='proctoring',
+                )
+    return _batcher
+
+
+def detect_faces_batched_local(img_array, conf=None):
+    if not getattr(settings, 'PROCTORING_BATCHING', True):
+        return detect_faces_local(img_array, conf=conf)
+    # Di daemon, tunggu harus selesai sebelum timeout socket klien (INFERENCE_TIMEOUT),
+    # jika tidak klien menyerah dan menghitung ulang frame yang sama secara lokal
+    timeout = getattr(settings, 'INFERENCE_TIMEOUT', 5.0) * 0.8
+    try:
+        return get_detection_batcher().submit((img_array, conf), timeout=timeout)
+    except TimeoutError:
+        raise InferenceError(f"Antrean batch proctoring penuh (tidak selesai dalam {timeout:.1f} s)") from None
+
+
+def inference_stats():
+    """Statistik registry model dan scheduler batch di proses ini."""
+    return {
+        'models': {' '.join(map(str, key)): stat for key, stat in registry.stats().items()},
+        'batching': _batcher.stats() if _batcher is not None else None,
+    }
+
+
+def face_encodings_local(img_array, locations, num_jitters=1, model='small'):
+    """Encoding 128-d face_recognition untuk setiap (top, right, bottom, left)."""
+    import face_recognition
+    return face_recognition.face_encodings(
+        img_array,
+        [tuple(int(v) for v in loc) for loc in locations],
+        num_jitters=num_jitters,
+        model=model,
+    )
+
+
+# Setelah gagal menghubungi daemon, lewati daemon sementara agar setiap
+# request tidak menunggu koneksi yang pasti gagal.
+_daemon_down_until = 0.0
+
+
+def _daemon_enabled():
+    return bool(getattr(settings, 'INFERENCE_SOCKET', None)) and time.monotonic() >= _daemon_down_until
+
+
+def _mark_daemon_down(error):
+    global _daemon_down_until
+    retry_after = getattr(settings, 'INFERENCE_RETRY_AFTER', 10.0)
+    _daemon_down_until = time.monotonic() + retry_after
+    logger.warning("Daemon inferensi tidak tersedia (%s), pakai inferensi lokal selama %.0f s", error, retry_after)
+
+
+def _call_daemon(op, img_array, **params):
+    from .inference_server import InferenceClient
+
+    client = InferenceClient(settings.INFERENCE_SOCKET, timeout=getattr(settings, 'INFERENCE_TIMEOUT', 5.0))
+    return client.call(op, img_array, **params)
+
+
+def detect_faces(img_array, conf=None, batched=False):
+    """
+    batched=True menggabungkan gambar ini dengan request lain yang datang
+    dalam beberapa milidetik (dipakai untuk frame proctoring).
+    """
+    if _daemon_enabled():
+        try:
+            return Detections.from_dict(_call_daemon('detect', img_array, conf=conf, batched=batched or None))
+        except InferenceUnavailable as e:
+            _mark_daemon_down(e)
+    if batched:
+        return detect_faces_batched_local(img_array, conf=conf)
+    return detect_faces_local(img_array, conf=conf)
+
+
+def face_encodings(img_array, locations, num_jitters=1, model='small'):
+    if _daemon_enabled():
+        try:
+            result = _call_daemon(
+                'encode', img_array,
+                locations=[list(map(int, loc)) for loc in locations],
+                num_jitters=num_jitters,
+                model=model,
+            )
+            return [np.asarray(enc, dtype=np.float64) for enc in result['encodings']]
+        except InferenceUnavailable as e:
+            _mark_daemon_down(e)
+    return face_encodings_local(img_array, locations, num_jitters=num_jitters, model=model)
+
+
+def face_distance(known_encodings, encoding):
+    """Sama dengan face_recognition.face_distance, tanpa mengimpor dlib."""
+    known = np.asarray(known_encodings, dtype=np.float64).reshape(-1, 128)
+    if len(known) == 0:
+        return np.empty(0)
+    return np.linalg.norm(known - encoding, axis=1)
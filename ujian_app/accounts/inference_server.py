@@ -0,0 +1,145 @@
+# accounts/inference_server.py
+"""
+Daemon inferensi lokal lewat Unix socket.
+
+Protokol satu request per koneksi:
+    [4 byte panjang header][header JSON][payload array mentah]
+Header request berisi 'op', 'shape', 'dtype' dan parameter op; payload adalah
+bytes array gambar. Jawaban hanya berupa [4 byte panjang][JSON].
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+
+import numpy as np
+
+from .inference import (
+    InferenceError, InferenceUnavailable, detect_faces_batched_local,
+    detect_faces_local, face_encodings_local, inference_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+_LEN = struct.Struct('!I')
+MAX_HEADER_BYTES = 1024 * 1024
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(min(n - len(buf), 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("Koneksi ditutup sebelum data lengkap")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _send_message(sock, header, payload=b''):
+    data = json.dumps(header).encode('utf-8')
+    sock.sendall(_LEN.pack(len(data)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_header(sock):
+    (length,) = _LEN.unpack(_recv_exact(sock, _LEN.size))
+    if length > MAX_HEADER_BYTES:
+        raise ValueError("Header terlalu besar")
+    return json.loads(_recv_exact(sock, length).decode('utf-8'))
+
+
+def handle_request(header, img_array):
+    op = header.get('op')
+    if op == 'detect':
+        if header.get('batched'):
+            # Setiap koneksi punya thread sendiri, jadi frame dari banyak
+            # worker web bertemu di scheduler batch yang sama
+            return detect_faces_batched_local(img_array, conf=header.get('conf')).to_dict()
+        return detect_faces_local(img_array, conf=header.get('conf')).to_dict()
+    if op == 'encode':
+        encodings = face_encodings_local(
+            img_array,
+            header.get('locations', []),
+            num_jitters=header.get('num_jitters', 1),
+            model=header.get('model', 'small'),
+        )
+        return {'encodings': [enc.tolist() for enc in encodings]}
+    if op == 'ping':
+        return {'pong': True}
+    if op == 'stats':
+        return inference_stats()
+    raise ValueError(f"Operasi tidak dikenal: {op}")
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            header = _recv_header(self.request)
+            img_array = None
+            nbytes = int(header.get('nbytes', 0))
+            if nbytes:
+                raw = _recv_exact(self.request, nbytes)
+                img_array = np.frombuffer(raw, dtype=np.dtype(header['dtype'])).reshape(header['shape'])
+            result = handle_request(header, img_array)
+            _send_message(self.request, {'ok': True, 'result': result})
+        except ConnectionError:
+            return
+        except Exception as e:
+            logger.exception("Inferensi gagal")
+            try:
+                _send_message(self.request, {'ok': False, 'error': str(e)})
+            except OSError:
+                pass
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, InferenceRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class InferenceClient:
+    def __init__(self, socket_path, timeout=5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def call(self, op, img_array=None, **params):
+        header = {'op': op}
+        header.update({k: v for k, v in params.items() if v is not None})
+        payload = b''
+        if img_array is not None:
+            img_array = np.ascontiguousarray(img_array)
+            payload = img_array.tobytes()
+            header.update(shape=list(img_array.shape), dtype=img_array.dtype.str, nbytes=len(payload))
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                _send_message(sock, header, payload)
+                response = _recv_header(sock)
+        except (OSError, ConnectionError, ValueError) as e:
+            # socket.timeout, FileNotFoundError, ConnectionRefusedError termasuk OSError
+            raise InferenceUnavailable(str(e)) from e
+
+        if not response.get('ok'):
+            raise InferenceError(response.get('error', 'Inferensi gagal'))
+        return response['result']
+
+    def ping(self):
+        return self.call('ping').get('pong', False)
+
+    def stats(self):
+        return self.call('stats')
@@ -0,0 +1,67 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from accounts.feature_store import load_features_batch
+from accounts.models import VoiceData, VoiceSample
+from accounts.ubm import get_compact_ubm
+from accounts.voice_cache import BLOB_FIELDS
+from accounts.voice_embedding import compute_embedding, embedding_threshold, from_bytes, to_bytes
+from accounts.voice_enrollment import chunked
+from accounts.voice_evaluation import embedding_score_matrix
+
+
+class Command(BaseCommand):
+    help = 'Hitung embedding supervector (VoiceData.embedding) dari sampel suara yang sudah ada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user_id', type=int, help='Hanya user ini')
+        parser.add_argument('--force', action='store_true', help='Hitung ulang walau embedding sudah ada dan cocok dengan UBM')
+        parser.add_argument('--identify', action='store_true',
+                            help='Setelah selesai, uji identifikasi 1:N sampel held-out terhadap embedding '
+                                 'yang dibangun tanpa sampel itu')
+
+    def handle(self, *args, **options):
+        ubm_scaler, ubm_gmm = get_compact_ubm()
+        storage = VoiceSample._meta.get_field('audio_file').storage
+        qs = VoiceData.objects.filter(is_trained=True).defer(*BLOB_FIELDS)
+        if options['user_id']:
+            qs = qs.filter(user_id=options['user_id'])
+
+        done = skipped = failed = 0
+        for vd in qs.iterator():
+            current = VoiceData.objects.filter(pk=vd.pk).values_list('embedding', flat=True).get()
+            if not options['force'] and from_bytes(current) is not None:
+                skipped += 1
+                continue
+            names = VoiceSample.objects.filter(user_id=vd.user_id).values_list('audio_file', flat=True)
+            features = []
+            for batch in chunked([storage.path(name) for name in names]):
+                features.extend(f for f in load_features_batch(batch) if f is not None)
+            if not features:
+                failed += 1
+                self.stdout.write(f"User {vd.user_id}: tidak ada sampel suara yang bisa diekstrak")
+                continue
+            vd.embedding = to_bytes(compute_embedding(features, ubm_scaler, ubm_gmm))
+            vd.save(update_fields=['embedding'])
+            done += 1
+            self.stdout.write(f"User {vd.user_id}: embedding dari {len(features)} sampel")
+
+        self.stdout.write(f"Dihitung: {done}, dilewati: {skipped}, gagal: {failed}")
+        if options['identify']:
+            self.check_identification()
+
+    def check_identification(self, holdout=0.3):
+        # probe ditahan dari embedding pendaftaran agar akurasi tidak menggelembung
+        try:
+            matrix = embedding_score_matrix(user_ids=None, holdout=holdout)
+        except ValueError as e:
+            self.stdout.write(str(e))
+            return
+        if not len(matrix.sample_ids):
+            self.stdout.write("Tidak ada sampel held-out untuk uji identifikasi (butuh user dengan >= 2 sampel)")
+            return
+        top1 = matrix.model_user_ids[np.argmax(matrix.llr, axis=1)]
+        self.stdout.write(
+            f"Identifikasi {len(matrix.sample_ids)} sampel held-out terhadap {len(matrix.model_user_ids)} embedding "
+            f"(threshold {embedding_threshold():.3f}): top-1 benar {(top1 == matrix.sample_owners).mean():.2%}, "
+            f"benar dan di atas threshold {matrix.identification_accuracy():.2%}"
+        )
@@ -0,0 +1,176 @@
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from PIL import Image, ImageDraw
+from accounts.benchmarks import (
+    compare_reports, default_output_path, environment_info,
+    latency_summary, run_isolated, save_report, time_calls,
+)
+from accounts.detector_export import find_images
+from accounts.face_cache import known_encodings
+from accounts.model_registry import face_detector_path, registry
+from accounts.models import User
+
+BENCH_USERNAME = 'bench_user'
+BENCH_USER_ID = 10 ** 9
+SYNTHETIC_SIZES = [(640, 480), (1280, 720), (1920, 1080), (4032, 3024)]
+
+
+class _Boxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = xyxy, conf, cls
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class StubDetector:
+    """
+    Pengganti YOLO untuk benchmark offline (tanpa best.pt): satu kotak di
+    tengah gambar dengan label BENCH_USERNAME. API-nya meniru predict()
+    ultralytics sejauh yang dipakai accounts.inference.
+    """
+
+    names = {0: BENCH_USERNAME}
+
+    def predict(self, source, conf=None, verbose=False, **kwargs):
+        sources = source if isinstance(source, list) else [source]
+        return [_Result(self._detect(img)) for img in sources]
+
+    def _detect(self, img):
+        height, width = img.shape[:2]
+        side = 0.4 * min(width, height)
+        cx, cy = width / 2.0, height / 2.0
+        xyxy = np.array([[cx - side / 2, cy - side / 2, cx + side / 2, cy + side / 2]], dtype=np.float32)
+        return _Boxes(xyxy, np.array([0.95], dtype=np.float32), np.array([0.0], dtype=np.float32))
+
+
+def synthetic_jpeg(width, height, seed=0):
+    """Gambar JPEG sintetis: latar gradasi + elips 'wajah' di tengah."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([np.broadcast_to(x, (height, width)), np.broadcast_to(y, (height, width)),
+                     np.full((height, width), 128, np.float32)], axis=-1)
+    base += rng.normal(0, 8, base.shape).astype(np.float32)
+    img = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    side = 0.4 * min(width, height)
+    cx, cy = width / 2, height / 2
+    draw.ellipse([cx - side / 2.4, cy - side / 2, cx + side / 2.4, cy + side / 2], fill=(224, 172, 140))
+    buf = io.BytesIO()
+    img.save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+
+def load_inputs(image_dir, limit):
+    inputs = [(f'synthetic_{w}x{h}.jpg', synthetic_jpeg(w, h, seed=i)) for i, (w, h) in enumerate(SYNTHETIC_SIZES)]
+    if image_dir and os.path.isdir(image_dir):
+        for path in find_images(image_dir, limit=limit):
+            with open(path, 'rb') as fh:
+                inputs.append((os.path.basename(path), fh.read()))
+    return inputs
+
+
+def as_upload(item):
+    name, data = item
+    return SimpleUploadedFile(name, data, content_type='image/jpeg')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark CPU pipeline wajah (preprocess, verify, proctoring, enroll) dengan detektor pengganti offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', help='Folder gambar fixture tambahan (default: MEDIA_ROOT/faces jika ada)')
+        parser.add_argument('--limit', type=int, default=20, help='Jumlah maksimal gambar fixture')
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--real-detector', action='store_true',
+                            help='Pakai detektor FACE_DETECTOR_BACKEND asli, bukan pengganti')
+        parser.add_argument('--output', help='Path hasil JSON (default: BENCHMARK_DIR/face_pipeline-<commit>.json)')
+        parser.add_argument('--compare', help='Bandingkan dengan hasil JSON sebelumnya')
+
+    def handle(self, *args, **options):
+        from accounts.utils import augment_face_images, extract_face, preprocess_face_image
+        from accounts.views import verify_face, verify_face_proctoring
+
+        inputs = load_inputs(options['images'] or os.path.join(settings.MEDIA_ROOT, 'faces'), options['limit'])
+        repeat = options['repeat']
+
+        if not options['real_detector']:
+            # kunci yang sama dengan yang dipakai get_face_detector() untuk backend aktif
+            path, _ = face_detector_path()
+            registry.register(('yolo', path), StubDetector())
+
+        # User tiruan (tidak disimpan ke DB); encoding terdaftar dipasang di cache
+        user = User(id=BENCH_USER_ID, username=BENCH_USERNAME)
+
+        def enroll_pipeline(upload):
+            face_img, encoding = extract_face(upload)
+            for aug in augment_face_images(face_img):
+                aug.convert('RGB').save(io.BytesIO(), format='JPEG')
+            return encoding
+
+        stages = {
+            'preprocess_face_image': lambda item: preprocess_face_image(as_upload(item)),
+            'verify_face': lambda item: verify_face(user, as_upload(item)),
+            'verify_face_proctoring': lambda item: verify_face_proctoring(user, as_upload(item)),
+            'enroll_face_pipeline': lambda item: enroll_pipeline(as_upload(item)),
+        }
+
+        def run_stage(fn):
+            def measure():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    durations = time_calls(fn, inputs, warmup=1, repeat=repeat)
+                return latency_summary(durations)
+            return measure
+
+        with override_settings(INFERENCE_SOCKET=None, FACE_CROP_SAVE_MODE='off', PROCTORING_BATCHING=False):
+            with contextlib.redirect_stdout(io.StringIO()):
+                known = enroll_pipeline(as_upload(inputs[0]))
+            known_encodings.set(BENCH_USER_ID, known if known is not None else np.zeros(128))
+
+            results = {}
+            for name, fn in stages.items():
+                self.stdout.write(f"Menjalankan {name}...")
+                results[name] = run_isolated(run_stage(fn))
+
+        report = environment_info()
+        report.update({
+            'benchmark': 'face_pipeline',
+            'detector': 'real' if options['real_detector'] else 'stub',
+            'inputs': [name for name, _ in inputs],
+            'repeat': repeat,
+            'stages': results,
+        })
+
+        output = options['output'] or default_output_path('face_pipeline')
+        save_report(report, output)
+
+        for name, stat in results.items():
+            if 'error' in stat:
+                self.stderr.write(f"{name}: {stat['error']}")
+                continue
+            throughput = stat['throughput_per_s']
+            throughput_txt = f"{throughput:7.2f}" if throughput is not None else f"{'n/a':>7s}"
+            self.stdout.write(
+                f"{name:24s} p50={stat['p50_ms']:8.2f} ms  p95={stat['p95_ms']:8.2f} ms  "
+                f"{throughput_txt}/s  peak_rss={stat['peak_rss_mb']:.0f} MB "
+                f"(+{stat['peak_rss_delta_mb']:.0f})"
+            )
+        self.stdout.write(f"Hasil disimpan di {output}")
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as fh:
+                baseline = json.load(fh)
+            for stage, metric, old, new, change in compare_reports(baseline, report):
+                change_txt = f"{change:+.1f}%" if change is not None else "n/a"
+                self.stdout.write(f"{stage:24s} {metric:18s} {old:10.2f} -> {new:10.2f} ({change_txt})")
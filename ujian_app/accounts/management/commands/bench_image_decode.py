@@ -0,0 +1,94 @@
+import json
+import multiprocessing
+import os
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+from accounts.detector_export import find_images
+from accounts.image_decode import decode_image
+
+
+def decode_legacy(data_path):
+    """Jalur lama verify_face/preprocess_face_image: verify, buka ulang, RGB, np.array."""
+    with open(data_path, 'rb') as fh:
+        img = Image.open(fh)
+        img.verify()
+        fh.seek(0)
+        img = Image.open(fh).convert('RGB')
+        return np.array(img)
+
+
+def decode_new(data_path, max_side):
+    with open(data_path, 'rb') as fh:
+        return decode_image(fh, max_side=max_side).array
+
+
+def _run(method, paths, max_side, repeat):
+    decode = (lambda p: decode_legacy(p)) if method == 'legacy' else (lambda p: decode_new(p, max_side))
+    times, peaks = [], []
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for _ in range(repeat):
+        for path in paths:
+            tracemalloc.start()
+            start = time.perf_counter()
+            decode(path)
+            times.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    ms = np.asarray(times) * 1000.0
+    return {
+        'method': method,
+        'decodes': len(times),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'peak_traced_mb': max(peaks) / (1024 * 1024),
+        # ru_maxrss dalam KB di Linux; selisih diukur di proses anak yang baru
+        'peak_rss_delta_mb': (rss_after - rss_before) / 1024.0,
+    }
+
+
+def _child(method, paths, max_side, repeat, queue):
+    queue.put(_run(method, paths, max_side, repeat))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark waktu decode dan memori puncak gambar wajah: jalur lama vs decode_image'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', help='Folder gambar (default: MEDIA_ROOT/faces)')
+        parser.add_argument('--limit', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--max-side', type=int, default=None, help='Default: FACE_DECODE_MAX_SIDE')
+        parser.add_argument('--output', help='Simpan hasil JSON ke file ini')
+
+    def handle(self, *args, **options):
+        image_dir = options['images'] or os.path.join(settings.MEDIA_ROOT, 'faces')
+        paths = find_images(image_dir, limit=options['limit'])
+        if not paths:
+            raise CommandError(f"Tidak ada gambar di {image_dir}")
+        max_side = options['max_side'] or getattr(settings, 'FACE_DECODE_MAX_SIDE', 1280)
+
+        # Setiap metode dijalankan di proses anak sendiri agar RSS puncak
+        # satu metode tidak tercampur dengan metode lain
+        ctx = multiprocessing.get_context('fork')
+        results = []
+        for method in ('legacy', 'decode_image'):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_child, args=(method, paths, max_side, options['repeat'], queue))
+            proc.start()
+            results.append(queue.get())
+            proc.join()
+
+        report = {'images': len(paths), 'max_side': max_side, 'results': results}
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,121 @@
+import os
+import time
+
+import librosa
+import numpy as np
+from django.core.management.base import BaseCommand
+from accounts.benchmarks import default_output_path, environment_info, save_report
+from accounts.mfcc import MFCCExtractor
+from accounts.utils import extract_mfcc_batch, preprocess_audio
+
+SR = 16000
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg', '.mp3', '.webm', '.m4a')
+
+
+def synthetic_clips(count, seed=0):
+    """Klip 1-8 detik: harmonik bervariasi + derau, mirip rentang sampel suara."""
+    rng = np.random.default_rng(seed)
+    clips = []
+    for _ in range(count):
+        seconds = rng.uniform(1.0, 8.0)
+        t = np.arange(int(seconds * SR)) / SR
+        f0 = rng.uniform(90, 250)
+        y = sum(np.sin(2 * np.pi * f0 * h * t) / h for h in range(1, 6))
+        y = y * (0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(2, 5) * t)) + 0.05 * rng.standard_normal(len(t))
+        clips.append((y / np.max(np.abs(y))).astype(np.float32))
+    return clips
+
+
+def find_audio(folder, limit):
+    paths = []
+    for dirpath, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                paths.append(os.path.join(dirpath, name))
+                if len(paths) >= limit:
+                    return paths
+    return paths
+
+
+def clips_per_second(fn, n_clips, repeat):
+    fn()  # warmup
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'clips_per_s': n_clips / best if best else None}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark throughput MFCC: loop librosa per file vs ekstraksi batch accounts.mfcc (klip/detik)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clips', type=int, default=64, help='Jumlah klip sintetis')
+        parser.add_argument('--audio', help='Folder audio nyata (mis. MEDIA_ROOT/voice_train) untuk tahap end-to-end')
+        parser.add_argument('--limit', type=int, default=64, help='Jumlah maksimal file audio nyata')
+        parser.add_argument('--batch-size', type=int, default=16)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--output', help='Path hasil JSON (default: BENCHMARK_DIR/mfcc-<commit>.json)')
+
+    def handle(self, *args, **options):
+        clips = synthetic_clips(options['clips'])
+        batch_size = options['batch_size']
+        extractor = MFCCExtractor()
+
+        def loop():
+            return [librosa.feature.mfcc(y=y, sr=SR, n_mfcc=13).T for y in clips]
+
+        def batch():
+            out = []
+            for i in range(0, len(clips), batch_size):
+                out.extend(extractor.extract_batch(clips[i:i + batch_size]))
+            return out
+
+        max_diff = max(float(np.max(np.abs(a - b))) for a, b in zip(loop(), batch()))
+        results = {
+            'mfcc_loop': clips_per_second(loop, len(clips), options['repeat']),
+            'mfcc_batch': clips_per_second(batch, len(clips), options['repeat']),
+        }
+
+        if options['audio']:
+            paths = find_audio(options['audio'], options['limit'])
+            datas = []
+            for path in paths:
+                with open(path, 'rb') as fh:
+                    datas.append(fh.read())
+
+            def extract_loop():
+                out = []
+                for data in datas:
+                    y, sr = preprocess_audio(data)
+                    out.append(librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13).T)
+                return out
+
+            def extract_batch():
+                out = []
+                for i in range(0, len(datas), batch_size):
+                    out.extend(extract_mfcc_batch(datas[i:i + batch_size]))
+                return out
+
+            if datas:
+                results['extract_loop'] = clips_per_second(extract_loop, len(datas), options['repeat'])
+                results['extract_batch'] = clips_per_second(extract_batch, len(datas), options['repeat'])
+
+        report = environment_info()
+        report.update({
+            'benchmark': 'mfcc',
+            'clips': len(clips),
+            'batch_size': batch_size,
+            'max_abs_diff_vs_librosa': max_diff,
+            'stages': results,
+        })
+        output = options['output'] or default_output_path('mfcc')
+        save_report(report, output)
+
+        for name, stat in results.items():
+            self.stdout.write(f"{name:14s} {stat['clips_per_s']:8.1f} klip/s  ({stat['seconds'] * 1000:.1f} ms)")
+        loop_rate, batch_rate = results['mfcc_loop']['clips_per_s'], results['mfcc_batch']['clips_per_s']
+        self.stdout.write(f"Percepatan batch: {batch_rate / loop_rate:.2f}x, selisih maks vs librosa: {max_diff:.2e}")
+        self.stdout.write(f"Hasil disimpan di {output}")
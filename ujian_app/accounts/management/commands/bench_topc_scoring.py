@@ -0,0 +1,120 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from accounts.benchmarks import default_output_path, environment_info, latency_summary, save_report
+from accounts.feature_store import load_features_batch
+from accounts.gmm import map_adapt_means, supports_top_c, top_c_llr_samples
+from accounts.models import VoiceData, VoiceSample
+from accounts.ubm import get_compact_ubm
+from accounts.voice_cache import BLOB_FIELDS, get_speaker_model
+
+
+def full_llr(gmm_user, ubm, X):
+    return float(np.mean(gmm_user.score_samples(X) - ubm.score_samples(X)))
+
+
+def top_c_llr(gmm_user, ubm, X, top_c):
+    return float(np.mean(top_c_llr_samples(gmm_user, ubm, X, top_c)))
+
+
+class Command(BaseCommand):
+    help = 'Benchmark skor top-C vs skor penuh GMM-UBM: latensi dan kesesuaian LLR/keputusan pada data terdaftar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-c', type=int, nargs='+', default=[1, 3, 5, 10], help='Nilai C yang diuji')
+        parser.add_argument('--samples-per-user', type=int, default=10)
+        parser.add_argument('--impostors', type=int, default=5, help='Jumlah model user lain per sampel (trial impostor)')
+        parser.add_argument('--no-adapt-legacy', action='store_true',
+                            help='Lewati user dengan model lama; default: adaptasi MAP sementara dari sampelnya')
+        parser.add_argument('--output', help='Path hasil JSON (default: BENCHMARK_DIR/topc-<commit>.json)')
+
+    def handle(self, *args, **options):
+        ubm_scaler, ubm_gmm = get_compact_ubm()
+        storage = VoiceSample._meta.get_field('audio_file').storage
+
+        models = []  # (user_id, gmm, threshold, fitur sampel ter-scale, sumber)
+        for vd in VoiceData.objects.filter(is_trained=True).defer(*BLOB_FIELDS).order_by('user_id'):
+            names = VoiceSample.objects.filter(user_id=vd.user_id).order_by('id').values_list('audio_file', flat=True)
+            features = [f for f in load_features_batch([storage.path(n) for n in names[:options['samples_per_user']]])
+                        if f is not None]
+            if not features:
+                continue
+            scaled = [ubm_scaler.transform(f) for f in features]
+            _, gmm = get_speaker_model(vd)
+            if supports_top_c(gmm, ubm_gmm, 1):
+                models.append((vd.user_id, gmm, vd.threshold - vd.margin, scaled, 'stored'))
+            elif not options['no_adapt_legacy']:
+                # model lama tidak sejajar dengan UBM: adaptasi MAP dari sampel yang sama
+                adapted = map_adapt_means(ubm_gmm, np.vstack(scaled))
+                models.append((vd.user_id, adapted, full_llr(adapted, ubm_gmm, np.vstack(scaled)), scaled, 'adapted'))
+        if not models:
+            raise CommandError("Tidak ada model suara terlatih dengan sampel")
+
+        top_cs = [c for c in options['top_c'] if 0 < c < ubm_gmm.n_components]
+        if not top_cs:
+            raise CommandError(f"--top-c harus di antara 1 dan {ubm_gmm.n_components - 1}")
+
+        trials = []  # (gmm, X, threshold, target?)
+        for m, (user_id, gmm, threshold, scaled, _) in enumerate(models):
+            others = [models[(m + k) % len(models)] for k in range(1, min(options['impostors'], len(models) - 1) + 1)]
+            trials.extend((gmm, X, threshold, True) for X in scaled)
+            for other in others:
+                trials.extend((gmm, X, threshold, False) for X in other[3])
+
+        def run(fn):
+            durations, llrs = [], []
+            for gmm, X, _, _ in trials:
+                start = time.perf_counter()
+                llrs.append(fn(gmm, X))
+                durations.append(time.perf_counter() - start)
+            return np.array(llrs), durations
+
+        run(lambda g, X: full_llr(g, ubm_gmm, X))  # warmup
+        full, full_durations = run(lambda g, X: full_llr(g, ubm_gmm, X))
+        thresholds = np.array([t[2] for t in trials])
+        targets = np.array([t[3] for t in trials])
+        full_accept = full > thresholds
+
+        results = {'full': dict(latency_summary(full_durations),
+                                target_accept=float(full_accept[targets].mean()),
+                                impostor_accept=float(full_accept[~targets].mean()) if (~targets).any() else None)}
+        for c in top_cs:
+            approx, durations = run(lambda g, X: top_c_llr(g, ubm_gmm, X, c))
+            accept = approx > thresholds
+            diff = np.abs(approx - full)
+            results[f'top_{c}'] = dict(
+                latency_summary(durations),
+                max_abs_llr_diff=float(diff.max()),
+                mean_abs_llr_diff=float(diff.mean()),
+                decision_agreement=float((accept == full_accept).mean()),
+                target_accept=float(accept[targets].mean()),
+                impostor_accept=float(accept[~targets].mean()) if (~targets).any() else None,
+            )
+
+        report = environment_info()
+        report.update({
+            'benchmark': 'topc',
+            'ubm_components': ubm_gmm.n_components,
+            'models': len(models),
+            'models_adapted_on_the_fly': sum(1 for m in models if m[4] == 'adapted'),
+            'target_trials': int(targets.sum()),
+            'impostor_trials': int((~targets).sum()),
+            'stages': results,
+        })
+        output = options['output'] or default_output_path('topc')
+        save_report(report, output)
+
+        self.stdout.write(
+            f"{len(models)} model ({report['models_adapted_on_the_fly']} diadaptasi sementara), "
+            f"{report['target_trials']} trial target / {report['impostor_trials']} impostor, UBM {ubm_gmm.n_components} komponen"
+        )
+        base = results['full']['mean_ms']
+        self.stdout.write(f"{'full':8s} {base:8.2f} ms/trial")
+        for c in top_cs:
+            stat = results[f'top_{c}']
+            self.stdout.write(
+                f"{'top_' + str(c):8s} {stat['mean_ms']:8.2f} ms/trial  ({base / stat['mean_ms']:.2f}x)  "
+                f"selisih LLR maks {stat['max_abs_llr_diff']:.3f}, keputusan sama {stat['decision_agreement']:.2%}"
+            )
+        self.stdout.write(f"Hasil disimpan di {output}")
@@ -0,0 +1,53 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from accounts.detector_export import SUPPORTED_BACKENDS, compare_detectors, exported_model_path, find_images
+
+
+class Command(BaseCommand):
+    help = 'Laporan latensi dan kesesuaian deteksi model ekspor (ONNX/OpenVINO) terhadap best.pt PyTorch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=SUPPORTED_BACKENDS, default='openvino')
+        parser.add_argument('--int8', action='store_true')
+        parser.add_argument(
+            '--images',
+            help='Folder gambar uji (default: MEDIA_ROOT/faces)',
+        )
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--conf', type=float, default=None, help='Confidence threshold YOLO')
+        parser.add_argument('--iou', type=float, default=0.5, help='IoU minimal agar dua kotak dianggap sama')
+        parser.add_argument('--output', help='Simpan laporan JSON ke file ini')
+
+    def handle(self, *args, **options):
+        from ultralytics import YOLO
+
+        try:
+            path = exported_model_path(options['format'], int8=options['int8'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not os.path.exists(path):
+            raise CommandError(f"{path} belum ada. Jalankan export_face_detector terlebih dahulu.")
+
+        image_dir = options['images'] or os.path.join(settings.MEDIA_ROOT, 'faces')
+        images = find_images(image_dir, limit=options['limit'])
+        if not images:
+            raise CommandError(f"Tidak ada gambar di {image_dir}")
+
+        report = compare_detectors(
+            images,
+            YOLO(settings.YOLO_FACE_MODEL),
+            YOLO(path, task='detect'),
+            conf=options['conf'],
+            iou_threshold=options['iou'],
+        )
+        report['reference'] = settings.YOLO_FACE_MODEL
+        report['candidate'] = path
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(output)
+        self.stdout.write(output)
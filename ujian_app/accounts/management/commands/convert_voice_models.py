@@ -0,0 +1,55 @@
+import io
+
+import joblib
+import numpy as np
+from django.core.management.base import BaseCommand
+from accounts.gmm import CompactModelError, compact_from_sklearn, loads
+from accounts.models import VoiceData
+
+
+class Command(BaseCommand):
+    help = 'Konversi model suara pickle sklearn (scaler_model, gmm_model) ke format ringkas VoiceData.compact_model'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user_id', type=int, help='Hanya konversi model milik user ini')
+        parser.add_argument('--force', action='store_true', help='Tulis ulang walau compact_model sudah ada')
+        parser.add_argument('--dry-run', action='store_true', help='Hanya periksa, tidak menyimpan')
+        parser.add_argument('--check-frames', type=int, default=500,
+                            help='Jumlah frame acak untuk membandingkan skor sklearn vs ringkas (0 = lewati)')
+
+    def handle(self, *args, **options):
+        qs = VoiceData.objects.exclude(gmm_model__isnull=True)
+        if options['user_id']:
+            qs = qs.filter(user_id=options['user_id'])
+        if not options['force']:
+            qs = qs.filter(compact_model__isnull=True)
+
+        converted = skipped = failed = 0
+        rng = np.random.default_rng(0)
+        for vd in qs.iterator():
+            try:
+                scaler = joblib.load(io.BytesIO(bytes(vd.scaler_model))) if vd.scaler_model else None
+                gmm = joblib.load(io.BytesIO(bytes(vd.gmm_model)))
+                blob = compact_from_sklearn(gmm, scaler)
+            except CompactModelError as e:
+                skipped += 1
+                self.stdout.write(f"User {vd.user_id}: dilewati ({e})")
+                continue
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"User {vd.user_id}: gagal dimuat ({type(e).__name__}: {e})")
+                continue
+
+            if options['check_frames']:
+                _, compact_gmm = loads(blob)
+                X = rng.standard_normal((options['check_frames'], compact_gmm.n_features))
+                diff = float(np.max(np.abs(gmm.score_samples(X) - compact_gmm.score_samples(X))))
+                self.stdout.write(f"User {vd.user_id}: selisih skor maks {diff:.2e}, ukuran {len(vd.gmm_model)} -> {len(blob)} byte")
+
+            if not options['dry_run']:
+                vd.compact_model = blob
+                vd.save(update_fields=['compact_model'])
+            converted += 1
+
+        action = 'Akan dikonversi' if options['dry_run'] else 'Dikonversi'
+        self.stdout.write(f"{action}: {converted}, dilewati: {skipped}, gagal: {failed}")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import Kelas, Siswa, VoiceData, VoiceSample
+from accounts.voice_enrollment import enqueue_voice_enrollment
+
+
+class Command(BaseCommand):
+    help = 'Antrekan pelatihan model suara untuk semua siswa satu kelas dari sampel VoiceSample yang sudah ada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kelas_id', type=int)
+        parser.add_argument('--skip-trained', action='store_true', help='Lewati siswa yang modelnya sudah dilatih')
+
+    def handle(self, *args, **options):
+        try:
+            kelas = Kelas.objects.get(pk=options['kelas_id'])
+        except Kelas.DoesNotExist:
+            raise CommandError(f"Kelas {options['kelas_id']} tidak ditemukan")
+
+        trained = set()
+        if options['skip_trained']:
+            trained = set(VoiceData.objects.filter(is_trained=True).values_list('user_id', flat=True))
+
+        queued = 0
+        for siswa in Siswa.objects.filter(kelas=kelas).select_related('user'):
+            if siswa.user_id in trained:
+                continue
+            samples = VoiceSample.objects.filter(user=siswa.user)
+            if not samples.exists():
+                self.stdout.write(f"{siswa.nama_lengkap}: belum ada sampel suara, dilewati")
+                continue
+            job = enqueue_voice_enrollment(siswa.user, samples)
+            queued += 1
+            self.stdout.write(f"{siswa.nama_lengkap}: job {job.id} ({job.total_files} file)")
+
+        self.stdout.write(f"{queued} job diantrekan untuk kelas {kelas}. Jalankan: python manage.py run_voice_jobs")
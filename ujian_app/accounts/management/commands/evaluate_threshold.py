@@ -1,10 +1,52 @@
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from accounts.models import VoiceData, User
+from accounts.feature_store import load_features_batch
+from accounts.gmm import llr_score
+from accounts.models import VoiceData
+from accounts.ubm import get_compact_ubm
+from accounts.voice_cache import BLOB_FIELDS, get_speaker_model
+from accounts.voice_enrollment import create_process_pool
+from accounts.voice_evaluation import apply_thresholds
+from accounts.voice_metrics import best_accuracy_threshold, equal_error_rate, roc_curve
 import os
 import numpy as np
-import joblib
-import io
+
+
+def list_wavs(folder):
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.wav'))
+
+
+def score_files(files, gmm, ubm_scaler, ubm_gmm):
+    """LLR user vs UBM per file (sama seperti verify_voice); file yang gagal diekstrak dilewati."""
+    scores = []
+    for mfcc in load_features_batch(files):
+        if mfcc is None:
+            continue
+        scaled = ubm_scaler.transform(mfcc)
+        scores.append(llr_score(gmm, ubm_gmm, scaled))
+    return np.array(scores)
+
+
+def evaluate_user(task):
+    """Dijalankan di worker: hanya file + model dari argumen, tanpa akses DB."""
+    user_id, gmm, ubm_scaler, ubm_gmm, pos_files, neg_files = task
+    pos_scores = score_files(pos_files, gmm, ubm_scaler, ubm_gmm)
+    neg_scores = score_files(neg_files, gmm, ubm_scaler, ubm_gmm)
+    if not len(pos_scores) or not len(neg_scores):
+        return user_id, None
+
+    roc = roc_curve(pos_scores, neg_scores)
+    best_threshold, best_acc = best_accuracy_threshold(roc, len(pos_scores), len(neg_scores))
+    eer, eer_threshold = equal_error_rate(roc)
+    return user_id, {
+        'threshold': best_threshold,
+        'accuracy': best_acc,
+        'eer': eer,
+        'eer_threshold': eer_threshold,
+        'n_pos': len(pos_scores),
+        'n_neg': len(neg_scores),
+    }
+
 
 class Command(BaseCommand):
     help = 'Evaluate and update threshold and margin for user voice models'
@@ -15,86 +57,62 @@ class Command(BaseCommand):
             type=int,
             help='Evaluate threshold for specific user ID',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes (users are evaluated in parallel)',
+        )
 
     def handle(self, *args, **options):
-        user_id = options.get('user_id')
-        if user_id:
-            users = User.objects.filter(id=user_id)
-        else:
-            users = User.objects.all()
+        voice_data = VoiceData.objects.filter(user__is_siswa=True, is_trained=True).defer(*BLOB_FIELDS)
+        if options.get('user_id'):
+            voice_data = voice_data.filter(user_id=options['user_id'])
+
+        ubm_scaler, ubm_gmm = get_compact_ubm()
+        tasks, by_user = [], {}
+        for vd in voice_data:
+            # Path folder validasi harus disesuaikan
+            pos_folder = os.path.join(settings.MEDIA_ROOT, 'voice_train', str(vd.user_id))
+            neg_folder = os.path.join(settings.MEDIA_ROOT, 'validation', 'neg', str(vd.user_id))
+
+            if not os.path.exists(pos_folder) or not os.path.exists(neg_folder):
+                self.stdout.write(f"Validation folders missing for user {vd.user_id}, skipping.")
+                continue
+
+            pos_files, neg_files = list_wavs(pos_folder), list_wavs(neg_folder)
+            if not pos_files or not neg_files:
+                self.stdout.write(f"Insufficient validation data for user {vd.user_id}, skipping.")
+                continue
 
-        for user in users:
             try:
-                vd = VoiceData.objects.get(user=user)
-                self.stdout.write(f"Evaluating threshold for user {user.id}...")
-
-                scaler = joblib.load(io.BytesIO(vd.scaler_model))
-                gmm = joblib.load(io.BytesIO(vd.gmm_model))
-
-                # Path folder validasi harus disesuaikan
-                pos_folder = os.path.join(settings.MEDIA_ROOT, 'voice_train', str(user.id))
-                neg_folder = os.path.join(settings.MEDIA_ROOT, 'validation', 'neg', str(user.id))
-
-                if not os.path.exists(pos_folder) or not os.path.exists(neg_folder):
-                    self.stdout.write(f"Validation folders missing for user {user.id}, skipping.")
-                    continue
-
-                pos_files = [os.path.join(pos_folder, f) for f in os.listdir(pos_folder) if f.endswith('.wav')]
-                neg_files = [os.path.join(neg_folder, f) for f in os.listdir(neg_folder) if f.endswith('.wav')]
-
-                if not pos_files or not neg_files:
-                    self.stdout.write(f"Insufficient validation data for user {user.id}, skipping.")
-                    continue
-
-                def extract_mfcc(file_path):
-                    import librosa
-                    audio, sr = librosa.load(file_path, sr=None)
-                    mfcc = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=40)
-                    return mfcc.T
-
-                def compute_scores(files):
-                    scores = []
-                    for fpath in files:
-                        mfcc = extract_mfcc(fpath)
-                        scaled = scaler.transform(mfcc)
-                        score = gmm.score(scaled)
-                        scores.append(score)
-                    return np.array(scores)
-
-                pos_scores = compute_scores(pos_files)
-                neg_scores = compute_scores(neg_files)
-
-                all_scores = np.concatenate([pos_scores, neg_scores])
-                min_score, max_score = all_scores.min(), all_scores.max()
-                thresholds = np.linspace(min_score, max_score, 100)
-
-                best_acc = 0
-                best_threshold = vd.threshold
-                best_margin = 0.0
-
-                for t in thresholds:
-                    tp = np.sum(pos_scores >= t)
-                    fn = np.sum(pos_scores < t)
-                    tn = np.sum(neg_scores < t)
-                    fp = np.sum(neg_scores >= t)
-
-                    far = fp / (fp + tn) if (fp + tn) > 0 else 0
-                    frr = fn / (fn + tp) if (fn + tp) > 0 else 0
-                    acc = (tp + tn) / (len(pos_scores) + len(neg_scores))
-
-                    margin_candidate = vd.threshold - t
-
-                    if acc > best_acc:
-                        best_acc = acc
-                        best_threshold = t
-                        best_margin = margin_candidate
-
-                vd.threshold = best_threshold
-                vd.margin = best_margin
-                vd.save()
-
-                self.stdout.write(f"User {user.id} evaluated. Threshold: {best_threshold:.2f}, Margin: {best_margin:.2f}, Accuracy: {best_acc:.3f}")
-            except VoiceData.DoesNotExist:
-                self.stdout.write(f"User {user.id} has no VoiceData. Skipping.")
+                _, gmm = get_speaker_model(vd)
             except Exception as e:
-                self.stderr.write(f"Error evaluating user {user.id}: {str(e)}")
+                self.stderr.write(f"Error loading model for user {vd.user_id}: {str(e)}")
+                continue
+            by_user[vd.user_id] = vd
+            tasks.append((vd.user_id, gmm, ubm_scaler, ubm_gmm, pos_files, neg_files))
+
+        self.stdout.write(f"Evaluating {len(tasks)} users with {options['workers']} worker(s)...")
+        if options['workers'] > 1:
+            with create_process_pool(options['workers']) as pool:
+                results = list(pool.map(evaluate_user, tasks))
+        else:
+            results = [evaluate_user(task) for task in tasks]
+
+        tuned = {}
+        for user_id, result in results:
+            if result is None:
+                self.stdout.write(f"No usable validation features for user {user_id}, skipping.")
+                continue
+            # verify_voice menerima jika llr > threshold - margin: margin dipilih
+            # sehingga batas efektif sama persis dengan threshold terbaik
+            tuned[user_id] = result['threshold']
+            margin = by_user[user_id].threshold - result['threshold']
+            self.stdout.write(
+                f"User {user_id} evaluated. Threshold: {result['threshold']:.2f}, Margin: {margin:.2f}, "
+                f"Accuracy: {result['accuracy']:.3f}, EER: {result['eer']:.3f} "
+                f"({result['n_pos']} pos / {result['n_neg']} neg)"
+            )
+
+        self.stdout.write(f"Updated {apply_thresholds(tuned)} voice models.")
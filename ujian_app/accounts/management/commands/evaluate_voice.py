@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from accounts.voice_evaluation import iter_voice_evaluation, summarize
+
+
+class Command(BaseCommand):
+    help = 'Evaluasi verifikasi suara semua VoiceSample terhadap model pemiliknya (paralel, dengan progres)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Jumlah proses (default: VOICE_EVALUATION_WORKERS)')
+        parser.add_argument('--user_id', type=int, action='append', dest='user_ids', help='Batasi ke user ini (bisa diulang)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        scores = []
+        for done, total, results in iter_voice_evaluation(options['workers'], options['user_ids']):
+            scores.extend(results)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{done}/{total} sampel ({done / elapsed:.1f} sampel/s)")
+
+        summary = summarize(scores)
+        if not summary['samples']:
+            self.stdout.write("Tidak ada sampel dengan model terlatih.")
+            return
+        mean_llr = f"{summary['mean_llr']:.2f}" if summary['mean_llr'] is not None else 'n/a'
+        self.stdout.write(
+            f"Selesai dalam {time.perf_counter() - start:.1f}s: {summary['samples']} sampel, "
+            f"diterima {summary['accepted']} ({summary['acceptance_rate']:.1%}), "
+            f"gagal ekstraksi {summary['failed']}, rata-rata LLR {mean_llr}"
+        )
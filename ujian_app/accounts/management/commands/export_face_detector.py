@@ -0,0 +1,54 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from accounts.detector_export import SUPPORTED_BACKENDS, compare_detectors, export_face_detector, find_images
+
+
+class Command(BaseCommand):
+    help = 'Ekspor best.pt ke runtime CPU (ONNX/OpenVINO, opsional int8) untuk FACE_DETECTOR_BACKEND'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=SUPPORTED_BACKENDS, default='openvino')
+        parser.add_argument('--int8', action='store_true', help='Kuantisasi int8 (hanya openvino)')
+        parser.add_argument(
+            '--calibration-dir',
+            help='Folder gambar kalibrasi int8 (default: MEDIA_ROOT/faces)',
+        )
+        parser.add_argument('--max-calibration-images', type=int, default=300)
+        parser.add_argument('--imgsz', type=int, default=640)
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Setelah ekspor, bandingkan latensi dan deteksi dengan model PyTorch',
+        )
+        parser.add_argument('--compare-limit', type=int, default=100)
+
+    def handle(self, *args, **options):
+        backend = options['format']
+        if options['int8'] and backend != 'openvino':
+            raise CommandError('--int8 hanya didukung untuk --format openvino')
+
+        self.stdout.write(f"Mengekspor {settings.YOLO_FACE_MODEL} ke {backend}{' int8' if options['int8'] else ''}...")
+        try:
+            path = export_face_detector(
+                backend,
+                int8=options['int8'],
+                calibration_dir=options['calibration_dir'],
+                max_calibration_images=options['max_calibration_images'],
+                imgsz=options['imgsz'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Model diekspor ke {path}"))
+
+        if options['compare']:
+            from ultralytics import YOLO
+
+            images = find_images(os.path.join(settings.MEDIA_ROOT, 'faces'), limit=options['compare_limit'])
+            if not images:
+                self.stdout.write("Tidak ada gambar di MEDIA_ROOT/faces, perbandingan dilewati.")
+                return
+            report = compare_detectors(images, YOLO(settings.YOLO_FACE_MODEL), YOLO(path, task='detect'))
+            self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from accounts.feature_store import cache_stats, config_key, get_features_batch, prune_cache, store_root
+from accounts.models import VoiceSample
+from accounts.voice_enrollment import chunked, create_process_pool
+
+
+def _rebuild_batch(paths, refresh):
+    return [f is not None for f in get_features_batch(paths, refresh=refresh)]
+
+
+class Command(BaseCommand):
+    help = 'Kelola cache fitur MFCC suara: stats, prune, rebuild'
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest='action', required=True)
+        sub.add_parser('stats', help='Jumlah file dan ukuran per konfigurasi fitur')
+
+        prune = sub.add_parser('prune', help='Hapus konfigurasi lama dan file yang lama tidak dipakai')
+        prune.add_argument('--max-age-days', type=int, help='Hapus file yang tidak dipakai selama N hari')
+        prune.add_argument('--dry-run', action='store_true')
+
+        rebuild = sub.add_parser('rebuild', help='Hitung fitur semua VoiceSample (yang belum ada di cache)')
+        rebuild.add_argument('--refresh', action='store_true', help='Ekstrak ulang walau sudah ada')
+        rebuild.add_argument('--workers', type=int, help='Jumlah proses (default: VOICE_ENROLLMENT_WORKERS / jumlah CPU)')
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_stats(self, options):
+        self.stdout.write(f"Folder cache: {store_root()} (konfigurasi aktif {config_key()})")
+        stats = cache_stats()
+        if not stats:
+            self.stdout.write("Cache kosong")
+        for key, stat in stats.items():
+            mark = ' (aktif)' if stat['current'] else ''
+            self.stdout.write(f"{key}{mark}: {stat['files']} file, {stat['bytes'] / (1024 * 1024):.1f} MB")
+
+    def handle_prune(self, options):
+        result = prune_cache(max_age_days=options['max_age_days'], dry_run=options['dry_run'])
+        action = 'Akan dihapus' if options['dry_run'] else 'Dihapus'
+        self.stdout.write(f"{action}: {result['old_configs']} konfigurasi lama, {result['stale_files']} file tidak terpakai")
+
+    def handle_rebuild(self, options):
+        paths = [s.audio_file.path for s in VoiceSample.objects.all() if s.audio_file]
+        paths = [p for p in paths if os.path.exists(p)]
+        ok = failed = done = 0
+        with create_process_pool(options['workers']) as pool:
+            futures = [pool.submit(_rebuild_batch, batch, options['refresh']) for batch in chunked(paths)]
+            for future in as_completed(futures):
+                result = future.result()
+                ok += sum(result)
+                failed += len(result) - sum(result)
+                done += len(result)
+                self.stdout.write(f"{done}/{len(paths)} file diproses")
+        self.stdout.write(f"Selesai: {ok} file di cache, {failed} gagal diekstrak")
@@ -0,0 +1,29 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from accounts.inference import InferenceError, InferenceUnavailable
+from accounts.inference_server import InferenceClient
+
+
+class Command(BaseCommand):
+    help = 'Tampilkan statistik daemon inferensi (model termuat, antrean dan isi batch proctoring)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=getattr(settings, 'INFERENCE_SOCKET', None),
+            help='Path Unix socket (default: settings.INFERENCE_SOCKET)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['socket']:
+            raise CommandError('Isi --socket atau settings.INFERENCE_SOCKET')
+
+        client = InferenceClient(options['socket'], timeout=getattr(settings, 'INFERENCE_TIMEOUT', 5.0))
+        try:
+            stats = client.stats()
+        except (InferenceError, InferenceUnavailable) as e:
+            raise CommandError(f"Gagal mengambil statistik daemon: {str(e)}")
+
+        self.stdout.write(json.dumps(stats, indent=2))
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from accounts.face_crops import compact_legacy_crops, prune_detected_faces
+
+
+class Command(BaseCommand):
+    help = 'Retensi crop wajah di MEDIA_ROOT/detected_faces: pindahkan file lama ke folder tanggal/user lalu hapus berdasarkan umur dan jumlah'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            default=getattr(settings, 'FACE_CROP_MAX_AGE_DAYS', 30),
+            help='Hapus crop yang lebih tua dari N hari (0 = tanpa batas umur)',
+        )
+        parser.add_argument(
+            '--max-per-user',
+            type=int,
+            default=getattr(settings, 'FACE_CROP_MAX_PER_USER', 200),
+            help='Sisakan paling banyak N crop terbaru per user (0 = tanpa batas)',
+        )
+        parser.add_argument(
+            '--no-compact',
+            action='store_true',
+            help='Jangan pindahkan file lama dari folder datar detected_faces/',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Hanya hitung, jangan ubah file')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if not options['no_compact']:
+            moved = compact_legacy_crops(dry_run=dry_run)
+            self.stdout.write(f"Crop lama dipindahkan ke folder tanggal/user: {moved}")
+
+        result = prune_detected_faces(
+            max_age_days=options['max_age_days'] or None,
+            max_per_user=options['max_per_user'] or None,
+            dry_run=dry_run,
+        )
+        self.stdout.write(
+            f"Dipindai: {result['scanned']}, dihapus (umur): {result['deleted_age']}, "
+            f"dihapus (jumlah): {result['deleted_count']}, disimpan: {result['kept']}"
+            + (" [dry-run]" if dry_run else "")
+        )
@@ -0,0 +1,50 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from accounts.face_encoding import encode_face
+from accounts.image_decode import decode_image
+from accounts.models import UserFace
+
+
+class Command(BaseCommand):
+    help = ('Hitung ulang encoding UserFace dengan pipeline saat ini (margin_crop + encode_face) '
+            'dari foto enroll yang tersimpan')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user_id', type=int, action='append', dest='user_ids', help='Hanya user ini (bisa diulang)')
+        parser.add_argument('--dry-run', action='store_true', help='Hitung dan bandingkan, jangan simpan')
+
+    def handle(self, *args, **options):
+        qs = UserFace.objects.select_related('user').order_by('user_id')
+        if options['user_ids']:
+            qs = qs.filter(user_id__in=options['user_ids'])
+
+        updated = failed = 0
+        for face in qs.iterator():
+            try:
+                with face.photo.open('rb') as fh:
+                    decoded = decode_image(fh)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(f"{face.user.username}: foto tidak bisa dibaca ({e}), perlu enroll ulang")
+                continue
+
+            # foto enroll adalah crop kotak YOLO, jadi kotak wajahnya seluruh foto;
+            # margin di luar kotak terisi hitam oleh margin_crop
+            height, width = decoded.array.shape[:2]
+            encoding = encode_face(decoded, (0, 0, width, height))
+            if encoding is None:
+                failed += 1
+                self.stdout.write(f"{face.user.username}: encoding gagal, perlu enroll ulang")
+                continue
+
+            old = np.frombuffer(bytes(face.encoding), dtype=np.float64)
+            shift = float(np.linalg.norm(old - encoding)) if old.shape == encoding.shape else float('nan')
+            self.stdout.write(f"{face.user.username}: jarak encoding lama-baru {shift:.3f}")
+            if not options['dry_run']:
+                face.encoding = encoding.tobytes()
+                # sinyal post_save memperbarui cache encoding dan face_index
+                face.save(update_fields=['encoding'])
+            updated += 1
+
+        action = 'Dihitung (dry-run)' if options['dry_run'] else 'Diperbarui'
+        self.stdout.write(f"{action}: {updated}, gagal: {failed}")
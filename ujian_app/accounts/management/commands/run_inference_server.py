@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from accounts.inference_server import InferenceServer
+from accounts.model_registry import get_face_detector
+
+
+class Command(BaseCommand):
+    help = 'Jalankan daemon inferensi wajah (YOLO + face_recognition) di Unix socket'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=getattr(settings, 'INFERENCE_SOCKET', None),
+            help='Path Unix socket (default: settings.INFERENCE_SOCKET)',
+        )
+        parser.add_argument(
+            '--no-warmup',
+            action='store_true',
+            help='Jangan muat model sebelum menerima request',
+        )
+
+    def handle(self, *args, **options):
+        socket_path = options['socket']
+        if not socket_path:
+            raise CommandError('Isi --socket atau settings.INFERENCE_SOCKET')
+
+        if not options['no_warmup']:
+            self.stdout.write("Memuat model wajah...")
+            get_face_detector()
+            import face_recognition  # noqa: F401  (memuat model dlib)
+
+        server = InferenceServer(socket_path)
+        self.stdout.write(f"Daemon inferensi mendengarkan di {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
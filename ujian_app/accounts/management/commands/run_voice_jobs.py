@@ -0,0 +1,63 @@
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from accounts.models import VoiceEnrollmentJob
+from accounts.voice_enrollment import claim_next_job, create_process_pool, requeue_job, requeue_stale_jobs, run_job
+
+# Job yang merusak pool sebanyak ini dianggap penyebabnya (mis. file yang membuat ffmpeg/librosa crash)
+MAX_POOL_CRASHES = 3
+
+
+class Command(BaseCommand):
+    help = 'Worker antrean pendaftaran suara (VoiceEnrollmentJob): ekstraksi MFCC paralel + pelatihan GMM'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Jumlah proses ekstraksi fitur (default: VOICE_ENROLLMENT_WORKERS / jumlah CPU)')
+        parser.add_argument('--interval', type=float, default=2.0, help='Jeda (detik) saat antrean kosong')
+        parser.add_argument('--once', action='store_true', help='Proses antrean sampai kosong lalu keluar')
+        parser.add_argument('--stale-minutes', type=int, default=30,
+                            help='Job RUNNING yang lebih lama dari ini dianggap ditinggal worker mati dan diantrekan ulang')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(options['stale_minutes'])
+        if requeued:
+            self.stdout.write(f"{requeued} job macet diantrekan ulang")
+
+        crashes = {}  # job_id -> jumlah pool rusak saat job ini berjalan
+        pool = create_process_pool(options['workers'])
+        self.stdout.write("Worker suara berjalan...")
+        try:
+            while True:
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    job = run_job(job, pool)
+                except BrokenProcessPool as e:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = create_process_pool(options['workers'])
+                    crashes[job.id] = crashes.get(job.id, 0) + 1
+                    if crashes[job.id] >= MAX_POOL_CRASHES:
+                        job.status = VoiceEnrollmentJob.STATUS_FAILED
+                        job.message = f'Proses ekstraksi fitur mati {crashes[job.id]} kali: {e}'
+                        job.finished_at = timezone.now()
+                        job.save(update_fields=['status', 'message', 'finished_at'])
+                        self.stderr.write(f"Job {job.id}: gagal, pool proses rusak {crashes[job.id]} kali")
+                    else:
+                        requeue_job(job)
+                        self.stderr.write(f"Job {job.id}: pool proses rusak ({e}), pool dibuat ulang dan job diantrekan ulang")
+                    continue
+
+                self.stdout.write(
+                    f"Job {job.id} ({job.user.username}): {job.status} "
+                    f"dalam {time.perf_counter() - start:.1f}s - {job.message}"
+                )
+        finally:
+            pool.shutdown()
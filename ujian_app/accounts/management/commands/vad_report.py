@@ -0,0 +1,68 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+from accounts.benchmarks import default_output_path, environment_info, save_report
+from accounts.models import VoiceSample
+from accounts.utils import extract_mfcc_batch
+from accounts.vad import apply_vad_batch, vad_config
+from accounts.voice_enrollment import chunked
+
+
+class Command(BaseCommand):
+    help = 'Laporan VAD: fraksi frame MFCC yang dipertahankan per sampel suara dengan parameter VOICE_VAD_* saat ini'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user_id', type=int, action='append', dest='user_ids', help='Batasi ke user ini (bisa diulang)')
+        parser.add_argument('--limit', type=int, help='Jumlah maksimal sampel')
+        parser.add_argument('--output', help='Path laporan JSON (default: BENCHMARK_DIR/vad-<commit>.json)')
+
+    def handle(self, *args, **options):
+        samples = VoiceSample.objects.order_by('id')
+        if options['user_ids']:
+            samples = samples.filter(user_id__in=options['user_ids'])
+        if options['limit']:
+            samples = samples[:options['limit']]
+        storage = VoiceSample._meta.get_field('audio_file').storage
+        paths = [storage.path(name) for name in samples.values_list('audio_file', flat=True)]
+
+        config = dict(vad_config(), enabled=True)
+        frames_before = frames_after = failed = 0
+        fractions = []
+        for batch in chunked(paths):
+            # fitur tanpa VAD (bukan dari cache) agar jumlah frame awal diketahui
+            raw = extract_mfcc_batch(batch, vad=False)
+            kept, batch_fractions = apply_vad_batch(raw, config)
+            for before, after, fraction in zip(raw, kept, batch_fractions):
+                if before is None:
+                    failed += 1
+                    continue
+                frames_before += len(before)
+                frames_after += len(after)
+                fractions.append(fraction)
+
+        if not fractions:
+            self.stdout.write("Tidak ada sampel suara yang bisa diekstrak")
+            return
+
+        fractions = np.array(fractions)
+        report = environment_info()
+        report.update({
+            'benchmark': 'vad',
+            'config': config,
+            'samples': len(fractions),
+            'failed': failed,
+            'frames_before': frames_before,
+            'frames_after': frames_after,
+            'kept_fraction': frames_after / frames_before,
+            'kept_fraction_mean': float(fractions.mean()),
+            'kept_fraction_p5': float(np.percentile(fractions, 5)),
+            'kept_fraction_p50': float(np.percentile(fractions, 50)),
+        })
+        output = options['output'] or default_output_path('vad')
+        save_report(report, output)
+
+        self.stdout.write(
+            f"{len(fractions)} sampel ({failed} gagal): {frames_after}/{frames_before} frame dipertahankan "
+            f"({report['kept_fraction']:.1%}), median per sampel {report['kept_fraction_p50']:.1%}, "
+            f"p5 {report['kept_fraction_p5']:.1%}"
+        )
+        self.stdout.write(f"Hasil disimpan di {output}")
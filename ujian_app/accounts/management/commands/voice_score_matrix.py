@@ -0,0 +1,99 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from accounts.benchmarks import default_output_path, environment_info, save_report
+from accounts.voice_embedding import calibration_path, save_calibration, scoring_mode
+from accounts.voice_evaluation import apply_thresholds, embedding_score_matrix, score_matrix
+
+
+class Command(BaseCommand):
+    help = 'Skor setiap sampel suara terhadap setiap model: distribusi target/impostor, EER, DET, dan tuning threshold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Jumlah proses (default: VOICE_EVALUATION_WORKERS)')
+        parser.add_argument('--user_id', type=int, action='append', dest='user_ids', help='Batasi ke user ini (bisa diulang)')
+        parser.add_argument('--mode', choices=['llr', 'embedding'],
+                            help='Skor LLR GMM-UBM atau cosine embedding (default: VOICE_SCORING_MODE)')
+        parser.add_argument('--holdout', type=float, default=0.3,
+                            help='Mode embedding: proporsi sampel terbaru tiap user yang ditahan sebagai probe')
+        parser.add_argument('--criterion', choices=['accuracy', 'eer'], default='accuracy',
+                            help='Kriteria threshold (per model untuk LLR, global untuk embedding)')
+        parser.add_argument('--apply', action='store_true',
+                            help='Simpan threshold (LLR: margin VoiceData, embedding: VOICE_EMBEDDING_CALIBRATION)')
+        parser.add_argument('--output', help='Path laporan JSON (default: BENCHMARK_DIR/voice_scores-<commit>.json)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def progress(done, total):
+            self.stdout.write(f"{done}/{total} sampel dinilai")
+
+        mode = options['mode'] or scoring_mode()
+        if not 0 < options['holdout'] < 1:
+            raise CommandError("--holdout harus di antara 0 dan 1")
+        try:
+            if mode == 'embedding':
+                matrix = embedding_score_matrix(options['workers'], options['user_ids'], options['holdout'], progress)
+            else:
+                matrix = score_matrix(options['workers'], options['user_ids'], progress=progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not len(matrix.target_scores()) or not len(matrix.impostor_scores()):
+            raise CommandError("Butuh sampel target dan impostor (minimal dua user dengan model dan sampel)")
+
+        metrics = matrix.metrics()
+        if mode == 'embedding':
+            # satu threshold cosine untuk semua user (embedding pendaftaran dibangun ulang tanpa probe)
+            global_threshold, global_value = matrix.global_threshold(options['criterion'])
+            tuned = {}
+        else:
+            tuned = matrix.model_thresholds_tuned(options['criterion'])
+        # sampel milik user tanpa model hanya benar jika ditolak (-1)
+        id_accuracy = matrix.identification_accuracy()
+
+        report = environment_info()
+        report.update({
+            'benchmark': 'voice_scores',
+            'mode': mode,
+            'models': len(matrix.model_user_ids),
+            'samples': len(matrix.sample_ids),
+            'seconds': time.perf_counter() - start,
+            'eer': metrics['eer'],
+            'eer_threshold': metrics['eer_threshold'],
+            'target_trials': metrics['target_trials'],
+            'impostor_trials': metrics['impostor_trials'],
+            'identification_accuracy': id_accuracy,
+            'det': metrics['det'],
+            'distributions': matrix.distributions(),
+            'tuned_thresholds': {str(k): v for k, v in tuned.items()},
+        })
+        if mode == 'embedding':
+            report.update({'holdout': options['holdout'], 'global_threshold': global_threshold,
+                           'criterion': options['criterion']})
+        output = options['output'] or default_output_path('voice_scores')
+        save_report(report, output)
+
+        self.stdout.write(
+            f"[{mode}] {report['models']} model x {report['samples']} sampel dalam {report['seconds']:.1f}s: "
+            f"EER {metrics['eer']:.2%} (threshold {metrics['eer_threshold']:.2f}), "
+            f"{metrics['target_trials']} trial target / {metrics['impostor_trials']} impostor, "
+            f"akurasi identifikasi {id_accuracy:.2%}"
+        )
+        for user_id, threshold in sorted(tuned.items()):
+            self.stdout.write(f"User {user_id}: threshold {options['criterion']} {threshold:.2f}")
+        if mode == 'embedding':
+            label = 'EER' if options['criterion'] == 'eer' else 'akurasi'
+            self.stdout.write(f"Threshold cosine global ({options['criterion']}): {global_threshold:.3f}, "
+                              f"{label} held-out {global_value:.2%}")
+        self.stdout.write(f"Laporan disimpan di {output}")
+
+        if options['apply'] and mode == 'embedding':
+            save_calibration(global_threshold, criterion=options['criterion'], holdout=options['holdout'],
+                             eer=metrics['eer'], target_trials=metrics['target_trials'],
+                             impostor_trials=metrics['impostor_trials'])
+            self.stdout.write(f"Threshold embedding disimpan di {calibration_path()}")
+        elif options['apply']:
+            self.stdout.write(f"{apply_thresholds(tuned)} model suara diperbarui")
+        else:
+            self.stdout.write("Jalankan dengan --apply untuk menyimpan threshold.")
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from accounts.model_registry import get_face_detector, get_yolo_model, registry
+from accounts.ubm import ubm_holder
+
+
+class Command(BaseCommand):
+    help = 'Muat model wajah (registry) dan UBM suara lalu tampilkan waktu muat dan jejak memorinya'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            action='append',
+            dest='models',
+            help='Path bobot YOLO yang dimuat (bisa diulang). Default: detektor FACE_DETECTOR_BACKEND',
+        )
+
+    def handle(self, *args, **options):
+        paths = options.get('models')
+
+        try:
+            if paths:
+                for path in paths:
+                    get_yolo_model(path)
+            else:
+                get_face_detector()
+        except Exception as e:
+            self.stderr.write(f"Gagal memuat model: {str(e)}")
+
+        try:
+            ubm_holder.compact()
+        except Exception as e:
+            self.stderr.write(f"Gagal memuat UBM: {str(e)}")
+
+        for key, stat in registry.stats().items():
+            param_mb = (stat['param_bytes'] or 0) / (1024 * 1024)
+            rss_mb = stat['rss_delta_bytes'] / (1024 * 1024)
+            self.stdout.write(
+                f"{key[0]} {key[1]}: load={stat['load_seconds']:.2f}s, "
+                f"rss_delta={rss_mb:.1f}MB, params={param_mb:.1f}MB"
+            )
+
+        ubm = ubm_holder.stats()
+        if ubm['loads']:
+            self.stdout.write(
+                f"ubm {ubm['path']}: load={ubm['last_load_seconds']:.3f}s, "
+                f"loads={ubm['loads']}"
+            )
@@ -0,0 +1,100 @@
+# accounts/mfcc.py
+"""
+Ekstraksi MFCC banyak klip sekaligus, setara librosa.feature.mfcc dengan
+parameter default (n_fft=2048, hop=512, hann, center + padding nol,
+128 mel Slaney, power_to_db top_db=80 per klip, DCT-II ortho).
+
+Frame semua klip diperlakukan sebagai satu deret lalu STFT, filterbank mel
+dan DCT dihitung per blok dengan matriks yang dihitung sekali; hasilnya
+dipecah lagi menjadi matriks fitur per klip (frame x n_mfcc). Frame adalah
+view strided atas sinyal, dan hanya frame satu blok yang disalin sekaligus
+(block_frames x n_fft float32).
+"""
+import threading
+
+import librosa
+import numpy as np
+
+AMIN = 1e-10
+TOP_DB = 80.0
+
+
+def dct_matrix(n_out, n_in):
+    """Matriks DCT-II ortonormal (n_out x n_in), sama dengan scipy.fft.dct(norm='ortho')."""
+    n = np.arange(n_in)
+    k = np.arange(n_out)[:, None]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+class MFCCExtractor:
+    def __init__(self, sr=16000, n_mfcc=13, n_fft=2048, hop_length=512, n_mels=128, block_frames=4096):
+        self.sr = sr
+        self.n_mfcc = n_mfcc
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.block_frames = block_frames
+        self.window = librosa.filters.get_window('hann', n_fft, fftbins=True).astype(np.float32)
+        self.mel_basis_t = np.ascontiguousarray(librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels).T)
+        self.dct_t = np.ascontiguousarray(dct_matrix(n_mfcc, n_mels).T.astype(np.float32))
+
+    def _frames(self, y):
+        pad = self.n_fft // 2
+        padded = np.pad(np.asarray(y, dtype=np.float32), pad, mode='constant')
+        if len(padded) < self.n_fft:
+            padded = np.pad(padded, (0, self.n_fft - len(padded)))
+        return np.lib.stride_tricks.sliding_window_view(padded, self.n_fft)[::self.hop_length]
+
+    def _log_mel(self, frames):
+        spectrum = np.fft.rfft(frames * self.window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        mel = power.astype(np.float32) @ self.mel_basis_t
+        return 10.0 * np.log10(np.maximum(mel, AMIN))
+
+    def _block(self, frames, offsets, start, stop):
+        """Frame global [start, stop) dari view per klip, disalin hanya untuk blok ini."""
+        first = np.searchsorted(offsets, start, side='right') - 1
+        parts = []
+        for i in range(first, len(frames)):
+            if offsets[i] >= stop:
+                break
+            parts.append(frames[i][max(start, offsets[i]) - offsets[i]:min(stop, offsets[i + 1]) - offsets[i]])
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def extract_batch(self, clips):
+        """List array audio 1-D (sr ini) -> list MFCC float32 (frame x n_mfcc), urutan sama."""
+        if not clips:
+            return []
+        frames = [self._frames(y) for y in clips]
+        counts = np.array([len(f) for f in frames])
+        offsets = np.r_[0, np.cumsum(counts)]
+
+        log_mel = np.empty((offsets[-1], self.mel_basis_t.shape[1]), dtype=np.float32)
+        for start in range(0, offsets[-1], self.block_frames):
+            stop = min(start + self.block_frames, offsets[-1])
+            log_mel[start:stop] = self._log_mel(self._block(frames, offsets, start, stop))
+
+        # top_db relatif terhadap puncak masing-masing klip (seperti power_to_db per file)
+        clip_max = np.maximum.reduceat(log_mel.max(axis=1), offsets[:-1])
+        np.maximum(log_mel, np.repeat(clip_max - TOP_DB, counts)[:, None], out=log_mel)
+
+        mfcc = log_mel @ self.dct_t
+        return [mfcc[offsets[i]:offsets[i + 1]] for i in range(len(clips))]
+
+    def extract(self, y):
+        return self.extract_batch([y])[0]
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_extractor():
+    """Extractor bersama per proses dengan parameter fitur suara aplikasi."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = MFCCExtractor()
+    return _default
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_facetestimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voicedata',
+            name='model_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
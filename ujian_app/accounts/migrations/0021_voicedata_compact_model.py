@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_voicedata_model_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voicedata',
+            name='compact_model',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.20 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_voicedata_compact_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoiceEnrollmentJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Menunggu'), ('RUNNING', 'Diproses'), ('DONE', 'Selesai'), ('FAILED', 'Gagal')], db_index=True, default='PENDING', max_length=10)),
+                ('total_files', models.PositiveIntegerField(default=0)),
+                ('processed_files', models.PositiveIntegerField(default=0)),
+                ('message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('samples', models.ManyToManyField(blank=True, to='accounts.voicesample')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='voice_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.20 on 2026-10-18 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_voiceenrollmentjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='voicedata',
+            name='embedding',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
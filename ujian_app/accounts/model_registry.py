@@ -0,0 +1,143 @@
+# accounts/model_registry.py
+import logging
+import os
+import threading
+import time
+
+import psutil
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_bytes():
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+def _param_bytes(model):
+    """Ukuran bobot model (byte) jika model berbasis torch, selain itu None."""
+    inner = getattr(model, 'model', None)
+    if inner is None or not hasattr(inner, 'parameters'):
+        return None
+    try:
+        return sum(p.numel() * p.element_size() for p in inner.parameters())
+    except Exception:
+        return None
+
+
+class ModelRegistry:
+    """
+    Registry model per-proses. Setiap model dimuat sekali saat pertama kali
+    dipakai lalu dibagi ke semua pemanggil (view, backend, service).
+    Aman dipakai dari banyak thread: pemuatan satu model tidak memblokir
+    pemanggil yang meminta model lain.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._stats = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key, loader):
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._key_lock(key):
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+            rss_delta = _rss_bytes() - rss_before
+
+            self._stats[key] = {
+                'load_seconds': load_seconds,
+                'rss_delta_bytes': rss_delta,
+                'param_bytes': _param_bytes(model),
+                'loaded_at': time.time(),
+            }
+            self._models[key] = model
+            logger.info(
+                "Model %s dimuat dalam %.2f s (RSS +%.1f MB)",
+                key, load_seconds, rss_delta / (1024 * 1024),
+            )
+            return model
+
+    def register(self, key, model):
+        """Pasang model yang sudah jadi (mis. detektor pengganti untuk benchmark)."""
+        with self._key_lock(key):
+            self._models[key] = model
+            self._stats[key] = {
+                'load_seconds': 0.0,
+                'rss_delta_bytes': 0,
+                'param_bytes': _param_bytes(model),
+                'loaded_at': time.time(),
+            }
+
+    def is_loaded(self, key):
+        return key in self._models
+
+    def stats(self):
+        return {key: dict(value) for key, value in self._stats.items()}
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+            self._locks.clear()
+
+
+registry = ModelRegistry()
+
+
+def get_yolo_model(path=None, task=None):
+    """YOLO bersama untuk path bobot tertentu (default: settings.YOLO_FACE_MODEL)."""
+    path = path or settings.YOLO_FACE_MODEL
+
+    def load():
+        from ultralytics import YOLO
+        return YOLO(path, task=task) if task else YOLO(path)
+
+    return registry.get(('yolo', path), load)
+
+
+_missing_warned = set()
+
+
+def face_detector_path():
+    """
+    (path bobot, task) detektor wajah sesuai settings.FACE_DETECTOR_BACKEND
+    ('pytorch', 'onnx', 'openvino'). Jika hasil ekspor belum ada, kembali ke
+    bobot PyTorch. Kunci registry-nya ('yolo', path).
+    """
+    from .detector_export import exported_model_path
+
+    backend = getattr(settings, 'FACE_DETECTOR_BACKEND', 'pytorch')
+    if backend == 'pytorch':
+        return settings.YOLO_FACE_MODEL, None
+
+    int8 = getattr(settings, 'FACE_DETECTOR_INT8', False)
+    path = exported_model_path(backend, int8=int8)
+    if not os.path.exists(path):
+        if path not in _missing_warned:
+            _missing_warned.add(path)
+            logger.warning("Model %s belum diekspor (%s), pakai bobot PyTorch. "
+                           "Jalankan: python manage.py export_face_detector --format %s%s",
+                           backend, path, backend, ' --int8' if int8 else '')
+        return settings.YOLO_FACE_MODEL, None
+    return path, 'detect'
+
+
+def get_face_detector():
+    """Detektor wajah bersama (lihat face_detector_path)."""
+    path, task = face_detector_path()
+    return get_yolo_model(path, task=task)
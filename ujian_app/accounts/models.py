@@ -100,9 +100,15 @@ class VoiceData(models.Model):
     user         = models.OneToOneField(User, on_delete=models.CASCADE)
     scaler_model = models.BinaryField(null=True, blank=True)
     gmm_model    = models.BinaryField(null=True, blank=True)
+    # Model ringkas (accounts.gmm): scaler + GMM diagonal float32 dalam satu blob
+    compact_model = models.BinaryField(null=True, blank=True)
     threshold    = models.FloatField(default=-1000.0)
     margin       = models.FloatField(default=10.0) 
     is_trained   = models.BooleanField(default=False)
+    # Dinaikkan setiap scaler_model/gmm_model diganti; dipakai sebagai kunci cache model
+    model_version = models.PositiveIntegerField(default=0)
+    # Supervector GMM float32 (accounts.voice_embedding) untuk VOICE_SCORING_MODE='embedding'
+    embedding    = models.BinaryField(null=True, blank=True)
 
     def __str__(self):
         return f"VoiceData for {self.user.username}"
@@ -121,6 +127,44 @@ class VoiceSample(models.Model):
                 os.remove(self.audio_file.path)
         super().delete(*args, **kwargs)
     
+class VoiceEnrollmentJob(models.Model):
+    """Antrean pelatihan model suara (diproses oleh: python manage.py run_voice_jobs)."""
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Menunggu'),
+        (STATUS_RUNNING, 'Diproses'),
+        (STATUS_DONE, 'Selesai'),
+        (STATUS_FAILED, 'Gagal'),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='voice_jobs')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    samples = models.ManyToManyField(VoiceSample, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    total_files = models.PositiveIntegerField(default=0)
+    processed_files = models.PositiveIntegerField(default=0)
+    message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Job suara {self.id} untuk {self.user.username} ({self.status})"
+
+    @property
+    def progress(self):
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.total_files:
+            return 0
+        # 90% untuk ekstraksi fitur, sisanya pelatihan GMM
+        return int(90 * self.processed_files / self.total_files)
+
 def user_face_path(instance, filename):
     return f'faces/{instance.user.username}/{filename}'
 
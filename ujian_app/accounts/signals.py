@@ -0,0 +1,34 @@
+# accounts/signals.py
+import numpy as np
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .face_cache import invalidate_known_encoding
+from .face_index import face_index
+from .models import UserFace, VoiceData
+from .voice_cache import invalidate_speaker_model
+from .voice_embedding import voice_index
+
+
+@receiver(post_save, sender=UserFace)
+def userface_saved(sender, instance, **kwargs):
+    invalidate_known_encoding(instance.user_id)
+    face_index.upsert(instance.user_id, np.frombuffer(bytes(instance.encoding), dtype=np.float64))
+
+
+@receiver(post_delete, sender=UserFace)
+def userface_deleted(sender, instance, **kwargs):
+    invalidate_known_encoding(instance.user_id)
+    face_index.remove(instance.user_id)
+
+
+@receiver(post_save, sender=VoiceData)
+def voicedata_saved(sender, instance, **kwargs):
+    invalidate_speaker_model(instance.user_id)
+    voice_index.refresh_user(instance.user_id)
+
+
+@receiver(post_delete, sender=VoiceData)
+def voicedata_deleted(sender, instance, **kwargs):
+    invalidate_speaker_model(instance.user_id)
+    voice_index.remove(instance.user_id)
@@ -1,3 +1,827 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+import librosa
+import numpy as np
+import soundfile as sf
+from django.db.models.signals import post_delete, post_save
+from django.test import SimpleTestCase, override_settings
+from PIL import Image, JpegImagePlugin
+from scipy.signal import resample_poly
+from sklearn.mixture import GaussianMixture
+from sklearn.preprocessing import StandardScaler
+
+from . import face_cache
+from .audio_decode import AudioDecodeError, decode_audio
+from .batching import BatchScheduler
+from .cache import LRUCache
+from .face_crops import CropWriter, compact_legacy_crops, crop_path, prune_detected_faces
+from .face_encoding import get_margin_crop, margin_crop
+from .face_index import FaceIndex
+from .feature_store import config_key, content_hash, feature_path, get_features, get_features_batch, prune_cache
+from .gmm import (
+    DiagGMM, DiagScaler, GMMBank, compact_from_sklearn, dumps, is_compact, loads,
+    map_adapt_means, top_c_llr_samples,
+)
+from .image_decode import decode_image
+from .mfcc import MFCCExtractor
+from .models import UserFace
+from .vad import N_MELS, apply_vad, speech_mask
+from .utils import extract_mfcc
+from .voice_evaluation import ScoreMatrix, split_holdout
+from .voice_embedding import compute_embedding
+from .voice_stream import StreamingEmbeddingVerifier, StreamingMFCC, StreamingResampler
+from .voice_metrics import best_accuracy_threshold, equal_error_rate, roc_curve
+
+
+def random_gmm(rng, n_components, n_features=13, adapted_from_ubm=False):
+    weights = rng.uniform(0.5, 1.5, n_components)
+    return DiagGMM(
+        weights / weights.sum(),
+        rng.standard_normal((n_components, n_features)),
+        rng.uniform(0.5, 2.0, (n_components, n_features)),
+        adapted_from_ubm=adapted_from_ubm,
+    )
+
+
+class CompactGMMTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = np.vstack([rng.normal(loc, 1.0, (200, 13)) for loc in (-2.0, 0.0, 3.0)])
+        self.scaler = StandardScaler().fit(self.X)
+        self.sk_gmm = GaussianMixture(n_components=4, covariance_type='diag', random_state=0)
+        self.sk_gmm.fit(self.scaler.transform(self.X))
+
+    def test_score_samples_matches_sklearn(self):
+        gmm = DiagGMM.from_sklearn(self.sk_gmm)
+        scaled = self.scaler.transform(self.X)
+        np.testing.assert_allclose(gmm.score_samples(scaled), self.sk_gmm.score_samples(scaled), rtol=1e-5, atol=1e-4)
+        self.assertAlmostEqual(gmm.score(scaled), self.sk_gmm.score(scaled), places=4)
+
+    def test_scaler_matches_sklearn(self):
+        scaler = DiagScaler.from_sklearn(self.scaler)
+        np.testing.assert_allclose(scaler.transform(self.X), self.scaler.transform(self.X), rtol=1e-5, atol=1e-5)
+
+    def test_dumps_loads_round_trip(self):
+        blob = compact_from_sklearn(self.sk_gmm, self.scaler)
+        self.assertTrue(is_compact(blob))
+        scaler, gmm = loads(blob)
+        original = DiagGMM.from_sklearn(self.sk_gmm)
+        np.testing.assert_array_equal(gmm.weights, original.weights)
+        np.testing.assert_array_equal(gmm.means, original.means)
+        np.testing.assert_array_equal(gmm.precisions, original.precisions)
+        np.testing.assert_array_equal(scaler.mean, DiagScaler.from_sklearn(self.scaler).mean)
+        self.assertFalse(gmm.adapted_from_ubm)
+
+    def test_round_trip_keeps_adapted_flag(self):
+        ubm = DiagGMM.from_sklearn(self.sk_gmm)
+        adapted = map_adapt_means(ubm, self.scaler.transform(self.X[:200]))
+        self.assertTrue(adapted.adapted_from_ubm)
+        scaler, gmm = loads(dumps(adapted))
+        self.assertIsNone(scaler)
+        self.assertTrue(gmm.adapted_from_ubm)
+        np.testing.assert_array_equal(gmm.means, adapted.means)
+
+    def test_loads_rejects_truncated_blob(self):
+        blob = dumps(DiagGMM.from_sklearn(self.sk_gmm))
+        with self.assertRaises(ValueError):
+            loads(blob[:-4])
+
+    def test_top_c_with_all_components_equals_full_llr(self):
+        rng = np.random.default_rng(1)
+        ubm = random_gmm(rng, 8)
+        user = map_adapt_means(ubm, rng.standard_normal((100, 13)))
+        X = rng.standard_normal((50, 13))
+        full = user.score_samples(X) - ubm.score_samples(X)
+        np.testing.assert_allclose(top_c_llr_samples(user, ubm, X, 8), full, rtol=1e-9, atol=1e-9)
+
+
+class GMMBankTests(SimpleTestCase):
+    def test_score_clips_matches_each_model(self):
+        rng = np.random.default_rng(2)
+        models = [random_gmm(rng, 4), random_gmm(rng, 8), random_gmm(rng, 4)]
+        clips = [rng.standard_normal((n, 13)) for n in (1, 37, 120, 5)]
+        bank = GMMBank(models)
+        # max_elements kecil memaksa beberapa blok, termasuk klip yang terbelah di batas blok
+        scores = bank.score_clips(clips, max_elements=16 * bank.total_components)
+        expected = np.array([[gmm.score(clip) for gmm in models] for clip in clips])
+        np.testing.assert_allclose(scores, expected, rtol=1e-9, atol=1e-9)
+
+
+class MFCCExtractorTests(SimpleTestCase):
+    def test_extract_batch_matches_librosa(self):
+        rng = np.random.default_rng(3)
+        # termasuk klip lebih pendek dari n_fft (2048)
+        clips = [rng.uniform(-1, 1, n).astype(np.float32) for n in (16000, 7001, 3000, 1000)]
+        extractor = MFCCExtractor()
+        for clip, mfcc in zip(clips, extractor.extract_batch(clips)):
+            expected = librosa.feature.mfcc(y=clip, sr=16000, n_mfcc=13).T
+            self.assertEqual(mfcc.shape, expected.shape)
+            np.testing.assert_allclose(mfcc, expected, rtol=1e-3, atol=1e-2)
+
+    def test_small_blocks_match_single_block(self):
+        rng = np.random.default_rng(6)
+        clips = [rng.uniform(-1, 1, n).astype(np.float32) for n in (16000, 1000, 7001)]
+        expected = MFCCExtractor().extract_batch(clips)
+        # blok 5 frame memotong klip di tengah dan menggabungkan ekor/awal klip berurutan
+        for mfcc, ref in zip(MFCCExtractor(block_frames=5).extract_batch(clips), expected):
+            np.testing.assert_allclose(mfcc, ref, rtol=1e-5, atol=1e-4)
+
+    def test_extract_matches_batch(self):
+        clip = np.random.default_rng(4).uniform(-1, 1, 5000).astype(np.float32)
+        extractor = MFCCExtractor()
+        np.testing.assert_array_equal(extractor.extract(clip), extractor.extract_batch([clip])[0])
+
+
+class VoiceMetricsTests(SimpleTestCase):
+    # Skor 2 muncul di positif dan negatif: ketiganya harus berada di satu titik operasi
+    POS = [3.0, 2.0, 2.0]
+    NEG = [2.0, 1.0]
+
+    def test_roc_curve_with_ties(self):
+        roc = roc_curve(self.POS, self.NEG)
+        np.testing.assert_allclose(roc['thresholds'], [3.0, 2.5, 1.5, 0.5])
+        np.testing.assert_allclose(roc['tp'], [0, 1, 3, 3])
+        np.testing.assert_allclose(roc['fp'], [0, 0, 1, 2])
+        np.testing.assert_allclose(roc['far'], [0, 0, 0.5, 1])
+        np.testing.assert_allclose(roc['frr'], [1, 2 / 3, 0, 0])
+
+    def test_roc_endpoints_reject_and_accept_all(self):
+        roc = roc_curve(self.POS, self.NEG)
+        scores = np.array(self.POS + self.NEG)
+        # titik pertama: tidak ada skor > threshold; titik terakhir: semua skor > threshold
+        self.assertFalse(np.any(scores > roc['thresholds'][0]))
+        self.assertTrue(np.all(scores > roc['thresholds'][-1]))
+        self.assertEqual((roc['far'][0], roc['frr'][0]), (0.0, 1.0))
+        self.assertEqual((roc['far'][-1], roc['frr'][-1]), (1.0, 0.0))
+
+    def test_thresholds_reproduce_counts(self):
+        pos, neg = np.array(self.POS), np.array(self.NEG)
+        roc = roc_curve(pos, neg)
+        for t, tp, fp in zip(roc['thresholds'], roc['tp'], roc['fp']):
+            self.assertEqual(np.sum(pos > t), tp)
+            self.assertEqual(np.sum(neg > t), fp)
+
+    def test_best_accuracy_threshold(self):
+        roc = roc_curve(self.POS, self.NEG)
+        threshold, accuracy = best_accuracy_threshold(roc, len(self.POS), len(self.NEG))
+        self.assertEqual(threshold, 1.5)
+        self.assertAlmostEqual(accuracy, 0.8)
+
+    def test_equal_error_rate(self):
+        roc = roc_curve([2.0, 4.0], [1.0, 3.0])
+        eer, threshold = equal_error_rate(roc)
+        self.assertAlmostEqual(eer, 0.5)
+        self.assertEqual(threshold, 2.5)
+
+        eer, threshold = equal_error_rate(roc_curve(self.POS, self.NEG))
+        self.assertAlmostEqual(eer, 0.25)
+        self.assertEqual(threshold, 1.5)
+
+    def test_roc_curve_requires_both_classes(self):
+        with self.assertRaises(ValueError):
+            roc_curve([1.0], [])
+
+
+class ScoreMatrixTests(SimpleTestCase):
+    def test_identification_accuracy_counts_rejected_unenrolled_samples(self):
+        # model user 1 dan 2; sampel 3 milik user 5 yang tidak punya model
+        matrix = ScoreMatrix(
+            model_user_ids=[1, 2],
+            model_thresholds=[0.0, 0.0],
+            sample_ids=[10, 11, 12, 13],
+            sample_owners=[1, 2, 2, 5],
+            llr=[[2.0, -1.0], [-1.0, 3.0], [1.5, 0.5], [-2.0, -3.0]],
+        )
+        np.testing.assert_array_equal(matrix.identification(), [1, 2, 1, -1])
+        np.testing.assert_array_equal(matrix.expected_identity(), [1, 2, 2, -1])
+        self.assertAlmostEqual(matrix.identification_accuracy(), 0.75)
+
+    def test_global_threshold_pools_all_trials(self):
+        matrix = ScoreMatrix(
+            model_user_ids=[1, 2],
+            model_thresholds=[0.5, 0.5],
+            sample_ids=[10, 11],
+            sample_owners=[1, 2],
+            llr=[[0.9, 0.3], [0.2, 0.8]],
+        )
+        threshold, accuracy = matrix.global_threshold()
+        self.assertTrue(0.3 < threshold < 0.8)
+        self.assertEqual(accuracy, 1.0)
+        threshold, eer = matrix.global_threshold('eer')
+        self.assertEqual(eer, 0.0)
+
+    def test_split_holdout_keeps_enrolment_samples(self):
+        self.assertEqual(split_holdout([1]), ([1], []))
+        self.assertEqual(split_holdout([1, 2]), ([1], [2]))
+        self.assertEqual(split_holdout(list(range(10))), (list(range(7)), [7, 8, 9]))
+
+
+class BatchSchedulerTests(SimpleTestCase):
+    def test_concurrent_submits_are_coalesced(self):
+        batches = []
+
+        def batch_fn(items):
+            batches.append(list(items))
+            return [item * 2 for item in items]
+
+        scheduler = BatchScheduler(batch_fn, max_batch_size=8, max_wait_ms=200)
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(scheduler.submit, range(4)))
+        self.assertEqual(results, [0, 2, 4, 6])
+        self.assertLess(len(batches), 4)
+        self.assertEqual(sorted(x for batch in batches for x in batch), [0, 1, 2, 3])
+        self.assertEqual(scheduler.stats()['items'], 4)
+
+    def test_timed_out_item_is_dropped(self):
+        release = threading.Event()
+        seen = []
+
+        def batch_fn(items):
+            seen.extend(items)
+            release.wait(5)
+            return items
+
+        scheduler = BatchScheduler(batch_fn, max_batch_size=1, max_wait_ms=0)
+        with ThreadPoolExecutor(1) as pool:
+            blocking = pool.submit(scheduler.submit, 'first')
+            while not seen:
+                time.sleep(0.001)
+            # worker sibuk dengan 'first': 'late' menunggu di antrean lalu timeout
+            with self.assertRaises(TimeoutError):
+                scheduler.submit('late', timeout=0.05)
+            release.set()
+            self.assertEqual(blocking.result(5), 'first')
+        self.assertEqual(scheduler.submit('next', timeout=5), 'next')
+        self.assertEqual(seen, ['first', 'next'])
+        self.assertEqual(scheduler.stats()['dropped'], 1)
+
+    def test_batch_exception_reaches_every_caller(self):
+        def batch_fn(items):
+            raise RuntimeError('model rusak')
+
+        scheduler = BatchScheduler(batch_fn, max_batch_size=4, max_wait_ms=50)
+        with self.assertLogs('accounts.batching', 'ERROR'), ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(scheduler.submit, i, 5) for i in range(2)]
+            for future in futures:
+                with self.assertRaisesRegex(RuntimeError, 'model rusak'):
+                    future.result(5)
+
+    def test_exception_result_only_fails_its_item(self):
+        def batch_fn(items):
+            return [ValueError(f'frame {item} rusak') if item == 1 else item for item in items]
+
+        scheduler = BatchScheduler(batch_fn, max_batch_size=4, max_wait_ms=100)
+        with ThreadPoolExecutor(3) as pool:
+            futures = [pool.submit(scheduler.submit, i, 5) for i in range(3)]
+            self.assertEqual(futures[0].result(5), 0)
+            self.assertEqual(futures[2].result(5), 2)
+            with self.assertRaisesRegex(ValueError, 'frame 1 rusak'):
+                futures[1].result(5)
+
+
+class VADTests(SimpleTestCase):
+    CONFIG = {'enabled': True, 'threshold_db': 30.0, 'hangover': 0, 'min_fraction': 0.2}
+
+    def test_all_silence_keeps_every_frame(self):
+        # reference relatif terhadap klip: energi rata tidak punya frame "lebih hening"
+        self.assertTrue(speech_mask(np.full(50, -80.0)).all())
+        mfcc = np.zeros((40, 13), dtype=np.float32)
+        kept, fraction = apply_vad(mfcc, self.CONFIG)
+        self.assertEqual(len(kept), 40)
+        self.assertEqual(fraction, 1.0)
+
+    def test_reference_is_percentile_not_max(self):
+        # satu klik +40 dB tidak boleh menggeser reference: ucapan -10 dB tetap lolos
+        energy = np.concatenate([np.full(50, -10.0), np.full(50, -60.0), [40.0]])
+        mask = speech_mask(energy, threshold_db=30.0, hangover=0, min_fraction=0.0)
+        self.assertTrue(mask[:50].all())
+        self.assertFalse(mask[50:100].any())
+        self.assertTrue(mask[100])
+
+    def test_hangover_widens_speech(self):
+        energy = np.full(40, -60.0)
+        energy[18:22] = 0.0
+        mask = speech_mask(energy, threshold_db=30.0, hangover=2, min_fraction=0.0)
+        np.testing.assert_array_equal(np.flatnonzero(mask), np.arange(16, 24))
+
+    def test_min_fraction_adds_loudest_frames(self):
+        energy = np.array([-60.0, -50.0, 0.0, -70.0, -40.0, -65.0, -45.0, -80.0, -75.0, -55.0])
+        mask = speech_mask(energy, threshold_db=30.0, hangover=0, min_fraction=0.5)
+        self.assertEqual(mask.sum(), 5)
+        np.testing.assert_array_equal(np.flatnonzero(mask), [1, 2, 4, 6, 9])
+
+    def test_apply_vad_drops_quiet_frames_from_c0(self):
+        energy = np.array([0.0] * 6 + [-60.0] * 4)
+        mfcc = np.zeros((10, 13), dtype=np.float32)
+        mfcc[:, 0] = energy * np.sqrt(N_MELS)
+        mfcc[:, 1] = np.arange(10)
+        kept, fraction = apply_vad(mfcc, self.CONFIG)
+        np.testing.assert_array_equal(kept[:, 1], np.arange(6))
+        self.assertAlmostEqual(fraction, 0.6)
+
+    def test_disabled_returns_input(self):
+        mfcc = np.random.default_rng(5).standard_normal((10, 13))
+        kept, fraction = apply_vad(mfcc, dict(self.CONFIG, enabled=False))
+        self.assertIs(kept, mfcc)
+        self.assertEqual(fraction, 1.0)
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)  # 'a' jadi yang terbaru
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((cache.get('a'), cache.get('c')), (1, 3))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (3, 1, 1))
+
+    def test_ttl_expires_entries(self):
+        cache = LRUCache(maxsize=4, ttl=10)
+        with mock.patch('accounts.cache.time.monotonic', return_value=100.0):
+            cache.set('a', 1)
+        with mock.patch('accounts.cache.time.monotonic', return_value=109.0):
+            self.assertEqual(cache.get('a'), 1)
+        with mock.patch('accounts.cache.time.monotonic', return_value=110.0):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_get_or_load_does_not_cache_none(self):
+        cache = LRUCache()
+        loader = mock.Mock(side_effect=[None, 'x'])
+        self.assertIsNone(cache.get_or_load('k', loader))
+        self.assertEqual(cache.get_or_load('k', loader), 'x')
+        self.assertEqual(cache.get_or_load('k', loader), 'x')
+        self.assertEqual(loader.call_count, 2)
+
+    def test_invalidate_where(self):
+        cache = LRUCache()
+        for key in [(1, 'a'), (1, 'b'), (2, 'a')]:
+            cache.set(key, key)
+        cache.invalidate_where(lambda key: key[0] == 1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get((2, 'a')), (2, 'a'))
+
+
+class FaceCacheTests(SimpleTestCase):
+    def setUp(self):
+        face_cache.known_encodings.clear()
+        self.addCleanup(face_cache.known_encodings.clear)
+
+    def test_known_encoding_is_loaded_once_until_invalidated(self):
+        encoding = np.arange(128, dtype=np.float64)
+        with mock.patch('accounts.face_cache._load_encoding', return_value=encoding) as load:
+            np.testing.assert_array_equal(face_cache.get_known_encoding(7), encoding)
+            face_cache.get_known_encoding(7)
+            self.assertEqual(load.call_count, 1)
+            face_cache.invalidate_known_encoding(7)
+            face_cache.get_known_encoding(7)
+            self.assertEqual(load.call_count, 2)
+
+    def test_known_encoding_expires_after_ttl(self):
+        ttl = face_cache.known_encodings.ttl
+        with mock.patch('accounts.face_cache._load_encoding', return_value=np.zeros(128)) as load:
+            with mock.patch('accounts.cache.time.monotonic', return_value=1000.0):
+                face_cache.get_known_encoding(7)
+            with mock.patch('accounts.cache.time.monotonic', return_value=1000.0 + ttl):
+                face_cache.get_known_encoding(7)
+            self.assertEqual(load.call_count, 2)
+
+
+def built_face_index(rows):
+    """FaceIndex yang dibangun dari rows [(user_id, encoding float64)] tanpa database."""
+    index = FaceIndex()
+    db_rows = [(user_id, encoding.tobytes()) for user_id, encoding in rows]
+    with mock.patch.object(UserFace.objects, 'values_list', return_value=db_rows):
+        index.rebuild()
+    return index
+
+
+class FaceIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.encodings = {user_id: rng.standard_normal(128) * 0.1 for user_id in range(1, 41)}
+        self.queries = rng.standard_normal((5, 128)) * 0.1
+
+    def brute_force(self, encodings, k):
+        user_ids = np.array(list(encodings))
+        matrix = np.array(list(encodings.values()))
+        dist = np.linalg.norm(self.queries[:, None, :] - matrix[None, :, :], axis=2)
+        order = np.argsort(dist, axis=1)[:, :k]
+        return user_ids[order], np.take_along_axis(dist, order, axis=1)
+
+    def assert_matches_brute_force(self, index, encodings, k=3):
+        user_ids, distances = index.search(self.queries, k=k)
+        expected_ids, expected_dist = self.brute_force(encodings, k)
+        np.testing.assert_array_equal(user_ids, expected_ids)
+        np.testing.assert_allclose(distances, expected_dist, rtol=1e-4, atol=1e-5)
+
+    def test_search_matches_brute_force(self):
+        index = built_face_index(self.encodings.items())
+        self.assertEqual(len(index), 40)
+        self.assert_matches_brute_force(index, self.encodings)
+        self.assert_matches_brute_force(index, self.encodings, k=100)  # k > jumlah wajah
+
+    def test_upsert_and_swap_remove(self):
+        index = built_face_index(self.encodings.items())
+        encodings = dict(self.encodings)
+        for user_id in (1, 17, 40):  # baris pertama, tengah, terakhir
+            index.remove(user_id)
+            del encodings[user_id]
+        index.upsert(5, self.queries[0])  # ganti encoding yang ada
+        encodings[5] = self.queries[0]
+        index.upsert(99, self.queries[1])  # user baru
+        encodings[99] = self.queries[1]
+        self.assertEqual(len(index), len(encodings))
+        self.assert_matches_brute_force(index, encodings)
+        self.assertEqual(index.identify(self.queries[1], threshold=1e-3)[0], 99)
+
+    def test_find_duplicate_skips_own_user(self):
+        index = built_face_index([(1, self.encodings[1]), (2, self.encodings[1] + 1e-3), (3, self.encodings[3])])
+        self.assertEqual(index.find_duplicate(self.encodings[1], exclude_user_id=1, threshold=0.1)[0], 2)
+        self.assertIsNone(index.find_duplicate(self.encodings[3], exclude_user_id=3, threshold=0.1))
+
+    def test_signals_keep_index_and_cache_in_sync(self):
+        index = built_face_index([(1, self.encodings[1])])
+        face = UserFace(user_id=2, encoding=self.encodings[2].tobytes())
+        face_cache.known_encodings.set(2, 'basi')
+        self.addCleanup(face_cache.known_encodings.clear)
+        with mock.patch('accounts.signals.face_index', index):
+            post_save.send(sender=UserFace, instance=face, created=True)
+            self.assertIsNone(face_cache.known_encodings.get(2))
+            self.assertEqual(index.identify(self.encodings[2], threshold=1e-3)[0], 2)
+            post_delete.send(sender=UserFace, instance=face)
+        self.assertEqual(len(index), 1)
+        self.assertIsNone(index.identify(self.encodings[2], threshold=1e-3)[0])
+
+
+def image_bytes(size, fmt='JPEG', orientation=None):
+    """Gambar uji (lebar, tinggi): kuadran kiri atas merah, sisanya biru."""
+    width, height = size
+    array = np.zeros((height, width, 3), dtype=np.uint8)
+    array[..., 2] = 255
+    array[:height // 2, :width // 2] = (255, 0, 0)
+    buffer = io.BytesIO()
+    kwargs = {}
+    if orientation is not None:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        kwargs['exif'] = exif
+    Image.fromarray(array).save(buffer, format=fmt, quality=95, **kwargs)
+    return buffer.getvalue()
+
+
+class ImageDecodeTests(SimpleTestCase):
+    def test_small_image_is_decoded_as_is(self):
+        decoded = decode_image(image_bytes((80, 40)), max_side=1280)
+        self.assertEqual(decoded.array.shape, (40, 80, 3))
+        self.assertEqual(decoded.original_size, (80, 40))
+        self.assertEqual(decoded.scale, 1.0)
+
+    def test_exif_rotation_is_applied(self):
+        # orientasi 6: putar 90 derajat searah jarum jam, merah pindah ke kanan atas
+        decoded = decode_image(io.BytesIO(image_bytes((80, 40), orientation=6)), max_side=1280)
+        self.assertEqual(decoded.array.shape, (80, 40, 3))
+        self.assertEqual(decoded.original_size, (40, 80))
+        self.assertGreater(decoded.array[5, 35, 0], 200)
+        self.assertLess(decoded.array[5, 5, 0], 50)
+
+    def test_large_jpeg_uses_draft_and_max_side(self):
+        original_draft = JpegImagePlugin.JpegImageFile.draft
+        with mock.patch.object(JpegImagePlugin.JpegImageFile, 'draft', autospec=True,
+                               side_effect=original_draft) as draft:
+            decoded = decode_image(image_bytes((1600, 800)), max_side=400)
+        draft.assert_called_once()
+        self.assertEqual(draft.call_args[0][2], (400, 200))
+        self.assertEqual(decoded.size, (400, 200))
+        self.assertEqual(decoded.original_size, (1600, 800))
+        self.assertAlmostEqual(decoded.scale, 0.25)
+
+    def test_max_side_applies_to_non_jpeg(self):
+        decoded = decode_image(image_bytes((300, 150), fmt='PNG'), max_side=100)
+        self.assertEqual(decoded.size, (100, 50))
+
+    def test_corrupt_upload_raises(self):
+        with self.assertRaises(Exception):
+            decode_image(image_bytes((80, 40))[:200])
+
+
+class FaceCropTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media = tmp.name
+        self.root = os.path.join(self.media, 'detected_faces')
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_crop(self, username, when, age_days=0):
+        path = crop_path(username, when)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+        mtime = time.time() - age_days * 86400
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_crop_path_layout(self):
+        path = crop_path('budi', datetime(2024, 3, 5, 14, 7, 9))
+        rel = os.path.relpath(path, self.root).split(os.sep)
+        self.assertEqual(rel[:4], ['2024', '03', '05', 'budi'])
+        self.assertRegex(rel[4], r'^budi_140709_[0-9a-f]{8}\.jpg$')
+
+    def test_writer_saves_in_background(self):
+        writer = CropWriter(maxsize=4)
+        self.assertTrue(writer.submit('budi', Image.new('RGB', (8, 8))))
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(writer.stats()['written'], 1)
+        saved = [os.path.join(d, f) for d, _, files in os.walk(self.root) for f in files]
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(os.path.basename(os.path.dirname(saved[0])), 'budi')
+
+    def test_writer_drops_when_queue_is_full(self):
+        writer = CropWriter(maxsize=1)
+        with mock.patch.object(writer, '_ensure_worker'):  # tanpa worker, antrean tidak pernah kosong
+            self.assertTrue(writer.submit('budi', Image.new('RGB', (8, 8))))
+            self.assertFalse(writer.submit('budi', Image.new('RGB', (8, 8))))
+        self.assertEqual(writer.stats()['dropped'], 1)
+
+    def test_prune_by_age_and_count(self):
+        now = datetime.now()
+        old = self.make_crop('budi', now, age_days=40)
+        budi = [self.make_crop('budi', now, age_days=age) for age in (3, 2, 1)]
+        ani = self.make_crop('ani', now, age_days=1)
+        result = prune_detected_faces(max_age_days=30, max_per_user=2)
+        self.assertEqual(result, {'scanned': 5, 'deleted_age': 1, 'deleted_count': 1, 'kept': 3})
+        self.assertFalse(os.path.exists(old))
+        self.assertFalse(os.path.exists(budi[0]))  # budi: hanya dua terbaru yang disisakan
+        self.assertTrue(all(os.path.exists(p) for p in budi[1:] + [ani]))
+
+    def test_prune_dry_run_and_empty_folders(self):
+        path = self.make_crop('budi', datetime.now(), age_days=40)
+        self.assertEqual(prune_detected_faces(max_age_days=30, dry_run=True)['deleted_age'], 1)
+        self.assertTrue(os.path.exists(path))
+        prune_detected_faces(max_age_days=30)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_compact_legacy_crops(self):
+        os.makedirs(self.root)
+        legacy = os.path.join(self.root, 'budi_santoso_20240305_140709_ab12cd34.jpg')
+        open(legacy, 'wb').close()
+        open(os.path.join(self.root, 'bukan_crop.txt'), 'wb').close()
+        self.assertEqual(compact_legacy_crops(dry_run=True), 1)
+        self.assertTrue(os.path.exists(legacy))
+        self.assertEqual(compact_legacy_crops(), 1)
+        self.assertTrue(os.path.exists(os.path.join(
+            self.root, '2024', '03', '05', 'budi_santoso', 'budi_santoso_140709_ab12cd34.jpg')))
+        self.assertFalse(os.path.exists(legacy))
+
+
+class MarginCropTests(SimpleTestCase):
+    def setUp(self):
+        # setiap piksel menyimpan koordinatnya: (baris, kolom, 0)
+        rows, cols = np.mgrid[0:100, 0:120]
+        self.image = np.stack([rows, cols, np.zeros_like(rows)], axis=-1).astype(np.uint8)
+
+    def test_box_and_location_translation(self):
+        crop = margin_crop(self.image, (40, 30, 60, 50), size=40, margin=0.5)
+        # sisi 20 * (1 + 2*0.5) = 40 px: skala 1, kotak bergeser 10 px dari tepi crop
+        self.assertEqual(crop.array.shape, (40, 40, 3))
+        self.assertEqual(crop.location, (10, 30, 30, 10))
+        self.assertEqual(tuple(crop.array[10, 10, :2]), (30, 40))  # pojok kiri atas kotak
+        self.assertEqual(tuple(crop.array[0, 0, :2]), (20, 30))
+
+    def test_resize_scales_location(self):
+        crop = margin_crop(self.image, (40, 30, 60, 50), size=20, margin=0.5)
+        self.assertEqual(crop.array.shape, (20, 20, 3))
+        self.assertEqual(crop.location, (5, 15, 15, 5))
+
+    def test_edge_box_is_centered_with_black_padding(self):
+        crop = margin_crop(self.image, (0, 0, 20, 20), size=40, margin=0.5)
+        self.assertEqual(crop.location, (10, 30, 30, 10))
+        self.assertEqual(crop.array[:10, :10].max(), 0)  # di luar gambar
+        self.assertEqual(tuple(crop.array[10, 10, :2]), (0, 0))
+
+    def test_degenerate_boxes(self):
+        self.assertIsNone(margin_crop(self.image, (10, 10, 10.2, 10.2), margin=0.0))
+        self.assertIsNone(margin_crop(self.image, (500, 500, 540, 540), margin=0.0))
+
+    def test_crop_is_cached_on_decoded_image(self):
+        decoded = decode_image(image_bytes((120, 100), fmt='PNG'))
+        first = get_margin_crop(decoded, (40, 30, 60, 50))
+        self.assertIs(get_margin_crop(decoded, (40.4, 30.2, 60.1, 50.3)), first)
+
+
+def wav_bytes(y, sr, fmt='WAV'):
+    buffer = io.BytesIO()
+    sf.write(buffer, y, sr, format=fmt)
+    return buffer.getvalue()
+
+
+class AudioDecodeTests(SimpleTestCase):
+    def test_soundfile_wav_from_bytes_file_and_path(self):
+        y = np.sin(np.linspace(0, 100, 16000)).astype(np.float32) * 0.5
+        data = wav_bytes(y, 16000)
+        np.testing.assert_allclose(decode_audio(data), y, atol=1e-4)
+        np.testing.assert_allclose(decode_audio(io.BytesIO(data)), y, atol=1e-4)
+        with tempfile.NamedTemporaryFile(suffix='.wav') as fh:
+            fh.write(data)
+            fh.flush()
+            np.testing.assert_allclose(decode_audio(fh.name), y, atol=1e-4)
+
+    def test_stereo_is_mixed_down_and_resampled(self):
+        left = np.full(8000, 0.5, dtype=np.float32)
+        stereo = np.stack([left, -left * 0.2], axis=1)
+        y = decode_audio(wav_bytes(stereo, 8000))
+        self.assertEqual(len(y), 16000)
+        self.assertEqual(y.dtype, np.float32)
+        self.assertAlmostEqual(float(np.median(y)), 0.2, places=2)
+
+    def test_unknown_format_is_piped_to_ffmpeg(self):
+        pcm = np.array([0.1, -0.2, 0.3], dtype='<f4')
+        done = subprocess.CompletedProcess([], 0, stdout=pcm.tobytes(), stderr=b'')
+        with mock.patch('accounts.audio_decode.subprocess.run', return_value=done) as run:
+            y = decode_audio(b'webm-bukan-wav')
+        np.testing.assert_array_equal(y, pcm)
+        cmd = run.call_args[0][0]
+        self.assertIn('pipe:0', cmd)
+        self.assertEqual(cmd[cmd.index('-ar') + 1], '16000')
+        self.assertEqual(run.call_args[1]['input'], b'webm-bukan-wav')
+
+    def test_ffmpeg_reads_path_directly(self):
+        done = subprocess.CompletedProcess([], 0, stdout=np.zeros(4, '<f4').tobytes(), stderr=b'')
+        with tempfile.NamedTemporaryFile(suffix='.webm') as fh:
+            fh.write(b'webm-bukan-wav')
+            fh.flush()
+            with mock.patch('accounts.audio_decode.subprocess.run', return_value=done) as run:
+                decode_audio(fh.name)
+        cmd = run.call_args[0][0]
+        self.assertEqual(cmd[cmd.index('-i') + 1], fh.name)
+        self.assertIsNone(run.call_args[1]['input'])
+
+    def test_ffmpeg_failures_raise_audio_decode_error(self):
+        failed = subprocess.CompletedProcess([], 1, stdout=b'', stderr=b'Invalid data found')
+        empty = subprocess.CompletedProcess([], 0, stdout=b'', stderr=b'')
+        cases = [
+            {'return_value': failed},
+            {'return_value': empty},
+            {'side_effect': FileNotFoundError('ffmpeg')},
+            {'side_effect': subprocess.TimeoutExpired('ffmpeg', 30)},
+        ]
+        for kwargs in cases:
+            with self.subTest(**{k: repr(v) for k, v in kwargs.items()}):
+                with mock.patch('accounts.audio_decode.subprocess.run', **kwargs):
+                    with self.assertRaises(AudioDecodeError):
+                        decode_audio(b'webm-bukan-wav')
+
+
+class FeatureStoreTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        override = override_settings(VOICE_FEATURE_CACHE_DIR=self.root, VOICE_VAD=False)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.mfcc = np.arange(26, dtype=np.float32).reshape(2, 13)
+
+    def test_cache_key_is_content_hash_for_any_source(self):
+        data = b'audio-a'
+        with mock.patch('accounts.feature_store.extract_mfcc', return_value=self.mfcc) as extract:
+            get_features(data)
+            with tempfile.NamedTemporaryFile() as fh:
+                fh.write(data)
+                fh.flush()
+                np.testing.assert_array_equal(get_features(fh.name), self.mfcc)
+            get_features(io.BytesIO(data))
+            self.assertEqual(extract.call_count, 1)
+            get_features(b'audio-b')
+            self.assertEqual(extract.call_count, 2)
+        digest = content_hash(data)
+        self.assertEqual(digest, hashlib.sha256(data).hexdigest())
+        self.assertTrue(os.path.exists(os.path.join(self.root, config_key(), digest[:2], f'{digest}.npy')))
+
+    def test_config_change_uses_new_key(self):
+        key = config_key()
+        with override_settings(VOICE_VAD=True):
+            self.assertNotEqual(config_key(), key)
+        with override_settings(VOICE_VAD_THRESHOLD_DB=20.0):
+            self.assertNotEqual(config_key(), key)
+        self.assertEqual(config_key(), key)
+
+    def test_corrupt_file_is_re_extracted(self):
+        with mock.patch('accounts.feature_store.extract_mfcc', return_value=self.mfcc) as extract:
+            get_features(b'audio-a')
+            files = [os.path.join(d, f) for d, _, names in os.walk(self.root) for f in names]
+            with open(files[0], 'wb') as fh:
+                fh.write(b'rusak')
+            with self.assertLogs('accounts.feature_store', 'WARNING'):
+                np.testing.assert_array_equal(get_features(b'audio-a'), self.mfcc)
+            self.assertEqual(extract.call_count, 2)
+
+    def test_failed_utime_is_still_a_hit(self):
+        with mock.patch('accounts.feature_store.extract_mfcc', return_value=self.mfcc) as extract:
+            get_features(b'audio-a')
+            with mock.patch('accounts.feature_store.os.utime', side_effect=PermissionError):
+                np.testing.assert_array_equal(get_features(b'audio-a'), self.mfcc)
+            self.assertEqual(extract.call_count, 1)
+
+    def test_batch_extracts_only_misses(self):
+        with mock.patch('accounts.feature_store.extract_mfcc', return_value=self.mfcc):
+            get_features(b'audio-a')
+        with mock.patch('accounts.feature_store.extract_mfcc_batch',
+                        side_effect=lambda items: [self.mfcc + 1 if d else None for d in items]) as batch:
+            results = get_features_batch([b'audio-a', b'audio-b', b''])
+        self.assertEqual(batch.call_args[0][0], [b'audio-b', b''])
+        np.testing.assert_array_equal(results[0], self.mfcc)
+        np.testing.assert_array_equal(results[1], self.mfcc + 1)
+        self.assertIsNone(results[2])
+
+    def test_prune_cache_removes_old_configs_and_stale_files(self):
+        with mock.patch('accounts.feature_store.extract_mfcc', return_value=self.mfcc):
+            get_features(b'lama')
+            get_features(b'baru')
+        old_dir = os.path.join(self.root, 'konfiglama')
+        os.makedirs(old_dir)
+        stale = feature_path('5' * 64)
+        os.makedirs(os.path.dirname(stale))
+        np.save(stale, self.mfcc)
+        os.utime(stale, (time.time() - 40 * 86400,) * 2)
+
+        self.assertEqual(prune_cache(max_age_days=30, dry_run=True), {'old_configs': 1, 'stale_files': 1})
+        self.assertTrue(os.path.exists(old_dir))
+        self.assertEqual(prune_cache(max_age_days=30), {'old_configs': 1, 'stale_files': 1})
+        self.assertFalse(os.path.exists(old_dir))
+        self.assertFalse(os.path.exists(stale))
+        self.assertEqual(sum(len(f) for _, _, f in os.walk(self.root)), 2)
+
+
+N_FFT_FRAMES_TAIL = 4  # 2048 / 512: frame yang butuh padding di ujung sinyal
+
+
+def random_chunks(rng, y, max_size=4096):
+    start = 0
+    while start < len(y):
+        size = int(rng.integers(1, max_size))
+        yield y[start:start + size]
+        start += size
+
+
+class StreamingFeatureTests(SimpleTestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(8)
+        t = np.arange(3 * 16000) / 16000
+        # suara sintetis tanpa jeda: trim/VAD tidak membuang frame di kedua jalur
+        self.y = (0.3 * np.sin(2 * np.pi * 220 * t) + 0.05 * self.rng.standard_normal(len(t))).astype(np.float32)
+        self.y[100] = 0.9  # puncak di potongan pertama: normalisasi stream sama sejak awal
+
+    def test_resampler_matches_offline_resample(self):
+        for orig_sr in (8000, 44100, 48000):
+            with self.subTest(orig_sr=orig_sr):
+                y = self.rng.standard_normal(orig_sr).astype(np.float32)
+                resampler = StreamingResampler(orig_sr)
+                parts = [resampler.push(chunk) for chunk in random_chunks(self.rng, y)]
+                streamed = np.concatenate(parts + [resampler.flush()])
+                expected = resample_poly(y, resampler.up, resampler.down)
+                self.assertEqual(len(streamed), len(expected))
+                np.testing.assert_allclose(streamed, expected, rtol=1e-5, atol=1e-5)
+
+    def test_streaming_mfcc_matches_extract_mfcc(self):
+        offline = extract_mfcc(wav_bytes(self.y, 16000, fmt='WAV'), vad=False)
+        stream = StreamingMFCC(lookahead=4)
+        parts = []
+        for chunk in random_chunks(self.rng, self.y):
+            stream.push(chunk)
+            parts.append(stream.pop_ready())
+        parts.append(stream.pop_ready(final=True))
+        streamed = np.concatenate(parts)
+
+        # stream tidak menambah padding di ujung, jadi beberapa frame terakhir tidak ada
+        self.assertGreaterEqual(len(streamed), len(offline) - N_FFT_FRAMES_TAIL)
+        self.assertEqual(stream.kept_fraction, 1.0)
+        np.testing.assert_allclose(streamed, offline[:len(streamed)], rtol=1e-4, atol=2e-2)
+
+    def test_embedding_mode_scores_whole_stream_without_early_decision(self):
+        offline = extract_mfcc(wav_bytes(self.y, 16000), vad=False)
+        scaler = DiagScaler(offline.mean(axis=0), offline.std(axis=0))
+        ubm = random_gmm(self.rng, 8)
+        enrolled = compute_embedding(offline, scaler, ubm)
+        verifier = StreamingEmbeddingVerifier(enrolled, scaler, ubm, threshold=0.9, min_frames=1, max_seconds=60)
+        for chunk in random_chunks(self.rng, self.y):
+            self.assertIsNone(verifier.push(chunk))
+        decision = verifier.finish()
+        self.assertTrue(decision['verified'])
+        self.assertFalse(decision['early'])
+        self.assertGreater(decision['score'], 0.9)
+        self.assertIsNone(decision['llr'])
@@ -0,0 +1,103 @@
+# accounts/ubm.py
+import logging
+import os
+import threading
+import time
+
+import joblib
+from django.conf import settings
+
+from . import gmm as gmm_format
+
+logger = logging.getLogger(__name__)
+
+
+class UBMHolder:
+    """
+    UBM global (dict {'scaler', 'ubm'} dari settings.VOICE_UBM) yang dimuat
+    sekali per proses. Jika mtime file sumber berubah, UBM dimuat ulang
+    otomatis. Pickle UBM hanya beberapa KB dan scoring memakai salinan
+    DiagScaler/DiagGMM sendiri, jadi tidak ada gunanya berbagi lewat mmap.
+    """
+
+    def __init__(self, path, check_interval=5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._data = None
+        self._mtime_ns = None
+        self._checked_at = 0.0
+        self.loads = 0
+        self.last_load_seconds = None
+        self.total_load_seconds = 0.0
+        self.loaded_at = None
+        self._compact = None  # (mtime_ns, (DiagScaler, DiagGMM))
+
+    def _source_mtime(self):
+        return os.stat(self.path).st_mtime_ns
+
+    def _load(self, mtime_ns):
+        start = time.perf_counter()
+        data = joblib.load(self.path)
+        elapsed = time.perf_counter() - start
+
+        self._data = data
+        self._mtime_ns = mtime_ns
+        self.loads += 1
+        self.last_load_seconds = elapsed
+        self.total_load_seconds += elapsed
+        self.loaded_at = time.time()
+        logger.info("UBM %s dimuat dalam %.3f s", self.path, elapsed)
+
+    def get(self):
+        now = time.monotonic()
+        if self._data is not None and now - self._checked_at < self.check_interval:
+            return self._data
+
+        with self._lock:
+            if self._data is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._data
+            mtime_ns = self._source_mtime()
+            if self._data is None or mtime_ns != self._mtime_ns:
+                self._load(mtime_ns)
+            self._checked_at = time.monotonic()
+            return self._data
+
+    def compact(self):
+        """UBM dalam bentuk accounts.gmm (DiagScaler, DiagGMM) untuk scoring cepat."""
+        data = self.get()
+        cached = self._compact
+        if cached is not None and cached[0] == self._mtime_ns:
+            return cached[1]
+        model = (
+            gmm_format.DiagScaler.from_sklearn(data['scaler']),
+            gmm_format.DiagGMM.from_sklearn(data['ubm']),
+        )
+        self._compact = (self._mtime_ns, model)
+        return model
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'mtime_ns': self._mtime_ns,
+            'loads': self.loads,
+            'last_load_seconds': self.last_load_seconds,
+            'total_load_seconds': self.total_load_seconds,
+            'loaded_at': self.loaded_at,
+        }
+
+
+ubm_holder = UBMHolder(
+    settings.VOICE_UBM,
+    check_interval=getattr(settings, 'VOICE_UBM_CHECK_INTERVAL', 5.0),
+)
+
+
+def get_ubm():
+    """Dict {'scaler': StandardScaler, 'ubm': GaussianMixture} bersama per proses."""
+    return ubm_holder.get()
+
+
+def get_compact_ubm():
+    """(DiagScaler, DiagGMM) dari UBM bersama; dipakai untuk scoring LLR."""
+    return ubm_holder.compact()
@@ -46,6 +46,7 @@ urlpatterns = [
     path('nilai/<int:ujian_id>/detail/', views.nilai_detail, name='nilai_detail'),
 
     path('student/<int:student_id>/voice-upload/', views.voice_upload, name='voice_upload'),
+    path('voice-job/<int:job_id>/', views.voice_job_status, name='voice_job_status'),
     path('voice-verification/', views.voice_verification, name='voice_verification'),
     path('delete_voice_samples/<int:student_id>/', views.delete_voice_samples, name='delete_voice_samples'),
     path('enroll-face/<int:pk>/', views.enroll_face, name='enroll_face'),
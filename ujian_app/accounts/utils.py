@@ -1,26 +1,27 @@
+import logging
+
 import numpy as np
 import librosa
 import os
-from pydub import AudioSegment
-from ultralytics import YOLO
 import os
 from django.core.files.base import ContentFile
 from django.conf import settings
 from PIL import Image, ImageEnhance
 import numpy as np
 
-def preprocess_audio(file_path, target_sr=16000, pre_emphasis_coef=0.97, trim_silence=True):
-    # Load audio asli tanpa resample dulu
-    y, sr = librosa.load(file_path, sr=None)
+from .audio_decode import decode_audio
+from .face_encoding import encode_face
+from .image_decode import decode_image
+from .inference import detect_faces
+from .mfcc import MFCCExtractor, default_extractor
+from .vad import apply_vad, apply_vad_batch
 
-    # Resample jika perlu
-    if sr != target_sr:
-        y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
-        sr = target_sr
+logger = logging.getLogger(__name__)
 
-    # Stereo ke mono
-    if y.ndim > 1:
-        y = np.mean(y, axis=1)
+def preprocess_audio(source, target_sr=16000, pre_emphasis_coef=0.97, trim_silence=True):
+    # Decode langsung ke mono target_sr di memori (UploadedFile, bytes, atau path)
+    y = decode_audio(source, target_sr=target_sr)
+    sr = target_sr
 
     # Normalisasi amplitudo ke [-1, 1]
     y = y / (np.max(np.abs(y)) + 1e-9)
@@ -34,54 +35,86 @@ def preprocess_audio(file_path, target_sr=16000, pre_emphasis_coef=0.97, trim_si
 
     return y, sr
 
-def extract_mfcc(file_path, n_mfcc=13):
-    try:
-        # Konversi file (jika perlu) ke wav
-        temp_wav = file_path + ".wav_conv"
-        AudioSegment.from_file(file_path).export(temp_wav, format="wav")
-
-        # Preprocessing audio
-        y, sr = preprocess_audio(temp_wav, target_sr=16000, pre_emphasis_coef=0.97, trim_silence=True)
+def _extractor(n_mfcc):
+    extractor = default_extractor()
+    return extractor if extractor.n_mfcc == n_mfcc else MFCCExtractor(n_mfcc=n_mfcc)
 
-        # Ekstraksi MFCC
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
-
-        os.remove(temp_wav)
-        return mfcc.T  # transpose supaya frame x fitur
+def extract_mfcc(source, n_mfcc=13, vad=True):
+    try:
+        # Preprocessing audio (tanpa file sementara)
+        y, sr = preprocess_audio(source, target_sr=16000, pre_emphasis_coef=0.97, trim_silence=True)
+
+        # Ekstraksi MFCC (frame x fitur)
+        mfcc = _extractor(n_mfcc).extract(y)
+        if not vad:
+            return mfcc
+
+        # Buang jeda di tengah ucapan (accounts.vad)
+        mfcc, kept = apply_vad(mfcc)
+        logger.debug("VAD: %d frame dipertahankan (%.0f%%)", len(mfcc), kept * 100)
+        return mfcc
     except Exception as e:
         print(f"[ERROR] extract_mfcc failed: {e}")
-        if os.path.exists(temp_wav):
-            os.remove(temp_wav)
         return None
 
-# Asumsikan yolo_model sudah ter‐inisialisasi (misalnya di settings atau di atas file ini)
-yolo_model = YOLO(settings.YOLO_FACE_MODEL)
-
-def preprocess_face_image(uploaded_image_file):
-    # 1. Buka dan verifikasi
-    img = Image.open(uploaded_image_file)
-    img.verify()
-    uploaded_image_file.seek(0)
-    img = Image.open(uploaded_image_file).convert('RGB')
-    img_array = np.array(img)
-
-    # 2. Deteksi wajah dengan YOLO
-    results = yolo_model(img_array)[0]
-    boxes = results.boxes.xyxy.cpu().numpy()
+def extract_mfcc_batch(sources, n_mfcc=13, vad=True):
+    """
+    MFCC banyak audio sekaligus: decode + preprocessing per file, lalu STFT,
+    mel, dan DCT dalam satu batch, lalu VAD per klip jika vad=True.
+    Elemen None untuk file yang gagal.
+    """
+    clips, index = [], []
+    for i, source in enumerate(sources):
+        try:
+            y, _ = preprocess_audio(source, target_sr=16000, pre_emphasis_coef=0.97, trim_silence=True)
+        except Exception as e:
+            print(f"[ERROR] extract_mfcc_batch failed for item {i}: {e}")
+            continue
+        clips.append(y)
+        index.append(i)
+
+    mfccs = _extractor(n_mfcc).extract_batch(clips)
+    if vad and mfccs:
+        mfccs, kept = apply_vad_batch(mfccs)
+        logger.debug("VAD batch: rata-rata %.0f%% frame dipertahankan (%d file)", np.mean(kept) * 100, len(mfccs))
+
+    results = [None] * len(sources)
+    for i, mfcc in zip(index, mfccs):
+        results[i] = mfcc
+    return results
+
+
+def detect_face(uploaded_image_file):
+    """Decode upload + deteksi YOLO. Mengembalikan (DecodedImage, kotak wajah pertama)."""
+    # 1. Decode sekali dari buffer upload (file rusak -> exception dari PIL)
+    decoded = decode_image(uploaded_image_file)
+
+    # 2. Deteksi wajah dengan YOLO (daemon inferensi / lokal)
+    boxes = detect_faces(decoded.array).boxes
     if len(boxes) == 0:
         raise ValueError("Wajah tidak terdeteksi oleh YOLO.")
+    return decoded, boxes[0]
+
+
+def preprocess_face_image(uploaded_image_file):
+    decoded, box = detect_face(uploaded_image_file)
 
     # 3. Ambil bounding‐box pertama, potong (crop)
-    x1, y1, x2, y2 = boxes[0][:4].astype(int)
-    top = max(0, y1)
-    right = min(img_array.shape[1], x2)
-    bottom = min(img_array.shape[0], y2)
-    left = max(0, x1)
-    face_crop = img.crop((left, top, right, bottom))  # PIL menggunakan (left, top, right, bottom)
+    face_crop = decoded.crop(box)
 
     return face_crop  
 
 
+def extract_face(uploaded_image_file):
+    """
+    Deteksi + encoding untuk enroll/tes wajah. Mengembalikan (crop PIL, encoding);
+    encoding None jika face_recognition gagal. Encoding dihitung dari crop
+    (margin_crop) yang sama dengan verify_face.
+    """
+    decoded, box = detect_face(uploaded_image_file)
+    return decoded.crop(box), encode_face(decoded, box)
+
+
 def augment_face_images(face_img: Image.Image):
     augmented_list = []
 
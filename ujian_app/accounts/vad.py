@@ -0,0 +1,83 @@
+# accounts/vad.py
+"""
+Voice activity detection berbasis energi per frame MFCC. trim_silence di
+preprocess_audio hanya membuang hening di awal/akhir; jeda di tengah
+kalimat tetap menjadi frame yang dinilai terhadap GMM user dan UBM.
+
+Energi frame diambil dari c0: dengan DCT-II ortho, c0 = jumlah log-mel
+(dB) / sqrt(n_mels), jadi c0 / sqrt(n_mels) adalah rata-rata log-mel dB
+frame itu. Frame dipertahankan jika energinya di atas persentil 95 klip
+dikurangi VOICE_VAD_THRESHOLD_DB, lalu diperlebar VOICE_VAD_HANGOVER frame
+ke kiri/kanan agar awal/akhir suku kata tidak terpotong. Jika yang
+tersisa kurang dari VOICE_VAD_MIN_FRACTION, frame berenergi tertinggi
+ditambahkan sampai batas itu tercapai.
+
+VAD mengubah fitur, sehingga nonaktif secara default (VOICE_VAD): model
+dan threshold yang dilatih tanpa VAD harus dilatih ulang dan di-tuning
+ulang saat VAD diaktifkan.
+"""
+import numpy as np
+from django.conf import settings
+
+N_MELS = 128
+REFERENCE_PERCENTILE = 95  # lebih tahan terhadap klik/letupan daripada maksimum
+
+
+def vad_config():
+    """Parameter VAD dari settings (ikut menentukan kunci cache fitur)."""
+    return {
+        'enabled': getattr(settings, 'VOICE_VAD', False),
+        'threshold_db': float(getattr(settings, 'VOICE_VAD_THRESHOLD_DB', 30.0)),
+        'hangover': int(getattr(settings, 'VOICE_VAD_HANGOVER', 3)),
+        'min_fraction': float(getattr(settings, 'VOICE_VAD_MIN_FRACTION', 0.2)),
+    }
+
+
+def frame_energy_db(mfcc, n_mels=N_MELS):
+    """Rata-rata log-mel (dB) per frame dari koefisien c0."""
+    return np.asarray(mfcc)[:, 0] / np.sqrt(n_mels)
+
+
+def speech_mask(energy_db, threshold_db=30.0, hangover=3, min_fraction=0.2):
+    """Mask boolean frame ucapan untuk satu klip."""
+    energy_db = np.asarray(energy_db, dtype=np.float64)
+    n = len(energy_db)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+
+    mask = energy_db > np.percentile(energy_db, REFERENCE_PERCENTILE) - threshold_db
+    if hangover > 0:
+        mask = np.convolve(mask, np.ones(2 * hangover + 1), mode='same') > 0
+
+    min_frames = min(n, int(np.ceil(min_fraction * n)))
+    if mask.sum() < min_frames:
+        loudest = np.argpartition(-energy_db, min_frames - 1)[:min_frames]
+        mask[loudest] = True
+    return mask
+
+
+def apply_vad(mfcc, config=None):
+    """
+    Buang frame non-ucapan. Mengembalikan (mfcc frame ucapan, fraksi frame
+    yang dipertahankan). Jika VAD dimatikan, mfcc dikembalikan utuh.
+    """
+    config = config or vad_config()
+    if not config['enabled'] or len(mfcc) == 0:
+        return mfcc, 1.0
+    mask = speech_mask(frame_energy_db(mfcc), config['threshold_db'], config['hangover'], config['min_fraction'])
+    return mfcc[mask], float(mask.mean())
+
+
+def apply_vad_batch(mfccs, config=None):
+    """apply_vad untuk list MFCC (elemen None dilewati); kembalikan (list mfcc, list fraksi)."""
+    config = config or vad_config()
+    features, fractions = [], []
+    for mfcc in mfccs:
+        if mfcc is None:
+            features.append(None)
+            fractions.append(None)
+            continue
+        kept, fraction = apply_vad(mfcc, config)
+        features.append(kept)
+        fractions.append(fraction)
+    return features, fractions
@@ -4,8 +4,6 @@ from django.urls import reverse
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.contrib.auth import update_session_auth_hash
-import face_recognition
-from ultralytics import YOLO
 from django.conf import settings
 from PIL import Image
 from django.views.decorators.csrf import csrf_exempt
@@ -13,9 +11,22 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 
-from .utils import augment_face_images, extract_mfcc, preprocess_face_image
+from .face_cache import get_known_encoding
+from .face_crops import save_detected_face, should_save_crop
+from .face_encoding import encode_face
+from .face_index import face_index
+from .feature_store import get_features
+from .gmm import llr_score
+from .image_decode import decode_image
+from .inference import detect_faces, face_distance
+from .utils import augment_face_images, extract_face, extract_mfcc
 from .forms import FaceTestImageForm, GuruProfileForm, GuruRegistrationForm, SiswaCreationForm, SiswaForm, KelasForm, SiswaProfileForm,UjianForm, SoalForm, UserEditForm, VoiceUploadForm
-from .models import FaceTestImage, JawabanSiswa, ProctoringLog, Siswa, Kelas, LogMasukStudent, User, Ujian, Soal, HasilUjian, UserFace, VoiceData, VoiceSample
+from .ubm import get_compact_ubm
+from .voice_cache import get_speaker_model, get_voice_data
+from .voice_enrollment import enqueue_voice_enrollment
+from .voice_embedding import embedding_threshold, scoring_mode, verify_embedding
+from .voice_evaluation import evaluate_voice_samples
+from .models import FaceTestImage, JawabanSiswa, ProctoringLog, Siswa, Kelas, LogMasukStudent, User, Ujian, Soal, HasilUjian, UserFace, VoiceData, VoiceEnrollmentJob, VoiceSample
 
 from pydub import AudioSegment
 import os
@@ -31,8 +42,6 @@ from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.shortcuts import get_object_or_404
 
-yolo_model = YOLO(settings.YOLO_FACE_MODEL)
-ubm_voice = settings.VOICE_UBM
 
 
 
@@ -456,45 +465,38 @@ def nilai_detail(request, ujian_id):
     })
 
 def verify_face_proctoring(user, image_file):
+    """
+    True jika frame berisi wajah user. Frame yang tidak bisa didecode
+    dianggap tidak terverifikasi; kegagalan inferensi (daemon error, batch
+    timeout saat overload) dilempar ke pemanggil, bukan dicatat sebagai
+    wajah tidak cocok.
+    """
     try:
-        # Buka gambar dan konversi ke format yang kompatibel
-        img = Image.open(image_file).convert("RGB")
-        
-        # Prediksi dengan model YOLO
-        results = yolo_model.predict(source=img)
-        
-        # Iterasi hasil prediksi
-        for result in results:
-            boxes = result.boxes
-            
-            # Skip jika tidak ada deteksi
-            if len(boxes) == 0:
-                continue  # Tidak ada wajah terdeteksi
-            
-            # Ambil data deteksi
-            class_indices = boxes.cls.cpu().numpy()  # Konversi ke numpy array
-            confidences = boxes.conf.cpu().numpy()
-            
-            # Iterasi setiap deteksi
-            for i in range(len(boxes)):
-                class_idx = int(class_indices[i])
-                confidence = confidences[i]
-                detected_name = yolo_model.names[class_idx].lower()
-                
-                # Kecocokan username dan threshold
-                if detected_name == user.username.lower() and confidence > 0.85:
-                    return True
-                
-            # Deteksi multi-wajah
-            if len(boxes) > 1:
-                print(f"Multiple faces detected for {user.username}")
-                return False
-        
-        return False  # Tidak ada deteksi yang valid
-
+        # Decode langsung dari buffer upload (resolusi dikurangi, orientasi EXIF)
+        decoded = decode_image(image_file)
     except Exception as e:
-        print(f"[ERROR] Proctoring verification failed: {str(e)}")
+        print(f"[ERROR] Proctoring frame tidak bisa didecode: {str(e)}")
         return False
+
+    # Prediksi dengan model YOLO (daemon inferensi / lokal), digabung
+    # dalam satu batch dengan frame siswa lain yang datang bersamaan
+    detections = detect_faces(decoded.array, batched=True)
+
+    # Skip jika tidak ada deteksi
+    if len(detections) == 0:
+        return False  # Tidak ada wajah terdeteksi
+
+    # Iterasi setiap deteksi
+    for detected_name, confidence in zip(detections.labels, detections.confidences):
+        # Kecocokan username dan threshold
+        if detected_name.lower() == user.username.lower() and confidence > 0.85:
+            return True
+
+    # Deteksi multi-wajah
+    if len(detections) > 1:
+        print(f"Multiple faces detected for {user.username}")
+
+    return False  # Tidak ada deteksi yang valid
     
 @login_required
 @csrf_exempt
@@ -504,9 +506,13 @@ def proctoring_check(request):
         if not image:
             return JsonResponse({'error': 'No image provided'}, status=400)
         
-        # Verifikasi wajah
-        verified = verify_face_proctoring(request.user, image)
-        
+        # Verifikasi wajah; server sibuk/gagal bukan berarti wajah tidak cocok
+        try:
+            verified = verify_face_proctoring(request.user, image)
+        except Exception as e:
+            print(f"[ERROR] Proctoring verification failed: {str(e)}")
+            return JsonResponse({'error': 'Verifikasi wajah sedang tidak tersedia, coba lagi'}, status=503)
+
         return JsonResponse({'verified': verified})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
@@ -548,15 +554,10 @@ def voice_upload(request, student_id):
         if not files:
             form.add_error('audio', 'Upload minimal satu file audio')
         else:
-            # Load UBM global scaler dan model
-            ubm_data = joblib.load(ubm_voice)
-            ubm_scaler = ubm_data['scaler']
-            ubm_gmm = ubm_data['ubm']
-
-            all_mfcc = []
             user_train_dir = os.path.join(settings.MEDIA_ROOT, 'voice_train', str(user.id))
             os.makedirs(user_train_dir, exist_ok=True)
 
+            samples = []
             for f in files:
                 filename = f"{uuid.uuid4()}_{f.name}"
                 save_path = os.path.join(user_train_dir, filename)
@@ -564,100 +565,64 @@ def voice_upload(request, student_id):
                     for chunk in f.chunks():
                         fh.write(chunk)
 
-                VoiceSample.objects.create(user=user, audio_file=os.path.join('voice_train', str(user.id), filename))
-
-                feats = extract_mfcc(save_path)
-                if feats is not None:
-                    all_mfcc.append(feats)
-
-            if not all_mfcc:
-                form.add_error('audio', 'Ekstraksi fitur gagal untuk semua file')
-            else:
-                data = np.vstack(all_mfcc)
-                # Gunakan scaler UBM untuk standarisasi fitur
-                scaled = ubm_scaler.transform(data)
-
-                # Latih GMM model user
-                gmm_user = GaussianMixture(n_components=8, covariance_type='diag', n_init=3, random_state=42)
-                gmm_user.fit(scaled)
-
-                # Hitung log-likelihood ratio user dan UBM pada data pelatihan
-                ll_user = gmm_user.score(scaled)
-                ll_ubm = ubm_gmm.score(scaled)
-                llr = ll_user - ll_ubm
-
-                mean_llr = np.mean(llr)
-                std_llr = np.std(llr)
-                threshold = float(mean_llr - 0.5 * std_llr)
-
-                vd, _ = VoiceData.objects.get_or_create(user=user)
-                buf_s, buf_g = io.BytesIO(), io.BytesIO()
-                joblib.dump(ubm_scaler, buf_s)    # Simpan scaler UBM ke user model (bisa dipakai saat verifikasi)
-                joblib.dump(gmm_user, buf_g)      # Simpan model user
-                vd.scaler_model = buf_s.getvalue()
-                vd.gmm_model = buf_g.getvalue()
-                vd.threshold = threshold
-                vd.is_trained = True
-                vd.save()
-
-                # Simpan juga model dan scaler ke file agar bisa diakses untuk evaluasi / backup
-                user_model_dir = os.path.join(settings.MEDIA_ROOT, 'voice_models', str(user.id))
-                os.makedirs(user_model_dir, exist_ok=True)
+                samples.append(VoiceSample.objects.create(user=user, audio_file=os.path.join('voice_train', str(user.id), filename)))
 
-                scaler_file_path = os.path.join(user_model_dir, 'scaler.joblib')
-                gmm_file_path = os.path.join(user_model_dir, 'gmm.joblib')
-
-                with open(scaler_file_path, 'wb') as f_s:
-                    f_s.write(buf_s.getvalue())
-
-                with open(gmm_file_path, 'wb') as f_g:
-                    f_g.write(buf_g.getvalue())
-
-                print(f"[DEBUG] mean_llr={mean_llr}, std_llr={std_llr}, threshold={threshold}")
-                print(f"[DEBUG] Model dan scaler juga disimpan di: {user_model_dir}")
-
-                return redirect('student_list')
+            # Ekstraksi fitur + pelatihan GMM dijalankan worker run_voice_jobs
+            job = enqueue_voice_enrollment(user, samples, created_by=request.user)
+            return redirect('voice_job_status', job_id=job.id)
 
     return render(request, 'students/upload_voice.html', {'form': form, 'student': student})
 
+@login_required
+@user_passes_test(is_guru_or_admin)
+def voice_job_status(request, job_id):
+    job = get_object_or_404(VoiceEnrollmentJob.objects.select_related('user'), pk=job_id)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'id': job.id,
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'progress': job.progress,
+            'processed_files': job.processed_files,
+            'total_files': job.total_files,
+            'message': job.message,
+            'finished': job.status in (VoiceEnrollmentJob.STATUS_DONE, VoiceEnrollmentJob.STATUS_FAILED),
+        })
+    return render(request, 'students/voice_job_status.html', {'job': job})
+
 def verify_voice(user, audio_file):
-    vd = VoiceData.objects.get(user=user)
-    # Load scaler dan model user
-    scaler = joblib.load(io.BytesIO(vd.scaler_model))
-    gmm_user = joblib.load(io.BytesIO(vd.gmm_model))
+    vd = get_voice_data(user)
+    # Scaler dan model user (cache per-proses, kunci user + model_version)
+    scaler, gmm_user = get_speaker_model(vd)
 
-    # Load UBM global (scaler dan model)
-    ubm_data = joblib.load(ubm_voice)
-    ubm_scaler = ubm_data['scaler']
-    ubm_gmm = ubm_data['ubm']
+    # UBM global (scaler dan model) dalam format ringkas, dimuat sekali per proses
+    ubm_scaler, ubm_gmm = get_compact_ubm()
 
     margin = vd.margin
 
-    temp = f"verify_{user.id}.tmp"
-    with open(temp, 'wb') as f:
-        for chunk in audio_file.chunks():
-            f.write(chunk)
-    try:
-        mfcc = extract_mfcc(temp)
-        if mfcc is None:
-            return False
+    # Decode langsung dari upload di memori (tanpa file sementara)
+    mfcc = extract_mfcc(audio_file)
+    if mfcc is None:
+        return False
 
-        # Standarisasi pakai scaler UBM
-        scaled = ubm_scaler.transform(mfcc)
+    if scoring_mode() == 'embedding':
+        score = verify_embedding(vd, mfcc)
+        if score is not None:
+            print(f"[DEBUG] User: {user.username}, cosine={score:.3f}, threshold={embedding_threshold():.3f}")
+            return score >= embedding_threshold()
+        # belum ada embedding untuk UBM ini -> jalur LLR
 
-        # Hitung log-likelihood user dan UBM
-        ll_user = gmm_user.score(scaled)
-        ll_ubm = ubm_gmm.score(scaled)
+    # Standarisasi pakai scaler UBM
+    scaled = ubm_scaler.transform(mfcc)
 
-        llr = ll_user - ll_ubm
+    # LLR user vs UBM (top-C untuk model hasil adaptasi UBM, penuh untuk model lama)
+    llr = llr_score(gmm_user, ubm_gmm, scaled)
 
-        adjusted_threshold = vd.threshold - margin
+    adjusted_threshold = vd.threshold - margin
 
-        print(f"[DEBUG] User: {user.username}, llr={llr:.2f}, threshold={vd.threshold:.2f}, margin={margin:.2f}, adj_thresh={adjusted_threshold:.2f}")
+    print(f"[DEBUG] User: {user.username}, llr={llr:.2f}, threshold={vd.threshold:.2f}, margin={margin:.2f}, adj_thresh={adjusted_threshold:.2f}")
 
-        return llr > adjusted_threshold
-    finally:
-        os.remove(temp)
+    return llr > adjusted_threshold
         
 @login_required
 @user_passes_test(is_guru_or_admin)
@@ -702,7 +667,10 @@ def voice_verification(request):
             request.session.flush()
             return redirect('login')
         return JsonResponse({'error': f'Gagal verifikasi ({attempts}/3)'})
-    return render(request, 'accounts/voice_verification.html', {'remaining': 3 - request.session.get('voice_attempts', 0)})
+    return render(request, 'accounts/voice_verification.html', {
+        'remaining': 3 - request.session.get('voice_attempts', 0),
+        'voice_streaming': getattr(settings, 'VOICE_STREAMING', False),
+    })
 
 @login_required
 def enroll_face(request, pk):
@@ -717,18 +685,26 @@ def enroll_face(request, pk):
             })
 
         try:
-            # 1. Preprocessing: deteksi + crop wajah
-            face_img: Image.Image = preprocess_face_image(image)
-
-            # 2. Ekstrak encoding wajah dari hasil crop (original)
-            face_array = np.array(face_img)
-            face_location = [(0, face_array.shape[1], face_array.shape[0], 0)]
-            encodings = face_recognition.face_encodings(face_array, face_location)
-            if not encodings:
+            # 1-2. Preprocessing: deteksi + crop wajah, encoding dari margin_crop
+            face_img, encoding = extract_face(image)
+            if encoding is None:
                 return render(request, 'students/face_enroll.html', {
                     'error': 'Face recognition gagal ekstrak fitur wajah.', 'student': siswa
                 })
-            encoding = encodings[0]
+
+            # Tolak jika wajah ini sudah terdaftar atas nama siswa lain
+            duplicate = face_index.find_duplicate(
+                encoding,
+                exclude_user_id=user.id,
+                threshold=getattr(settings, 'FACE_DUPLICATE_THRESHOLD', 0.4),
+            )
+            if duplicate:
+                dup_user = User.objects.filter(id=duplicate[0]).first()
+                return render(request, 'students/face_enroll.html', {
+                    'error': f'Wajah ini sudah terdaftar untuk {dup_user.username if dup_user else duplicate[0]} '
+                             f'(jarak {duplicate[1]:.3f}).',
+                    'student': siswa
+                })
 
             # 3. Augmentasi: hasilkan beberapa versi gambar
             augmented_faces = augment_face_images(face_img)  # List[PIL.Image]
@@ -808,68 +784,41 @@ def verify_face(user, image_file):
     - Jika TIDAK ada wajah terdeteksi: langsung return False (tidak menyimpan file apa pun).
     - Jika wajah terdeteksi:
         • Crop wajah (bounding box pertama).
-        • Simpan crop‐an di MEDIA_ROOT/detected_faces/ dengan nama unik.
+        • Antrekan crop‐an untuk disimpan di MEDIA_ROOT/detected_faces/<tgl>/<user>/.
         • Lakukan face encoding & matching, lalu kembalikan True/False.
     """
     try:
-        # 1. Buka file gambar, cek integritas, lalu convert ke RGB
-        img = Image.open(image_file)
-        img.verify()
-        image_file.seek(0)
-        img = Image.open(image_file).convert("RGB")
-        img_array = np.array(img)
+        # 1. Decode sekali dari buffer upload ke array RGB (file rusak -> exception)
+        decoded = decode_image(image_file)
 
-        # 2. Deteksi wajah dengan YOLO (asumsikan yolo_model sudah didefinisikan)
-        results = yolo_model(img_array)[0]
-        boxes = results.boxes.xyxy.cpu().numpy()  # format: [[x1, y1, x2, y2], ...]
+        # 2. Deteksi wajah dengan YOLO (daemon inferensi / lokal)
+        boxes = detect_faces(decoded.array).boxes  # format: [[x1, y1, x2, y2], ...]
 
         # 3. Jika tidak ada wajah, langsung return False (tidak menyimpan apa‐apa)
         if len(boxes) == 0:
             print("[INFO] Tidak ada wajah terdeteksi oleh YOLO. Tidak menyimpan file.")
             return False
 
-        # 4. Ambil bounding box wajah pertama (x1, y1, x2, y2)
-        x1, y1, x2, y2 = boxes[0][:4].astype(int)
-        top    = max(0, y1)
-        left   = max(0, x1)
-        bottom = min(img_array.shape[0], y2)
-        right  = min(img_array.shape[1], x2)
-
-        # 5. Crop wajah
-        face_img = img.crop((left, top, right, bottom))
-
-        # 6. Buat folder 'detected_faces' di MEDIA_ROOT jika belum ada
-        folder_faces = os.path.join(settings.MEDIA_ROOT, "detected_faces")
-        os.makedirs(folder_faces, exist_ok=True)
-
-        # 7. Simpan crop wajah ke disk
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        unique_id = str(uuid.uuid4())[:8]
-        filename = f"{user.username}_{timestamp}_{unique_id}.jpg"
-        save_path = os.path.join(folder_faces, filename)
-        face_img.save(save_path, format="JPEG")
-        print(f"[INFO] Wajah terdeteksi, crop disimpan di: {save_path}")
-
-        # 8. Lanjutkan face encoding untuk matching
-        #    Kita bisa pakai img_array & wajah yang terdeteksi (face_location)
-        face_location = [(top, right, bottom, left)]
-        uploaded_encodings = face_recognition.face_encodings(img_array, face_location)
-        if not uploaded_encodings:
+        # 4. Crop wajah & simpan di latar belakang (antrean terbatas,
+        #    bisa di-sample/dimatikan lewat FACE_CROP_SAVE_MODE)
+        if should_save_crop():
+            save_detected_face(user.username, decoded.crop(boxes[0]))
+
+        # 5. Lanjutkan face encoding untuk matching, dari margin_crop
+        #    ukuran tetap di sekitar bounding box wajah pertama
+        uploaded_encoding = encode_face(decoded, boxes[0])
+        if uploaded_encoding is None:
             print("[INFO] Gagal ekstrak encoding wajah meski kotak terdeteksi.")
             return False
 
-        uploaded_encoding = uploaded_encodings[0]
-
-        # 9. Ambil encoding yang sudah tersimpan untuk user
-        try:
-            user_face = UserFace.objects.get(user=user)
-            known_encoding = np.frombuffer(user_face.encoding)
-        except UserFace.DoesNotExist:
+        # 6. Ambil encoding yang sudah tersimpan untuk user (cache per-proses)
+        known_encoding = get_known_encoding(user.id)
+        if known_encoding is None:
             print("[ERROR] User belum punya data wajah.")
             return False
 
-        # 10. Hitung jarak dan tentukan match atau tidak
-        distance  = face_recognition.face_distance([known_encoding], uploaded_encoding)[0]
+        # 7. Hitung jarak dan tentukan match atau tidak
+        distance  = face_distance([known_encoding], uploaded_encoding)[0]
         threshold = getattr(settings, "FACE_THRESHOLD", 0.45)
         is_match  = distance <= threshold
 
@@ -925,26 +874,6 @@ def face_verification(request):
         'remaining': 3 - request.session.get('face_attempts', 0)
     })
 
-def preprocess_face_image(uploaded_image_file):
-    img = Image.open(uploaded_image_file)
-    img.verify()
-    uploaded_image_file.seek(0)
-    img = Image.open(uploaded_image_file).convert('RGB')
-    img_array = np.array(img)
-
-    results = yolo_model(img_array)[0]
-    boxes = results.boxes.xyxy.cpu().numpy()
-    if len(boxes) == 0:
-        raise ValueError("Wajah tidak terdeteksi oleh YOLO.")
-
-    x1, y1, x2, y2 = boxes[0][:4].astype(int)
-    top = max(0, y1)
-    right = min(img_array.shape[1], x2)
-    bottom = min(img_array.shape[0], y2)
-    left = max(0, x1)
-    face_crop = img.crop((left, top, right, bottom))
-    return face_crop
-
 def test_face(request, pk):
     siswa = get_object_or_404(Siswa, pk=pk)
     user = siswa.user
@@ -957,16 +886,10 @@ def test_face(request, pk):
         if form.is_valid():
             image_file = form.cleaned_data['image']
             try:
-                # Preprocessing wajah pakai YOLO
-                face_img = preprocess_face_image(image_file)
-
-                # Ekstrak encoding wajah dari crop hasil YOLO
-                face_array = np.array(face_img)
-                face_location = [(0, face_array.shape[1], face_array.shape[0], 0)]
-                encodings = face_recognition.face_encodings(face_array, face_location)
-                if not encodings:
+                # Preprocessing wajah pakai YOLO + encoding dari margin_crop
+                face_img, encoding = extract_face(image_file)
+                if encoding is None:
                     raise ValueError("Gagal ekstrak fitur wajah.")
-                encoding = encodings[0]
 
                 # Simpan file hasil crop ke MEDIA_ROOT/face_tests/<username>/
                 user_folder = os.path.join(settings.MEDIA_ROOT, 'face_tests', user.username)
@@ -1010,46 +933,31 @@ from sklearn.metrics import confusion_matrix, classification_report
 def bytes_to_encoding(enc_bytes):
     return np.frombuffer(enc_bytes, dtype=np.float64)
 
-def calculate_distance(enc1, enc2):
-    return np.linalg.norm(enc1 - enc2)
-
 def evaluate_face_recognition_with_names():
-    user_faces = UserFace.objects.all()
-    test_faces = FaceTestImage.objects.all()
+    enrolled_ids = list(UserFace.objects.values_list('user_id', flat=True))
+    test_faces = list(FaceTestImage.objects.filter(encoding__isnull=False).values_list('user_id', 'encoding'))
 
-    user_ids = sorted(set([uf.user_id for uf in user_faces] + [tf.user_id for tf in test_faces]))
+    user_ids = sorted(set(enrolled_ids + [user_id for user_id, _ in test_faces]))
 
     # Mapping user_id ke nama kelas string
     id_to_name = {uid: f"User {uid}" for uid in user_ids}
     id_to_name[-1] = "No Match"  # label khusus untuk prediksi gagal match
 
-    y_true = []
-    y_pred = []
-
     threshold = 0.6
-    user_encodings = {uf.user_id: bytes_to_encoding(uf.encoding) for uf in user_faces}
-
-    for test in test_faces:
-        true_user_id = test.user_id
-        test_encoding = bytes_to_encoding(test.encoding)
-
-        distances = []
-        user_ids_enc = []
-
-        for user_id, enroll_encoding in user_encodings.items():
-            dist = calculate_distance(test_encoding, enroll_encoding)
-            distances.append(dist)
-            user_ids_enc.append(user_id)
-
-        if distances:
-            min_dist_idx = np.argmin(distances)
-            predicted_user_id = user_ids_enc[min_dist_idx] if distances[min_dist_idx] <= threshold else -1
-        else:
-            predicted_user_id = -1
 
-        # Simpan nama kelas sesuai mapping
-        y_true.append(id_to_name[true_user_id])
-        y_pred.append(id_to_name[predicted_user_id])
+    # Semua wajah uji dicari sekaligus ke indeks wajah (nearest neighbour, k=1)
+    y_true = [id_to_name[user_id] for user_id, _ in test_faces]
+    y_pred = []
+    if test_faces:
+        queries = np.vstack([bytes_to_encoding(bytes(enc)) for _, enc in test_faces])
+        nearest_ids, nearest_dist = face_index.search(queries, k=1)
+        for row in range(len(test_faces)):
+            if nearest_ids.shape[1] and nearest_dist[row, 0] <= threshold:
+                predicted_user_id = int(nearest_ids[row, 0])
+            else:
+                predicted_user_id = -1
+            # Simpan nama kelas sesuai mapping
+            y_pred.append(id_to_name.get(predicted_user_id, f"User {predicted_user_id}"))
 
     class_names = list(id_to_name.values())
 
@@ -1105,25 +1013,26 @@ def face_evaluation_view(request):
     return render(request, 'students/face_evaluation.html', context)
 
 def verify_voice_test(user, file_path):
-    vd = VoiceData.objects.get(user=user)
-    scaler = joblib.load(io.BytesIO(vd.scaler_model))
-    gmm_user = joblib.load(io.BytesIO(vd.gmm_model))
+    vd = get_voice_data(user)
+    scaler, gmm_user = get_speaker_model(vd)
 
-    ubm_data = joblib.load(ubm_voice)
-    ubm_scaler = ubm_data['scaler']
-    ubm_gmm = ubm_data['ubm']
+    ubm_scaler, ubm_gmm = get_compact_ubm()
 
     margin = vd.margin
 
-    # langsung proses file dari path
-    mfcc = extract_mfcc(file_path)
+    # fitur dari cache (file sampel yang sama dievaluasi berulang kali)
+    mfcc = get_features(file_path)
     if mfcc is None:
         return False
 
+    if scoring_mode() == 'embedding':
+        score = verify_embedding(vd, mfcc)
+        if score is not None:
+            print(f"[DEBUG] User: {user.username}, cosine={score:.3f}, threshold={embedding_threshold():.3f}")
+            return score >= embedding_threshold()
+
     scaled = ubm_scaler.transform(mfcc)
-    ll_user = gmm_user.score(scaled)
-    ll_ubm = ubm_gmm.score(scaled)
-    llr = ll_user - ll_ubm
+    llr = llr_score(gmm_user, ubm_gmm, scaled)
 
     adjusted_threshold = vd.threshold - margin
 
@@ -1132,32 +1041,20 @@ def verify_voice_test(user, file_path):
     return llr > adjusted_threshold
 
 def evaluate_voice_recognition():
-    test_samples = VoiceSample.objects.all()
-    voice_models = {vd.user_id: vd for vd in VoiceData.objects.filter(is_trained=True)}
+    # Sampel dikelompokkan per user dan diskor per batch (accounts.voice_evaluation)
+    scores = evaluate_voice_samples()
 
     y_true = []
     y_pred = []
 
-    user_ids = sorted(set(sample.user_id for sample in test_samples))
+    user_ids = sorted(set(VoiceSample.objects.values_list('user_id', flat=True)))
     id_to_name = {uid: f"User {uid}" for uid in user_ids}
     id_to_name[-1] = "No Match"
 
-    for sample in test_samples:
-        true_user = sample.user
-
-        # Skip jika model tidak tersedia
-        if true_user.id not in voice_models:
-            continue
-
-        vd = voice_models[true_user.id]
-        audio_path = sample.audio_file.path
-
-        with open(audio_path, 'rb') as audio_file:
-            is_match = verify_voice_test(true_user, audio_path)
-
-        y_true.append(id_to_name[true_user.id])
-        if is_match:
-            y_pred.append(id_to_name[true_user.id])
+    for score in scores:
+        y_true.append(id_to_name[score.user_id])
+        if score.accepted:
+            y_pred.append(id_to_name[score.user_id])
         else:
             y_pred.append(id_to_name[-1])
 
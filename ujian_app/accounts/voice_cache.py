@@ -0,0 +1,58 @@
+# accounts/voice_cache.py
+import io
+
+import joblib
+from django.conf import settings
+
+from . import gmm as gmm_format
+from .cache import LRUCache
+from .models import VoiceData
+
+# Model speaker hasil unpickle (scaler, gmm) per (user_id, model_version).
+# model_version ikut berubah saat model dilatih ulang, jadi worker lain
+# tidak pernah memakai versi basi; sinyal VoiceData membuang entri lokal.
+speaker_models = LRUCache(
+    maxsize=getattr(settings, 'VOICE_MODEL_CACHE_SIZE', 512),
+    name='speaker_models',
+)
+
+BLOB_FIELDS = ('scaler_model', 'gmm_model', 'compact_model', 'embedding')
+
+
+def get_voice_data(user):
+    """VoiceData milik user tanpa memuat kolom blob model (VoiceData.DoesNotExist jika belum ada)."""
+    return VoiceData.objects.defer(*BLOB_FIELDS).get(user=user)
+
+
+def _blob(voice_data, field):
+    if field in voice_data.get_deferred_fields():
+        return VoiceData.objects.filter(pk=voice_data.pk).values_list(field, flat=True).get()
+    return getattr(voice_data, field)
+
+
+def _load_models(voice_data):
+    """
+    (scaler, gmm) untuk scoring. Model ringkas (accounts.gmm) diutamakan;
+    baris lama yang baru punya pickle sklearn dikonversi di memori
+    (python manage.py convert_voice_models untuk menyimpannya permanen).
+    """
+    compact = _blob(voice_data, 'compact_model')
+    if compact:
+        return gmm_format.loads(compact)
+
+    scaler = joblib.load(io.BytesIO(bytes(_blob(voice_data, 'scaler_model'))))
+    gmm = joblib.load(io.BytesIO(bytes(_blob(voice_data, 'gmm_model'))))
+    try:
+        return gmm_format.DiagScaler.from_sklearn(scaler), gmm_format.DiagGMM.from_sklearn(gmm)
+    except gmm_format.CompactModelError:
+        return scaler, gmm
+
+
+def get_speaker_model(voice_data):
+    """(scaler, gmm) milik VoiceData ini, dari cache jika versi yang sama sudah pernah dimuat."""
+    key = (voice_data.user_id, voice_data.model_version)
+    return speaker_models.get_or_load(key, lambda: _load_models(voice_data))
+
+
+def invalidate_speaker_model(user_id):
+    speaker_models.invalidate_where(lambda key: key[0] == user_id)
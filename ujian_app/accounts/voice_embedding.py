@@ -0,0 +1,251 @@
+# accounts/voice_embedding.py
+"""
+Embedding speaker panjang tetap: supervector GMM dari UBM global.
+Mean UBM diadaptasi MAP ke fitur audio (accounts.gmm.map_adapt_means),
+lalu selisihnya dinormalisasi dengan bobot dan presisi UBM:
+    s = vec( sqrt(w_k) * sqrt(p_k) * (mu_k' - mu_k) )      (K * D, float32)
+Enrollment dan audio uji memakai fungsi yang sama, dan skor verifikasi
+adalah cosine similarity. Identifikasi 1:N dihitung sebagai satu perkalian
+matriks terhadap semua embedding terdaftar (VoiceEmbeddingIndex).
+
+Embedding terikat pada UBM: setelah VOICE_UBM diganti, jalankan
+python manage.py backfill_voice_embeddings --force.
+
+Threshold cosine dikalibrasi dengan sampel yang ditahan (held-out):
+python manage.py voice_score_matrix --mode embedding --apply menulis
+VOICE_EMBEDDING_CALIBRATION; VOICE_EMBEDDING_THRESHOLD di settings (jika
+tidak None) selalu didahulukan.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .gmm import map_adapt_means
+from .models import VoiceData
+from .ubm import get_compact_ubm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.5  # hanya dipakai sebelum kalibrasi pertama
+
+
+def scoring_mode():
+    """'llr' (GMM-UBM, default) atau 'embedding' (cosine supervector)."""
+    return getattr(settings, 'VOICE_SCORING_MODE', 'llr')
+
+
+def supervector(ubm, X, relevance_factor=None):
+    """Supervector ternormalisasi (float32, K * D) dari fitur X yang sudah di-scale."""
+    if relevance_factor is None:
+        relevance_factor = getattr(settings, 'VOICE_MAP_RELEVANCE', 16.0)
+    adapted = map_adapt_means(ubm, X, relevance_factor)
+    offset = adapted.means.astype(np.float64) - ubm.means.astype(np.float64)
+    offset *= np.sqrt(ubm.precisions.astype(np.float64))
+    offset *= np.sqrt(ubm.weights.astype(np.float64))[:, None]
+    return offset.ravel().astype(np.float32)
+
+
+def compute_embedding(features, ubm_scaler=None, ubm_gmm=None):
+    """Embedding dari satu atau beberapa matriks MFCC (frame x fitur)."""
+    if ubm_scaler is None or ubm_gmm is None:
+        ubm_scaler, ubm_gmm = get_compact_ubm()
+    if isinstance(features, np.ndarray):
+        features = [features]
+    return supervector(ubm_gmm, ubm_scaler.transform(np.vstack(features)))
+
+
+def embedding_dim():
+    _, ubm_gmm = get_compact_ubm()
+    return ubm_gmm.n_components * ubm_gmm.n_features
+
+
+def to_bytes(embedding):
+    return np.asarray(embedding, dtype='<f4').tobytes()
+
+
+def from_bytes(blob):
+    """Embedding tersimpan; None jika kosong atau ukurannya tidak cocok dengan UBM saat ini."""
+    if not blob:
+        return None
+    embedding = np.frombuffer(bytes(blob), dtype='<f4')
+    return embedding if embedding.size == embedding_dim() else None
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def cosine_score(a, b):
+    return float(_normalize(a) @ _normalize(b))
+
+
+class VoiceEmbeddingIndex:
+    """
+    Matriks embedding ter-normalisasi L2 semua VoiceData terlatih. Seperti
+    FaceIndex: diperbarui per user lewat sinyal VoiceData dan dibangun ulang
+    dari database jika umurnya melewati max_age (detik).
+    """
+
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._vectors = {}  # user_id -> embedding ter-normalisasi
+        self._matrix = None
+        self._user_ids = np.empty(0, dtype=np.int64)
+        self._built_at = None
+
+    def rebuild(self):
+        rows = VoiceData.objects.filter(is_trained=True, embedding__isnull=False).values_list('user_id', 'embedding')
+        vectors = {}
+        for user_id, blob in rows:
+            embedding = from_bytes(blob)
+            if embedding is not None:
+                vectors[user_id] = _normalize(embedding)
+        with self._lock:
+            self._vectors = vectors
+            self._matrix = None
+            self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        stale = (
+            self._built_at is None
+            or (self.max_age is not None and time.monotonic() - self._built_at > self.max_age)
+        )
+        if stale:
+            self.rebuild()
+
+    def refresh_user(self, user_id):
+        """Muat ulang baris satu user dari database (dipanggil dari sinyal VoiceData)."""
+        with self._lock:
+            if self._built_at is None:
+                return
+        row = VoiceData.objects.filter(user_id=user_id, is_trained=True).values_list('embedding', flat=True).first()
+        embedding = from_bytes(row)
+        with self._lock:
+            if embedding is None:
+                self._vectors.pop(user_id, None)
+            else:
+                self._vectors[user_id] = _normalize(embedding)
+            self._matrix = None
+
+    def remove(self, user_id):
+        with self._lock:
+            if self._vectors.pop(user_id, None) is not None:
+                self._matrix = None
+
+    def _snapshot(self):
+        with self._lock:
+            self._ensure_built()
+            if self._matrix is None:
+                self._user_ids = np.fromiter(self._vectors, dtype=np.int64, count=len(self._vectors))
+                self._matrix = (np.vstack([self._vectors[u] for u in self._user_ids.tolist()])
+                                if self._vectors else None)
+            return self._user_ids, self._matrix
+
+    def __len__(self):
+        return len(self._snapshot()[0])
+
+    def search(self, queries, k=1):
+        """
+        queries: (Q, dim). Mengembalikan (user_ids, skor cosine) berbentuk
+        (Q, k') dengan k' = min(k, jumlah terdaftar), skor tertinggi dulu.
+        """
+        user_ids, matrix = self._snapshot()
+        queries = _normalize(np.atleast_2d(queries))
+        n = len(user_ids)
+        if n == 0 or len(queries) == 0:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+        scores = queries @ matrix.T
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k] if k < n else np.broadcast_to(np.arange(n), scores.shape)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return user_ids[top], np.take_along_axis(top_scores, order, axis=1)
+
+    def identify(self, embedding, threshold):
+        """Siapa pemilik suara ini? (user_id, skor) atau (None, skor)."""
+        user_ids, scores = self.search(embedding, k=1)
+        if user_ids.shape[1] == 0:
+            return None, None
+        score = float(scores[0, 0])
+        return (int(user_ids[0, 0]) if score >= threshold else None), score
+
+
+voice_index = VoiceEmbeddingIndex(max_age=getattr(settings, 'VOICE_EMBEDDING_INDEX_MAX_AGE', 300))
+
+
+def calibration_path():
+    return getattr(settings, 'VOICE_EMBEDDING_CALIBRATION',
+                   os.path.join(settings.BASE_DIR, 'voice_ubm', 'embedding_calibration.json'))
+
+
+def save_calibration(threshold, **info):
+    """Simpan threshold cosine hasil kalibrasi (ditulis atomik)."""
+    path = calibration_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(dict(info, threshold=float(threshold), embedding_dim=embedding_dim()), fh, indent=2)
+    os.replace(tmp, path)
+    _calibration.clear()
+
+
+_calibration = {}  # {'mtime': ..., 'threshold': ...} cache per proses
+_uncalibrated_warned = False
+
+
+def _calibrated_threshold():
+    path = calibration_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if _calibration.get('mtime') != mtime:
+        try:
+            with open(path, encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            logger.warning("File kalibrasi embedding suara tidak bisa dibaca: %s", path)
+            return None
+        # kalibrasi untuk UBM lain (dimensi berbeda) tidak berlaku
+        threshold = data['threshold'] if data.get('embedding_dim') == embedding_dim() else None
+        _calibration.update(mtime=mtime, threshold=threshold)
+    return _calibration['threshold']
+
+
+def embedding_threshold():
+    """VOICE_EMBEDDING_THRESHOLD jika diisi, selain itu hasil kalibrasi held-out."""
+    global _uncalibrated_warned
+    configured = getattr(settings, 'VOICE_EMBEDDING_THRESHOLD', None)
+    if configured is not None:
+        return configured
+    calibrated = _calibrated_threshold()
+    if calibrated is not None:
+        return calibrated
+    if not _uncalibrated_warned:
+        _uncalibrated_warned = True
+        logger.warning("Threshold embedding suara belum dikalibrasi, pakai %.2f. "
+                       "Jalankan: python manage.py voice_score_matrix --mode embedding --apply", DEFAULT_THRESHOLD)
+    return DEFAULT_THRESHOLD
+
+
+def verify_embedding(voice_data, mfcc):
+    """Skor cosine audio uji vs embedding user; None jika user belum punya embedding yang cocok."""
+    enrolled = from_bytes(VoiceData.objects.filter(pk=voice_data.pk).values_list('embedding', flat=True).get())
+    if enrolled is None:
+        return None
+    return cosine_score(compute_embedding(mfcc), enrolled)
+
+
+def identify_voice(mfcc, threshold=None):
+    """Identifikasi 1:N dari MFCC: (user_id atau None, skor cosine)."""
+    threshold = threshold if threshold is not None else embedding_threshold()
+    return voice_index.identify(compute_embedding(mfcc), threshold)
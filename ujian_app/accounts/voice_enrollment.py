@@ -0,0 +1,179 @@
+# accounts/voice_enrollment.py
+"""
+Pendaftaran suara di latar belakang. View/command hanya membuat
+VoiceEnrollmentJob; worker (python manage.py run_voice_jobs) mengambil job
+dengan SELECT ... FOR UPDATE SKIP LOCKED, mengekstrak MFCC semua sampel
+secara paralel di process pool, lalu melatih dan menyimpan model user.
+"""
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from sklearn.mixture import GaussianMixture
+
+from .gmm import DiagGMM, compact_from_sklearn, dumps, llr_score, map_adapt_means
+from .models import VoiceData, VoiceEnrollmentJob
+from .ubm import get_compact_ubm, get_ubm
+from .feature_store import load_features_batch
+from .voice_embedding import compute_embedding, to_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def create_process_pool(workers=None):
+    """Pool ekstraksi fitur; fork agar worker mewarisi Django yang sudah siap."""
+    workers = workers or getattr(settings, 'VOICE_ENROLLMENT_WORKERS', None)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+
+
+def chunked(items, size=None):
+    """Pecah list menjadi batch untuk extract_mfcc_batch (VOICE_FEATURE_BATCH_SIZE)."""
+    size = size or getattr(settings, 'VOICE_FEATURE_BATCH_SIZE', 16)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def enqueue_voice_enrollment(user, samples, created_by=None):
+    """Buat job pelatihan model suara user dari daftar VoiceSample."""
+    samples = list(samples)
+    job = VoiceEnrollmentJob.objects.create(user=user, created_by=created_by, total_files=len(samples))
+    job.samples.set(samples)
+    return job
+
+
+def claim_next_job():
+    """Ambil satu job PENDING tertua dan tandai RUNNING; aman untuk beberapa worker sekaligus."""
+    with transaction.atomic():
+        job = (
+            VoiceEnrollmentJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=VoiceEnrollmentJob.STATUS_PENDING)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = VoiceEnrollmentJob.STATUS_RUNNING
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+def requeue_stale_jobs(max_minutes):
+    """Kembalikan job RUNNING yang worker-nya mati (lebih lama dari max_minutes) ke PENDING."""
+    cutoff = timezone.now() - timedelta(minutes=max_minutes)
+    return VoiceEnrollmentJob.objects.filter(
+        status=VoiceEnrollmentJob.STATUS_RUNNING, started_at__lt=cutoff,
+    ).update(status=VoiceEnrollmentJob.STATUS_PENDING, processed_files=0, started_at=None)
+
+
+def requeue_job(job):
+    """Kembalikan satu job RUNNING ke PENDING (mis. setelah pool proses rusak)."""
+    return VoiceEnrollmentJob.objects.filter(pk=job.pk, status=VoiceEnrollmentJob.STATUS_RUNNING).update(
+        status=VoiceEnrollmentJob.STATUS_PENDING, processed_files=0, started_at=None,
+    )
+
+
+def train_speaker_model(features, ubm_scaler, ubm_gmm, mode=None):
+    """
+    Model user dari MFCC gabungan + threshold awal dari LLR data latih.
+    VOICE_ENROLLMENT_MODE:
+      'legacy' - GaussianMixture baru dengan EM (n_init=3), ubm_* objek sklearn
+      'map'    - adaptasi MAP mean UBM (accounts.gmm.DiagGMM), ubm_* format ringkas
+    """
+    mode = mode or getattr(settings, 'VOICE_ENROLLMENT_MODE', 'legacy')
+    scaled = ubm_scaler.transform(np.vstack(features))
+
+    if mode == 'map':
+        gmm_user = map_adapt_means(ubm_gmm, scaled, getattr(settings, 'VOICE_MAP_RELEVANCE', 16.0))
+    elif mode == 'legacy':
+        gmm_user = GaussianMixture(n_components=8, covariance_type='diag', n_init=3, random_state=42)
+        gmm_user.fit(scaled)
+    else:
+        raise ValueError(f"VOICE_ENROLLMENT_MODE tidak dikenal: {mode!r}")
+
+    # score() sudah rata-rata per frame, sehingga std_llr = 0 dan threshold = LLR data latih
+    llr = llr_score(gmm_user, ubm_gmm, scaled)
+    mean_llr = np.mean(llr)
+    std_llr = np.std(llr)
+    threshold = float(mean_llr - 0.5 * std_llr)
+    return gmm_user, threshold
+
+
+def load_ubm_for_training(mode=None):
+    """(scaler, ubm) sesuai mode pelatihan: objek sklearn (legacy) atau format ringkas (map)."""
+    mode = mode or getattr(settings, 'VOICE_ENROLLMENT_MODE', 'legacy')
+    if mode == 'map':
+        return get_compact_ubm()
+    ubm_data = get_ubm()
+    return ubm_data['scaler'], ubm_data['ubm']
+
+
+def save_speaker_model(user, gmm_user, ubm_scaler, threshold, embedding=None):
+    vd, _ = VoiceData.objects.get_or_create(user=user)
+    vd.embedding = to_bytes(embedding) if embedding is not None else None
+    if isinstance(gmm_user, DiagGMM):
+        # Model hasil adaptasi MAP hanya ada dalam format ringkas
+        vd.scaler_model = None
+        vd.gmm_model = None
+        vd.compact_model = dumps(gmm_user, ubm_scaler)
+    else:
+        buf_s, buf_g = io.BytesIO(), io.BytesIO()
+        joblib.dump(ubm_scaler, buf_s)  # scaler UBM ikut disimpan bersama model user
+        joblib.dump(gmm_user, buf_g)
+        vd.scaler_model = buf_s.getvalue()
+        vd.gmm_model = buf_g.getvalue()
+        vd.compact_model = compact_from_sklearn(gmm_user, ubm_scaler)
+    vd.model_version += 1
+    vd.threshold = threshold
+    vd.is_trained = True
+    vd.save()
+    return vd
+
+
+def run_job(job, pool):
+    """
+    Proses satu job RUNNING sampai DONE/FAILED. BrokenProcessPool (worker
+    mati karena OOM/segfault) diteruskan ke pemanggil, yang harus membuat
+    pool baru dan mengantrekan ulang job ini.
+    """
+    try:
+        paths = [sample.audio_file.path for sample in job.samples.all()]
+        job.total_files = len(paths)
+        job.save(update_fields=['total_files'])
+        if not paths:
+            raise ValueError('Job tidak memiliki sampel suara')
+
+        features = []
+        futures = [pool.submit(load_features_batch, batch) for batch in chunked(paths)]
+        for future in as_completed(futures):
+            batch = future.result()
+            features.extend(feats for feats in batch if feats is not None)
+            job.processed_files += len(batch)
+            job.save(update_fields=['processed_files'])
+
+        if not features:
+            raise ValueError('Ekstraksi fitur gagal untuk semua file')
+
+        ubm_scaler, ubm_gmm = load_ubm_for_training()
+        gmm_user, threshold = train_speaker_model(features, ubm_scaler, ubm_gmm)
+        save_speaker_model(job.user, gmm_user, ubm_scaler, threshold, compute_embedding(features))
+
+        job.status = VoiceEnrollmentJob.STATUS_DONE
+        job.message = f'{len(features)}/{len(paths)} file dipakai, threshold={threshold:.2f}'
+    except BrokenProcessPool:
+        raise
+    except Exception as e:
+        logger.exception("Job suara %s gagal", job.id)
+        job.status = VoiceEnrollmentJob.STATUS_FAILED
+        job.message = str(e)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'finished_at'])
+    return job
@@ -0,0 +1,396 @@
+# accounts/voice_evaluation.py
+"""
+Mesin evaluasi verifikasi suara. Sampel VoiceSample dikelompokkan per
+user, model tiap user dan UBM dimuat sekali di proses induk, lalu fitur
+(feature_store, ekstraksi batch) dan LLR dihitung per batch di process
+pool. Worker tidak menyentuh database. Progres dilaporkan per batch.
+
+score_matrix() menilai setiap sampel terhadap setiap model terlatih
+sehingga skor target dan impostor, EER, titik DET, dan threshold per model
+bisa dihitung. Model yang di verify_voice dinilai top-C (adaptasi MAP,
+VOICE_TOPC > 0) juga dinilai top-C di sini, dan model pickle sklearn
+non-diagonal dinilai satu per satu; model diagonal lain dinilai penuh
+sekaligus lewat GMMBank (satu matriks per batch).
+
+embedding_score_matrix() membuat matriks yang sama untuk mode embedding
+(cosine supervector) dengan sampel held-out: embedding pendaftaran tiap
+user dihitung ulang tanpa sampel yang dipakai sebagai probe.
+"""
+from concurrent.futures import as_completed
+
+import numpy as np
+from django.conf import settings
+from scipy.special import ndtri
+
+from .feature_store import load_features_batch
+from .gmm import DiagGMM, GMMBank, llr_score, supports_top_c
+from .models import VoiceData, VoiceSample
+from .ubm import get_compact_ubm
+from .voice_cache import BLOB_FIELDS, get_speaker_model
+from .voice_embedding import compute_embedding, embedding_threshold
+from .voice_enrollment import chunked, create_process_pool
+from .voice_metrics import best_accuracy_threshold, equal_error_rate, roc_curve
+
+
+class SampleScore:
+    def __init__(self, sample_id, user_id, llr, accepted):
+        self.sample_id = sample_id
+        self.user_id = user_id
+        self.llr = llr  # None jika fitur gagal diekstrak
+        self.accepted = accepted
+
+
+def score_batch(task):
+    """Dijalankan di worker: LLR setiap file terhadap model pemiliknya."""
+    user_id, gmm, ubm_scaler, ubm_gmm, threshold, samples = task
+    results = []
+    features = load_features_batch([path for _, path in samples])
+    for (sample_id, _), mfcc in zip(samples, features):
+        if mfcc is None:
+            results.append(SampleScore(sample_id, user_id, None, False))
+            continue
+        scaled = ubm_scaler.transform(mfcc)
+        llr = llr_score(gmm, ubm_gmm, scaled)
+        results.append(SampleScore(sample_id, user_id, float(llr), llr > threshold))
+    return results
+
+
+def build_tasks(user_ids=None):
+    """Satu task per (user, batch sampel); model user dimuat sekali untuk semua batch-nya."""
+    voice_data = VoiceData.objects.filter(is_trained=True).defer(*BLOB_FIELDS)
+    samples = VoiceSample.objects.order_by('user_id', 'id')
+    if user_ids is not None:
+        voice_data = voice_data.filter(user_id__in=user_ids)
+        samples = samples.filter(user_id__in=user_ids)
+
+    by_user = {}
+    for sample_id, user_id, audio_file in samples.values_list('id', 'user_id', 'audio_file'):
+        by_user.setdefault(user_id, []).append((sample_id, audio_file))
+
+    ubm_scaler, ubm_gmm = get_compact_ubm()
+    storage = VoiceSample._meta.get_field('audio_file').storage
+    tasks = []
+    for vd in voice_data:
+        user_samples = by_user.get(vd.user_id)
+        if not user_samples:
+            continue
+        _, gmm = get_speaker_model(vd)
+        threshold = vd.threshold - vd.margin  # sama seperti verify_voice
+        paths = [(sample_id, storage.path(name)) for sample_id, name in user_samples]
+        for batch in chunked(paths):
+            tasks.append((vd.user_id, gmm, ubm_scaler, ubm_gmm, threshold, batch))
+    return tasks
+
+
+def iter_voice_evaluation(workers=None, user_ids=None):
+    """
+    Generator progres: menghasilkan (selesai, total, list SampleScore batch
+    terakhir) setiap kali satu batch selesai.
+    """
+    tasks = build_tasks(user_ids)
+    total = sum(len(task[-1]) for task in tasks)
+    workers = workers or getattr(settings, 'VOICE_EVALUATION_WORKERS', 1)
+    done = 0
+    if workers <= 1:
+        for task in tasks:
+            results = score_batch(task)
+            done += len(results)
+            yield done, total, results
+        return
+
+    with create_process_pool(workers) as pool:
+        futures = [pool.submit(score_batch, task) for task in tasks]
+        for future in as_completed(futures):
+            results = future.result()
+            done += len(results)
+            yield done, total, results
+
+
+def evaluate_voice_samples(workers=None, user_ids=None, progress=None):
+    """Jalankan evaluasi penuh; progress(selesai, total) dipanggil per batch."""
+    scores = []
+    for done, total, results in iter_voice_evaluation(workers, user_ids):
+        scores.extend(results)
+        if progress is not None:
+            progress(done, total)
+    scores.sort(key=lambda s: s.sample_id)
+    return scores
+
+
+def summarize(scores):
+    llrs = np.array([s.llr for s in scores if s.llr is not None])
+    return {
+        'samples': len(scores),
+        'failed': sum(1 for s in scores if s.llr is None),
+        'accepted': sum(1 for s in scores if s.accepted),
+        'acceptance_rate': (sum(1 for s in scores if s.accepted) / len(scores)) if scores else None,
+        'mean_llr': float(llrs.mean()) if len(llrs) else None,
+    }
+
+
+# -- matriks skor lintas user ---------------------------------------------
+
+class ScoreMatrix:
+    """LLR (sampel x model) dengan pemilik sampel dan user tiap model."""
+
+    def __init__(self, model_user_ids, model_thresholds, sample_ids, sample_owners, llr):
+        self.model_user_ids = np.asarray(model_user_ids)
+        self.model_thresholds = np.asarray(model_thresholds, dtype=np.float64)
+        self.sample_ids = np.asarray(sample_ids)
+        self.sample_owners = np.asarray(sample_owners)
+        self.llr = np.asarray(llr, dtype=np.float64).reshape(len(self.sample_ids), len(self.model_user_ids))
+
+    @property
+    def target_mask(self):
+        return self.sample_owners[:, None] == self.model_user_ids[None, :]
+
+    def target_scores(self):
+        return self.llr[self.target_mask]
+
+    def impostor_scores(self):
+        return self.llr[~self.target_mask]
+
+    def metrics(self, max_det_points=200):
+        """EER dan titik DET gabungan (threshold global) dari semua trial target/impostor."""
+        target, impostor = self.target_scores(), self.impostor_scores()
+        roc = roc_curve(target, impostor)
+        eer, eer_threshold = equal_error_rate(roc)
+        step = max(1, len(roc['thresholds']) // max_det_points)
+        eps = 1e-6
+        det = [
+            {
+                'threshold': float(t),
+                'far': float(far),
+                'frr': float(frr),
+                'far_probit': float(ndtri(np.clip(far, eps, 1 - eps))),
+                'frr_probit': float(ndtri(np.clip(frr, eps, 1 - eps))),
+            }
+            for t, far, frr in zip(roc['thresholds'][::step], roc['far'][::step], roc['frr'][::step])
+        ]
+        return {'eer': eer, 'eer_threshold': eer_threshold, 'target_trials': len(target),
+                'impostor_trials': len(impostor), 'det': det}
+
+    def distributions(self, bins=50):
+        """Histogram skor target dan impostor dengan bin yang sama."""
+        target, impostor = self.target_scores(), self.impostor_scores()
+        edges = np.histogram_bin_edges(np.concatenate([target, impostor]), bins=bins)
+        return {
+            'bin_edges': edges.tolist(),
+            'target': np.histogram(target, bins=edges)[0].tolist(),
+            'impostor': np.histogram(impostor, bins=edges)[0].tolist(),
+        }
+
+    def global_threshold(self, criterion='accuracy'):
+        """(threshold, akurasi/EER) tunggal untuk semua model dari trial target/impostor gabungan."""
+        target, impostor = self.target_scores(), self.impostor_scores()
+        roc = roc_curve(target, impostor)
+        if criterion == 'eer':
+            eer, threshold = equal_error_rate(roc)
+            return threshold, eer
+        return best_accuracy_threshold(roc, len(target), len(impostor))
+
+    def model_thresholds_tuned(self, criterion='accuracy'):
+        """{user_id: threshold} per model dari trial target (sampel milik user) vs impostor (sampel user lain)."""
+        tuned = {}
+        mask = self.target_mask
+        for m, user_id in enumerate(self.model_user_ids):
+            target, impostor = self.llr[mask[:, m], m], self.llr[~mask[:, m], m]
+            if not len(target) or not len(impostor):
+                continue
+            roc = roc_curve(target, impostor)
+            if criterion == 'eer':
+                _, threshold = equal_error_rate(roc)
+            else:
+                threshold, _ = best_accuracy_threshold(roc, len(target), len(impostor))
+            tuned[int(user_id)] = threshold
+        return tuned
+
+    def identification(self):
+        """Prediksi user per sampel: model dengan LLR tertinggi, -1 jika di bawah threshold model itu."""
+        best = np.argmax(self.llr, axis=1)
+        best_llr = self.llr[np.arange(len(best)), best]
+        predicted = self.model_user_ids[best].copy()
+        predicted[best_llr <= self.model_thresholds[best]] = -1
+        return predicted
+
+    def expected_identity(self):
+        """Label benar per sampel: pemiliknya, atau -1 jika pemilik tidak punya model (harus ditolak)."""
+        return np.where(np.isin(self.sample_owners, self.model_user_ids), self.sample_owners, -1)
+
+    def identification_accuracy(self):
+        if not len(self.sample_ids):
+            return None
+        return float((self.identification() == self.expected_identity()).mean())
+
+
+def score_matrix_batch(task):
+    """Dijalankan di worker: baris LLR (sampel x semua model) untuk satu batch file."""
+    bank, bank_columns, single_models, top_c, ubm_scaler, ubm_gmm, samples = task
+    n_models = len(bank_columns) + len(single_models)
+    features = load_features_batch([path for _, _, path in samples])
+    kept = [(sample, mfcc) for sample, mfcc in zip(samples, features) if mfcc is not None]
+    if not kept:
+        return [], [], np.empty((0, n_models))
+    scaled = [ubm_scaler.transform(mfcc) for _, mfcc in kept]
+    llr = np.empty((len(scaled), n_models))
+    if bank is not None:
+        ubm_scores = np.array([ubm_gmm.score(x) for x in scaled])
+        llr[:, bank_columns] = bank.score_clips(scaled) - ubm_scores[:, None]
+    for column, gmm in single_models:
+        llr[:, column] = [llr_score(gmm, ubm_gmm, x, top_c) for x in scaled]
+    return [s[0] for s, _ in kept], [s[1] for s, _ in kept], llr
+
+
+def score_matrix(workers=None, user_ids=None, progress=None):
+    """Nilai setiap VoiceSample terhadap setiap model terlatih; kembalikan ScoreMatrix."""
+    voice_data = VoiceData.objects.filter(is_trained=True).defer(*BLOB_FIELDS).order_by('user_id')
+    samples = VoiceSample.objects.order_by('id')
+    if user_ids is not None:
+        voice_data = voice_data.filter(user_id__in=user_ids)
+        samples = samples.filter(user_id__in=user_ids)
+
+    ubm_scaler, ubm_gmm = get_compact_ubm()
+    top_c = getattr(settings, 'VOICE_TOPC', 0)
+    bank_models, bank_columns, single_models = [], [], []
+    model_user_ids, thresholds = [], []
+    for vd in voice_data:
+        _, gmm = get_speaker_model(vd)
+        column = len(model_user_ids)
+        if not isinstance(gmm, DiagGMM) or supports_top_c(gmm, ubm_gmm, top_c):
+            # pickle sklearn non-diagonal tidak bisa masuk GMMBank; model MAP dinilai
+            # top-C seperti di verify_voice
+            single_models.append((column, gmm))
+        else:
+            bank_models.append(gmm)
+            bank_columns.append(column)
+        model_user_ids.append(vd.user_id)
+        thresholds.append(vd.threshold - vd.margin)
+    if not model_user_ids:
+        raise ValueError("Tidak ada model suara terlatih")
+
+    bank = GMMBank(bank_models) if bank_models else None
+    storage = VoiceSample._meta.get_field('audio_file').storage
+    rows = [(sample_id, user_id, storage.path(name))
+            for sample_id, user_id, name in samples.values_list('id', 'user_id', 'audio_file')]
+    tasks = [(bank, bank_columns, single_models, top_c, ubm_scaler, ubm_gmm, batch) for batch in chunked(rows)]
+
+    sample_ids, owners, blocks = [], [], []
+
+    def collect(result):
+        ids, batch_owners, llr = result
+        sample_ids.extend(ids)
+        owners.extend(batch_owners)
+        blocks.append(llr)
+
+    workers = workers or getattr(settings, 'VOICE_EVALUATION_WORKERS', 1)
+    done = 0
+    if workers <= 1:
+        for task in tasks:
+            collect(score_matrix_batch(task))
+            done += len(task[-1])
+            if progress is not None:
+                progress(done, len(rows))
+    else:
+        with create_process_pool(workers) as pool:
+            futures = {pool.submit(score_matrix_batch, task): len(task[-1]) for task in tasks}
+            for future in as_completed(futures):
+                collect(future.result())
+                done += futures[future]
+                if progress is not None:
+                    progress(done, len(rows))
+
+    llr = np.vstack(blocks) if blocks else np.empty((0, len(model_user_ids)))
+    return ScoreMatrix(model_user_ids, thresholds, sample_ids, owners, llr)
+
+
+
+def split_holdout(sample_rows, holdout=0.3):
+    """
+    Bagi sampel satu user (urut id): sampel terbaru (proporsi holdout,
+    minimal satu) menjadi probe, sisanya untuk embedding pendaftaran.
+    User dengan satu sampel tidak punya probe.
+    """
+    if len(sample_rows) < 2:
+        return list(sample_rows), []
+    n_probe = min(len(sample_rows) - 1, max(1, int(round(len(sample_rows) * holdout))))
+    return list(sample_rows[:-n_probe]), list(sample_rows[-n_probe:])
+
+
+def embedding_score_matrix(workers=None, user_ids=None, holdout=0.3, progress=None):
+    """
+    ScoreMatrix cosine (probe held-out x embedding pendaftaran). Embedding
+    pendaftaran dihitung dari sampel non-probe saja, sehingga skor target
+    tidak pernah berasal dari audio yang ikut membentuk embedding-nya.
+    """
+    voice_data = VoiceData.objects.filter(is_trained=True).defer(*BLOB_FIELDS).order_by('user_id')
+    if user_ids is not None:
+        voice_data = voice_data.filter(user_id__in=user_ids)
+    enrolled_users = list(voice_data.values_list('user_id', flat=True))
+    samples = VoiceSample.objects.filter(user_id__in=enrolled_users).order_by('user_id', 'id')
+
+    storage = VoiceSample._meta.get_field('audio_file').storage
+    by_user = {}
+    for sample_id, user_id, name in samples.values_list('id', 'user_id', 'audio_file'):
+        by_user.setdefault(user_id, []).append((sample_id, user_id, storage.path(name)))
+    rows = [row for user_rows in by_user.values() for row in user_rows]
+
+    features = {}
+    workers = workers or getattr(settings, 'VOICE_EVALUATION_WORKERS', 1)
+    batches = chunked(rows)
+    done = 0
+
+    def collect(batch, result):
+        nonlocal done
+        for (sample_id, _, _), mfcc in zip(batch, result):
+            if mfcc is not None:
+                features[sample_id] = mfcc
+        done += len(batch)
+        if progress is not None:
+            progress(done, len(rows))
+
+    if workers <= 1:
+        for batch in batches:
+            collect(batch, load_features_batch([path for _, _, path in batch]))
+    else:
+        with create_process_pool(workers) as pool:
+            futures = {pool.submit(load_features_batch, [path for _, _, path in batch]): batch for batch in batches}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+
+    ubm_scaler, ubm_gmm = get_compact_ubm()
+    model_user_ids, enrolled, probe_ids, probe_owners, probes = [], [], [], [], []
+    for user_id, user_rows in by_user.items():
+        usable = [row for row in user_rows if row[0] in features]
+        enroll_rows, probe_rows = split_holdout(usable, holdout)
+        if not enroll_rows:
+            continue
+        model_user_ids.append(user_id)
+        enrolled.append(compute_embedding([features[r[0]] for r in enroll_rows], ubm_scaler, ubm_gmm))
+        for sample_id, _, _ in probe_rows:
+            probe_ids.append(sample_id)
+            probe_owners.append(user_id)
+            probes.append(compute_embedding(features[sample_id], ubm_scaler, ubm_gmm))
+    if not model_user_ids:
+        raise ValueError("Tidak ada user dengan sampel suara yang bisa diekstrak")
+
+    def normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float64)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    cosine = (normalize(probes) @ normalize(enrolled).T if probes
+              else np.empty((0, len(model_user_ids))))
+    threshold = embedding_threshold()
+    return ScoreMatrix(model_user_ids, [threshold] * len(model_user_ids), probe_ids, probe_owners, cosine)
+
+
+def apply_thresholds(thresholds):
+    """
+    Simpan threshold hasil tuning: threshold latih dipertahankan dan margin
+    diatur agar threshold - margin (batas verify_voice) sama dengan nilai ini.
+    """
+    updated = []
+    for vd in VoiceData.objects.filter(user_id__in=list(thresholds)).defer(*BLOB_FIELDS):
+        vd.margin = vd.threshold - thresholds[vd.user_id]
+        updated.append(vd)
+    VoiceData.objects.bulk_update(updated, ['margin'])
+    return len(updated)
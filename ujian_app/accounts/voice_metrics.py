@@ -0,0 +1,58 @@
+# accounts/voice_metrics.py
+"""
+Metrik verifikasi suara dari skor LLR: kurva ROC/DET, threshold terbaik
+dan EER. Semua titik operasi dihitung dari skor terurut dalam O(n log n),
+tanpa sweep threshold. Keputusan mengikuti verify_voice: terima jika
+skor > threshold.
+"""
+import numpy as np
+
+
+def roc_curve(pos_scores, neg_scores):
+    """
+    Semua titik operasi yang berbeda, dari 'tolak semua' sampai 'terima semua'.
+    Threshold tiap titik diletakkan di tengah antara skor terendah yang
+    diterima dan skor tertinggi berikutnya yang ditolak.
+    Mengembalikan dict array: thresholds, far, frr, tp, fp.
+    """
+    pos = np.asarray(pos_scores, dtype=np.float64)
+    neg = np.asarray(neg_scores, dtype=np.float64)
+    if not len(pos) or not len(neg):
+        raise ValueError("Butuh minimal satu skor positif dan satu negatif")
+
+    scores = np.concatenate([pos, neg])
+    labels = np.concatenate([np.ones(len(pos)), np.zeros(len(neg))])
+    order = np.argsort(-scores, kind='mergesort')
+    scores, labels = scores[order], labels[order]
+
+    # Indeks terakhir dari setiap kelompok skor yang sama
+    last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp = np.cumsum(labels)[last]
+    fp = np.cumsum(1 - labels)[last]
+    next_lower = np.r_[scores[last[:-1] + 1], scores[-1] - 1.0]
+    thresholds = (scores[last] + next_lower) / 2.0
+
+    # Titik awal: tolak semua (skor > skor tertinggi tidak ada)
+    tp = np.r_[0.0, tp]
+    fp = np.r_[0.0, fp]
+    thresholds = np.r_[scores[0], thresholds]
+    return {
+        'thresholds': thresholds,
+        'far': fp / len(neg),
+        'frr': 1.0 - tp / len(pos),
+        'tp': tp,
+        'fp': fp,
+    }
+
+
+def best_accuracy_threshold(roc, n_pos, n_neg):
+    """(threshold, akurasi) dengan akurasi tertinggi; seri -> threshold tertinggi."""
+    accuracy = (roc['tp'] + (n_neg - roc['fp'])) / (n_pos + n_neg)
+    idx = int(np.argmax(accuracy))
+    return float(roc['thresholds'][idx]), float(accuracy[idx])
+
+
+def equal_error_rate(roc):
+    """(EER, threshold) di titik FAR dan FRR paling dekat."""
+    idx = int(np.argmin(np.abs(roc['far'] - roc['frr'])))
+    return float((roc['far'][idx] + roc['frr'][idx]) / 2.0), float(roc['thresholds'][idx])
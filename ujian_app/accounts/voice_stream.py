@@ -0,0 +1,457 @@
+# accounts/voice_stream.py
+"""
+Verifikasi suara streaming lewat WebSocket (ASGI murni, tanpa channels).
+
+Protokol /ws/voice-verification/:
+    klien -> {"type": "start", "sample_rate": 16000}   (teks JSON, 8000/16000/44100/48000)
+    klien -> potongan PCM mono float32 little-endian   (biner, berulang)
+    klien -> {"type": "stop"}                          (teks JSON)
+    server -> {"type": "progress", "frames": n, "llr": x}   (llr null di mode embedding)
+    server -> {"type": "decision", "verified": bool, "early": bool, ...}
+
+Audio di-resample bertahap ke 16 kHz, frame MFCC dihitung bertahap
+(pre-emphasis dengan state, frame 2048/512 seperti librosa), dan LLR
+user-vs-UBM dihitung hanya untuk frame baru di setiap potongan.
+Potongan lebih dari MAX_CHUNK_SECONDS ditolak dan stream diputuskan
+setelah VOICE_STREAM_MAX_SECONDS.
+Keputusan diambil lebih awal begitu rata-rata LLR jelas di atas/bawah
+threshold, atau saat klien berhenti / durasi maksimum tercapai.
+
+Dengan VOICE_SCORING_MODE='embedding' (dan embedding user cocok dengan
+UBM), stream dinilai seperti verify_voice: cosine embedding semua frame
+ucapan vs threshold kalibrasi, diputuskan saat berhenti / durasi maksimum
+(tanpa keputusan awal).
+"""
+import json
+import logging
+from http.cookies import SimpleCookie
+from importlib import import_module
+from math import gcd
+from urllib.parse import urlparse
+
+import librosa
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import reverse
+from scipy.signal import resample_poly
+
+from .audio_decode import TARGET_SR
+from .gmm import llr_samples
+from .models import User, VoiceData
+from .ubm import get_compact_ubm
+from .vad import frame_energy_db, vad_config
+from .voice_cache import get_speaker_model, get_voice_data
+from .voice_embedding import compute_embedding, cosine_score, embedding_threshold, from_bytes, scoring_mode
+
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TRIM_TOP_DB = 20
+SILENCE_RMS = 10 ** (-60 / 20)  # -60 dBFS: frame di bawah ini tidak pernah dianggap ucapan
+ALLOWED_SAMPLE_RATES = (8000, 16000, 44100, 48000)
+MAX_CHUNK_SECONDS = 1.0  # ScriptProcessor klien mengirim 4096 sampel per potongan
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingResampler:
+    """
+    Resampling polyphase bertahap (scipy resample_poly) ke TARGET_SR.
+    Sampel input disimpan sebagai konteks sepanjang setengah filter, dan
+    output hanya dikeluarkan jika seluruh jangkauan filternya sudah
+    diterima. Hasil gabungan semua potongan sama dengan resample satu
+    sinyal utuh, tanpa artefak di batas potongan.
+    """
+
+    def __init__(self, orig_sr, target_sr=TARGET_SR):
+        g = gcd(orig_sr, target_sr)
+        self.up = target_sr // g
+        self.down = orig_sr // g
+        self._half = 10 * max(self.up, self.down)  # setengah panjang filter default resample_poly (domain upsample)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._start = 0  # indeks input global sampel pertama buffer (kelipatan down)
+        self._emitted = 0  # jumlah sampel output yang sudah dikeluarkan
+
+    def push(self, samples, final=False):
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.up == self.down:
+            return samples
+        self._buffer = np.concatenate([self._buffer, samples])
+        if not len(self._buffer):
+            return self._buffer
+        y = resample_poly(self._buffer, self.up, self.down)
+        offset = self._start * self.up // self.down  # indeks output global y[0]
+        end = self._start + len(self._buffer)
+        last = offset + len(y) if final else (end * self.up - self._half) // self.down
+        out = y[max(0, self._emitted - offset):max(0, last - offset)]
+        self._emitted = max(self._emitted, last)
+
+        # buang input yang tidak lagi dibutuhkan sebagai konteks kiri
+        keep_from = (self._emitted * self.down - self._half) // self.up
+        keep_from = keep_from // self.down * self.down
+        if keep_from > self._start:
+            self._buffer = self._buffer[keep_from - self._start:]
+            self._start = keep_from
+        return out.astype(np.float32)
+
+    def flush(self):
+        return self.push(np.zeros(0, dtype=np.float32), final=True)
+
+
+class StreamingMFCC:
+    """
+    MFCC bertahap yang meniru utils.extract_mfcc; setiap frame dihitung dan
+    dilepas tepat sekali:
+    - pre-emphasis 0.97 dengan sampel terakhir disimpan antar potongan,
+    - padding n_fft//2 nol di awal (center=True librosa),
+    - normalisasi puncak: MFCC dihitung dari sinyal mentah lalu c0 digeser
+      sesuai puncak sampel saat frame dilepas (skala amplitudo hanya
+      menggeser log-mel secara konstan, sehingga setelah DCT ortho hanya c0
+      yang berubah),
+    - trim silence dan VAD (accounts.vad) secara kausal: frame ditahan
+      `lookahead` frame, lalu dipertahankan jika RMS > puncak RMS sejauh ini
+      - 20 dB (dan di atas SILENCE_RMS) serta energi c0 > energi maksimum
+      sejauh ini - VOICE_VAD_THRESHOLD_DB, diperlebar VOICE_VAD_HANGOVER frame.
+    Perbedaan dengan versi batch: referensi puncak/energi hanya dari audio
+    yang sudah diterima, batas top_db=80 power_to_db dan
+    VOICE_VAD_MIN_FRACTION tidak dipakai.
+    """
+
+    def __init__(self, sr=TARGET_SR, n_mfcc=13, pre_emphasis_coef=0.97, lookahead=None):
+        self.sr = sr
+        self.n_mfcc = n_mfcc
+        self.pre_emphasis_coef = pre_emphasis_coef
+        self.vad = vad_config()
+        self.hangover = self.vad['hangover'] if self.vad['enabled'] else 0
+        self.lookahead = max(lookahead or getattr(settings, 'VOICE_STREAM_LOOKAHEAD_FRAMES', 16), self.hangover)
+        self._mel_basis = librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=N_MELS)
+        self._window = librosa.filters.get_window('hann', N_FFT, fftbins=True).astype(np.float32)
+        self._buffer = np.zeros(N_FFT // 2, dtype=np.float32)  # padding center
+        self._last_sample = None
+        self.peak = 0.0
+        self.samples = 0
+        self._mfcc = []
+        self._rms = []
+        self._max_rms = 0.0
+        self._max_energy = -np.inf
+        self.released = 0  # frame yang sudah diputuskan (dipertahankan/dibuang)
+        self.kept = 0
+
+    @property
+    def n_frames(self):
+        return len(self._rms)
+
+    @property
+    def seconds(self):
+        return self.samples / self.sr
+
+    @property
+    def kept_fraction(self):
+        return self.kept / self.released if self.released else None
+
+    def push(self, samples):
+        """Tambahkan sampel mentah (float32, sr ini); kembalikan jumlah frame baru."""
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.size == 0:
+            return 0
+        self.samples += samples.size
+        self.peak = max(self.peak, float(np.max(np.abs(samples))))
+
+        emphasized = np.empty_like(samples)
+        if self._last_sample is None:
+            emphasized[0] = samples[0]
+        else:
+            emphasized[0] = samples[0] - self.pre_emphasis_coef * self._last_sample
+        emphasized[1:] = samples[1:] - self.pre_emphasis_coef * samples[:-1]
+        self._last_sample = samples[-1]
+
+        self._buffer = np.concatenate([self._buffer, emphasized])
+        n_new = 1 + (len(self._buffer) - N_FFT) // HOP_LENGTH if len(self._buffer) >= N_FFT else 0
+        if n_new <= 0:
+            return 0
+
+        frames = np.lib.stride_tricks.sliding_window_view(self._buffer, N_FFT)[::HOP_LENGTH][:n_new]
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        mel_db = librosa.power_to_db(power @ self._mel_basis.T, top_db=None)
+        mfcc = librosa.feature.mfcc(S=mel_db.T, n_mfcc=self.n_mfcc).T
+        self._rms.extend(rms)
+        self._mfcc.extend(mfcc)
+        self._max_rms = max(self._max_rms, float(rms.max()))
+        self._max_energy = max(self._max_energy, float(frame_energy_db(mfcc, N_MELS).max()))
+
+        self._buffer = self._buffer[n_new * HOP_LENGTH:]
+        return n_new
+
+    def _speech(self, start, stop):
+        """Flag ucapan (sebelum hangover) frame [start, stop) dengan referensi saat ini."""
+        rms = np.asarray(self._rms[start:stop])
+        speech = (rms > self._max_rms * 10 ** (-TRIM_TOP_DB / 20)) & (rms > SILENCE_RMS)
+        if self.vad['enabled']:
+            energy = frame_energy_db(np.asarray(self._mfcc[start:stop]), N_MELS)
+            speech &= energy > self._max_energy - self.vad['threshold_db']
+        return speech
+
+    def pop_ready(self, final=False):
+        """
+        Frame MFCC (ternormalisasi puncak, lolos trim/VAD) yang belum pernah
+        dilepas dan sudah melewati lookahead; final=True melepas semuanya.
+        """
+        start = self.released
+        stop = self.n_frames if final else max(start, self.n_frames - self.lookahead)
+        if stop <= start:
+            return np.empty((0, self.n_mfcc))
+
+        lo, hi = max(0, start - self.hangover), min(self.n_frames, stop + self.hangover)
+        speech = self._speech(lo, hi)
+        if self.hangover:
+            speech = np.convolve(speech, np.ones(2 * self.hangover + 1), mode='same') > 0
+        keep = speech[start - lo:stop - lo]
+        self.released = stop
+        self.kept += int(keep.sum())
+
+        mfcc = np.array(self._mfcc[start:stop], dtype=np.float64)[keep]
+        # y / peak  ->  log-mel bergeser -20*log10(peak) dB  ->  c0 bergeser * sqrt(N_MELS)
+        mfcc[:, 0] -= 20 * np.log10(self.peak + 1e-9) * np.sqrt(N_MELS)
+        return mfcc
+
+
+class StreamingVerifier:
+    """
+    Uji sekuensial LLR: rata-rata LLR per frame dibandingkan dengan
+    threshold - margin milik user. Setiap frame dinilai sekali; jumlah dan
+    jumlah kuadrat LLR disimpan berjalan. Keputusan awal diambil jika batas
+    kepercayaan rata-rata (z * std / sqrt(n)) sudah seluruhnya di atas atau
+    di bawah threshold. Frame MFCC yang bertetangga saling berkorelasi,
+    sehingga z dibuat konservatif.
+    """
+
+    def __init__(self, gmm_user, ubm_scaler, ubm_gmm, threshold,
+                 min_frames=None, max_seconds=None, confidence_z=None):
+        self.gmm_user = gmm_user
+        self.ubm_scaler = ubm_scaler
+        self.ubm_gmm = ubm_gmm
+        self.threshold = threshold
+        self.min_frames = min_frames or getattr(settings, 'VOICE_STREAM_MIN_FRAMES', 60)
+        self.max_seconds = max_seconds or getattr(settings, 'VOICE_STREAM_MAX_SECONDS', 10.0)
+        self.confidence_z = confidence_z or getattr(settings, 'VOICE_STREAM_CONFIDENCE_Z', 3.0)
+        self.mfcc = StreamingMFCC()
+        self.llr = None
+        self.frames = 0
+        self._llr_sum = 0.0
+        self._llr_sq_sum = 0.0
+
+    def _score_new(self, final=False):
+        """Nilai hanya frame yang baru dilepas StreamingMFCC; perbarui rata-rata berjalan."""
+        feats = self.mfcc.pop_ready(final)
+        if len(feats):
+            per_frame = llr_samples(self.gmm_user, self.ubm_gmm, self.ubm_scaler.transform(feats))
+            self._llr_sum += float(per_frame.sum())
+            self._llr_sq_sum += float(np.square(per_frame).sum())
+            self.frames += len(per_frame)
+        self.llr = self._llr_sum / self.frames if self.frames else None
+
+    def _decision(self, verified, early):
+        return {
+            'verified': bool(verified),
+            'early': early,
+            'llr': self.llr,
+            'frames': self.frames,
+            'vad_kept': self.mfcc.kept_fraction,
+            'seconds': round(self.mfcc.seconds, 2),
+        }
+
+    def push(self, samples):
+        """Tambahkan audio; kembalikan dict keputusan jika sudah bisa diputuskan, selain itu None."""
+        if not self.mfcc.push(samples):
+            return None
+        if self.mfcc.seconds >= self.max_seconds:
+            return self.finish()
+        self._score_new()
+        if self.llr is None or self.frames < self.min_frames:
+            return None
+        variance = max(self._llr_sq_sum / self.frames - self.llr ** 2, 0.0)
+        bound = self.confidence_z * np.sqrt(variance / self.frames)
+        if self.llr - bound > self.threshold:
+            return self._decision(True, early=True)
+        if self.llr + bound < self.threshold:
+            return self._decision(False, early=True)
+        return None
+
+    def finish(self):
+        """Keputusan akhir dengan rata-rata LLR seluruh frame ucapan (seperti verify_voice)."""
+        self._score_new(final=True)
+        return self._decision(self.llr is not None and self.llr > self.threshold, early=False)
+
+
+class StreamingEmbeddingVerifier(StreamingVerifier):
+    """
+    Mode embedding: frame ucapan dikumpulkan dan cosine supervector-nya
+    dibandingkan dengan embedding user saat stream selesai. Supervector
+    butuh statistik seluruh ucapan, jadi tidak ada keputusan awal.
+    """
+
+    def __init__(self, enrolled, ubm_scaler, ubm_gmm, threshold, **kwargs):
+        super().__init__(None, ubm_scaler, ubm_gmm, threshold, **kwargs)
+        self.enrolled = enrolled
+        self.score = None
+        self._features = []
+
+    def _score_new(self, final=False):
+        feats = self.mfcc.pop_ready(final)
+        if len(feats):
+            self._features.append(feats)
+            self.frames += len(feats)
+
+    def _decision(self, verified, early):
+        return dict(super()._decision(verified, early), score=self.score)
+
+    def push(self, samples):
+        if not self.mfcc.push(samples):
+            return None
+        if self.mfcc.seconds >= self.max_seconds:
+            return self.finish()
+        self._score_new()
+        return None
+
+    def finish(self):
+        self._score_new(final=True)
+        if self._features:
+            self.score = cosine_score(compute_embedding(self._features, self.ubm_scaler, self.ubm_gmm), self.enrolled)
+        return self._decision(self.score is not None and self.score >= self.threshold, early=False)
+
+
+# -- ASGI -----------------------------------------------------------------
+
+def _headers(scope):
+    return {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope.get('headers', [])}
+
+
+def _same_origin(headers):
+    origin = headers.get('origin')
+    if not origin:
+        return True
+    return urlparse(origin).netloc == headers.get('host')
+
+
+def _load_session(headers):
+    cookie = SimpleCookie()
+    cookie.load(headers.get('cookie', ''))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    engine = import_module(settings.SESSION_ENGINE)
+    return engine.SessionStore(morsel.value if morsel else None)
+
+
+def _prepare(session):
+    """(user, StreamingVerifier) atau (None, pesan error); dijalankan di thread sinkron."""
+    user_id = session.get('pre_verified_user')
+    if not user_id:
+        return None, 'Sesi login tidak ditemukan'
+    try:
+        user = User.objects.get(id=user_id)
+        vd = get_voice_data(user)
+    except (User.DoesNotExist, VoiceData.DoesNotExist):
+        return None, 'Model suara belum tersedia'
+    ubm_scaler, ubm_gmm = get_compact_ubm()
+    if scoring_mode() == 'embedding':
+        # sama dengan verify_voice: tanpa embedding yang cocok dengan UBM, pakai LLR
+        enrolled = from_bytes(VoiceData.objects.filter(pk=vd.pk).values_list('embedding', flat=True).get())
+        if enrolled is not None:
+            return user, StreamingEmbeddingVerifier(enrolled, ubm_scaler, ubm_gmm, embedding_threshold())
+    _, gmm_user = get_speaker_model(vd)
+    return user, StreamingVerifier(gmm_user, ubm_scaler, ubm_gmm, vd.threshold - vd.margin)
+
+
+def _record_result(session, user, decision):
+    """Perbarui sesi seperti view voice_verification; kembalikan payload untuk klien."""
+    payload = {'type': 'decision', **decision}
+    if decision['verified']:
+        session['voice_verified_user'] = user.id
+        session.pop('voice_attempts', None)
+        payload['redirect'] = reverse('face_verification')
+    else:
+        attempts = session.get('voice_attempts', 0) + 1
+        session['voice_attempts'] = attempts
+        if attempts >= 3:
+            session.flush()
+            payload['redirect'] = reverse('login')
+        else:
+            payload['error'] = f'Gagal verifikasi ({attempts}/3)'
+    session.save()
+    logger.debug("Stream suara %s: %s", user.username, decision)
+    return payload
+
+
+async def voice_verification_ws(scope, receive, send):
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+    headers = _headers(scope)
+    if not _same_origin(headers):
+        await send({'type': 'websocket.close', 'code': 4403})
+        return
+
+    session = _load_session(headers)
+    user, verifier = await sync_to_async(_prepare)(session)
+    await send({'type': 'websocket.accept'})
+
+    async def send_json(data):
+        await send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+    if user is None:
+        await send_json({'type': 'error', 'error': verifier})
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    async def reject(error):
+        await send_json({'type': 'error', 'error': error})
+        await send({'type': 'websocket.close', 'code': 4400})
+
+    sample_rate = TARGET_SR
+    resampler = StreamingResampler(sample_rate)
+    started = False
+
+    def process(data):
+        return verifier.push(resampler.push(np.frombuffer(data, dtype='<f4')))
+
+    def stop():
+        decision = verifier.push(resampler.flush())
+        return decision or verifier.finish()
+
+    push = sync_to_async(process, thread_sensitive=False)
+    decision = None
+    while decision is None:
+        event = await receive()
+        if event['type'] == 'websocket.disconnect':
+            return
+        data = event.get('bytes')
+        if data:
+            if len(data) % 4 or len(data) > 4 * int(MAX_CHUNK_SECONDS * sample_rate):
+                await reject('Potongan audio tidak valid')
+                return
+            started = True
+            decision = await push(data)
+            if decision is None and verifier.frames:
+                await send_json({'type': 'progress', 'frames': verifier.frames, 'llr': verifier.llr})
+            continue
+
+        try:
+            message = json.loads(event.get('text') or '{}')
+        except ValueError:
+            continue
+        if message.get('type') == 'start' and not started:
+            try:
+                sample_rate = int(message.get('sample_rate') or TARGET_SR)
+            except (TypeError, ValueError):
+                sample_rate = None
+            if sample_rate not in ALLOWED_SAMPLE_RATES:
+                await reject('Sample rate tidak didukung')
+                return
+            resampler = StreamingResampler(sample_rate)
+        elif message.get('type') == 'stop':
+            decision = await sync_to_async(stop, thread_sensitive=False)()
+
+    payload = await sync_to_async(_record_result)(session, user, decision)
+    await send_json(payload)
+    await send({'type': 'websocket.close', 'code': 1000})
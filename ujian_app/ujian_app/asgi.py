@@ -13,4 +13,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ujian_app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Diimpor setelah Django siap (butuh app registry)
+from accounts.voice_stream import voice_verification_ws  # noqa: E402
+
+WEBSOCKET_ROUTES = {
+    '/ws/voice-verification/': voice_verification_ws,
+}
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        handler = WEBSOCKET_ROUTES.get(scope['path'])
+        if handler is None:
+            await receive()  # websocket.connect
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        await handler(scope, receive, send)
+        return
+    await django_application(scope, receive, send)
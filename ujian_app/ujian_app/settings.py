@@ -50,6 +50,84 @@ YOLO_FACE_MODEL = os.path.join(BASE_DIR, 'face_models', 'best.pt')
 FACE_THRESHOLD = 0.5 # Threshold verifikasi wajah
 VOICE_THRESHOLD_DEFAULT = -120.0
 VOICE_VERIFICATION_MARGIN = 10.0
+VOICE_UBM_CHECK_INTERVAL = 5.0  # detik antar pengecekan mtime VOICE_UBM
+VOICE_MODEL_CACHE_SIZE = 512  # jumlah model speaker (scaler, gmm) yang disimpan di memori per proses
+FFMPEG_BINARY = 'ffmpeg'  # decode audio WebM/Opus/MP3 lewat pipe
+AUDIO_DECODE_TIMEOUT = 30  # detik
+
+# Verifikasi suara streaming lewat WebSocket /ws/voice-verification/.
+# Hanya berfungsi jika dijalankan dengan server ASGI (uvicorn/daphne
+# ujian_app.asgi:application); jika gagal tersambung, halaman kembali ke upload.
+VOICE_STREAMING = False
+VOICE_STREAM_MIN_FRAMES = 60  # ~2 detik (hop 512 @ 16 kHz) sebelum boleh memutuskan lebih awal
+VOICE_STREAM_MAX_SECONDS = 10.0
+VOICE_STREAM_CONFIDENCE_Z = 3.0
+VOICE_STREAM_LOOKAHEAD_FRAMES = 16  # frame ditahan sebelum trim/VAD kausal diputuskan (~0.5 detik)
+VOICE_ENROLLMENT_WORKERS = None  # proses ekstraksi fitur run_voice_jobs (None = jumlah CPU)
+# 'legacy': GMM 8 komponen dilatih EM dari nol; 'map': adaptasi MAP mean dari VOICE_UBM
+VOICE_ENROLLMENT_MODE = 'legacy'
+VOICE_MAP_RELEVANCE = 16.0  # faktor relevansi r adaptasi MAP
+VOICE_TOPC = 5  # seleksi Gaussian top-C untuk model adaptasi MAP (0 = skor penuh)
+# 'llr': GMM user vs UBM; 'embedding': cosine supervector GMM (accounts.voice_embedding).
+# User tanpa embedding tetap memakai LLR (isi dengan backfill_voice_embeddings).
+VOICE_SCORING_MODE = 'llr'
+# Cosine minimal untuk diterima / teridentifikasi. None: pakai hasil kalibrasi sampel
+# held-out (voice_score_matrix --mode embedding --apply) di VOICE_EMBEDDING_CALIBRATION
+VOICE_EMBEDDING_THRESHOLD = None
+VOICE_EMBEDDING_CALIBRATION = os.path.join(BASE_DIR, 'voice_ubm', 'embedding_calibration.json')
+VOICE_EMBEDDING_INDEX_MAX_AGE = 300  # detik sebelum indeks embedding dibangun ulang dari DB
+VOICE_FEATURE_CACHE_DIR = os.path.join(BASE_DIR, 'voice_features')  # cache MFCC per isi file (feature_cache)
+BENCHMARK_DIR = os.path.join(BASE_DIR, 'benchmarks')  # laporan JSON benchmark/evaluasi (di-gitignore)
+VOICE_FEATURE_BATCH_SIZE = 16  # jumlah file per batch ekstraksi MFCC
+VOICE_EVALUATION_WORKERS = 1  # proses untuk evaluasi suara di view (command evaluate_voice: --workers)
+# VAD energi per frame (accounts.vad): buang jeda di tengah ucapan sebelum penilaian.
+# Model speaker dan threshold yang ada dilatih tanpa VAD, jadi aktifkan bersama
+# langkah latih ulang: cek dengan vad_report, set True, latih ulang model suara
+# (enroll_kelas_voices / upload ulang), lalu voice_score_matrix --apply.
+VOICE_VAD = False
+VOICE_VAD_THRESHOLD_DB = 30.0  # frame dipertahankan jika energi > persentil 95 klip - nilai ini
+VOICE_VAD_HANGOVER = 3  # frame tetangga yang ikut dipertahankan di kiri/kanan frame ucapan
+VOICE_VAD_MIN_FRACTION = 0.2  # minimal fraksi frame yang dipertahankan per klip
+
+# Daemon inferensi wajah (python manage.py run_inference_server).
+# Jika socket tidak bisa dihubungi, inferensi berjalan di proses web.
+INFERENCE_SOCKET = '/tmp/ujian_app_inference.sock'
+INFERENCE_TIMEOUT = 5.0  # detik per request ke daemon
+INFERENCE_RETRY_AFTER = 10.0  # detik menunggu sebelum mencoba daemon lagi
+
+# Micro-batching frame proctoring lintas request
+PROCTORING_BATCHING = True
+PROCTORING_BATCH_MAX_SIZE = 16
+PROCTORING_BATCH_MAX_WAIT_MS = 5.0
+
+# Backend detektor wajah: 'pytorch' (best.pt), 'onnx' atau 'openvino'.
+# Ekspor dulu: python manage.py export_face_detector --format openvino [--int8]
+FACE_DETECTOR_BACKEND = 'pytorch'
+FACE_DETECTOR_INT8 = False
+
+# Cache encoding wajah terdaftar per proses (LRU)
+FACE_ENCODING_CACHE_SIZE = 2048
+FACE_ENCODING_CACHE_TTL = 300  # detik, batas basi untuk worker lain
+
+# Indeks 1:N encoding wajah (evaluasi, deteksi enroll ganda, identifikasi)
+FACE_INDEX_MAX_AGE = 300  # detik sebelum indeks dibangun ulang dari DB
+FACE_DUPLICATE_THRESHOLD = 0.4  # jarak maksimal dianggap wajah yang sama
+
+# Sisi terpanjang gambar wajah setelah decode (detektor memakai 640 px)
+FACE_DECODE_MAX_SIDE = 1280
+
+# Tahap encoding wajah: crop persegi ukuran tetap di sekitar kotak YOLO
+FACE_CROP_SIZE = 200  # piksel sisi crop
+FACE_CROP_MARGIN = 0.2  # pelebaran per sisi relatif terhadap kotak
+FACE_LANDMARK_MODEL = 'small'  # 'small' (5 titik) atau 'large' (68 titik)
+FACE_ENCODING_JITTERS = 1
+
+# Penyimpanan crop wajah terdeteksi (MEDIA_ROOT/detected_faces) di latar belakang
+FACE_CROP_SAVE_MODE = 'all'  # 'all', 'sample' atau 'off'
+FACE_CROP_SAMPLE_RATE = 0.1  # dipakai jika mode 'sample'
+FACE_CROP_QUEUE_SIZE = 256
+FACE_CROP_MAX_AGE_DAYS = 30  # retensi: python manage.py prune_detected_faces
+FACE_CROP_MAX_PER_USER = 200
 
 INSTALLED_APPS = [
     'django.contrib.admin',